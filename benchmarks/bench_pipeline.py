@@ -0,0 +1,198 @@
+"""
+End-to-end latency and throughput of the decode pipeline, from UDP datagram to a row drawn in the message table, with
+the time spent in each stage along the way.
+
+Each datagram carries a sequence number, which the stub multimon-ng (``stub_multimon.py``) echoes back as the message,
+so every stage can be timed per message.  Run with ``python benchmarks/bench_pipeline.py``; ``--rate 0`` sends as
+fast as possible, and ``--mmng-binary`` swaps in another decoder that echoes its input the same way.
+"""
+import argparse
+import asyncio
+import socket
+import statistics
+import time
+from pathlib import Path
+
+from textual.app import App
+
+from mmng_ui.decoder import AudioBuffer, DecodeSource, UDPForwarder, multimon_args, read_records
+from mmng_ui.message_table import Column, MessageTable
+from mmng_ui.scheduler import UpdateScheduler
+
+STUB = str(Path(__file__).parent / 'stub_multimon.py')
+STAGES = ('udp ingest', 'stdin write', 'stdout read', 'frame wait', 'parse', 'render', 'end to end')
+
+
+def sequence(record: bytes) -> int:
+    """The sequence number the stub echoed back in a line of its output."""
+    return int(record.split(b'Alpha:')[1].split()[0])
+
+
+class Timings:
+    """When each message passed each point in the pipeline, by sequence number."""
+
+    def __init__(self) -> None:
+        self.sent: dict[int, float] = {}
+        self.ingested: dict[int, float] = {}
+        self.written: dict[int, float] = {}
+        self.read: dict[int, float] = {}
+        self.frame: dict[int, float] = {}
+        self.parsed: dict[int, float] = {}
+        self.parse_cost: dict[int, float] = {}
+        self.rendered: dict[int, float] = {}
+
+    def stages(self) -> dict[str, list[float]]:
+        stages = {stage: [] for stage in STAGES}
+        for seq, rendered in self.rendered.items():
+            stages['udp ingest'].append(self.ingested[seq] - self.sent[seq])
+            stages['stdin write'].append(self.written[seq] - self.ingested[seq])
+            stages['stdout read'].append(self.read[seq] - self.written[seq])
+            stages['frame wait'].append(self.frame[seq] - self.read[seq])
+            stages['parse'].append(self.parse_cost[seq])
+            stages['render'].append(rendered - self.parsed[seq])
+            stages['end to end'].append(rendered - self.sent[seq])
+        return stages
+
+
+class TimedForwarder(UDPForwarder):
+    def __init__(self, source: DecodeSource, timings: Timings) -> None:
+        super().__init__(source)
+        self.timings = timings
+
+    def datagram_received(self, data, addr):
+        self.timings.ingested[int(data)] = time.perf_counter()
+        super().datagram_received(data, addr)
+
+
+class TimedStdin:
+    """Wraps multimon-ng's stdin to note when each datagram's audio has been written to it."""
+
+    def __init__(self, stdin: asyncio.StreamWriter, timings: Timings) -> None:
+        self.stdin = stdin
+        self.timings = timings
+        self.pending: list[int] = []
+
+    def is_closing(self) -> bool:
+        return self.stdin.is_closing()
+
+    def write(self, chunk: bytes) -> None:
+        self.stdin.write(chunk)
+        self.pending.extend(int(word) for word in chunk.split())
+
+    async def drain(self) -> None:
+        await self.stdin.drain()
+        now = time.perf_counter()
+        for seq in self.pending:
+            self.timings.written[seq] = now
+        self.pending.clear()
+
+
+class BenchApp(App):
+    def compose(self):
+        yield MessageTable(Column('time', 'Time'), Column('address', 'Address', justify='right'),
+                           Column('message', 'Message', wrap=True))
+
+
+async def run(mmng_binary: str, count: int, rate: float, max_fps: float) -> tuple[Timings, float]:
+    timings = Timings()
+    with socket.socket(socket.AF_INET6, socket.SOCK_DGRAM) as sock:
+        sock.bind(('::', 0))
+        port = sock.getsockname()[1]
+
+    app = BenchApp()
+    async with app.run_test(size=(160, 50)):
+        table = app.query_one(MessageTable)
+        source = DecodeSource(port, AudioBuffer())
+
+        def render(records: list[bytes]) -> None:
+            start = time.perf_counter()
+            for record in records:
+                timings.frame[sequence(record)] = start
+            results = [result for result in map(source.parse_record, records) if result is not None]
+            parsed = time.perf_counter()
+            seqs = [int(result.trim_message.split()[0]) for result in results]
+            for seq in seqs:
+                timings.parsed[seq] = parsed
+                timings.parse_cost[seq] = (parsed - start) / len(results)
+            table.add_rows([result.current_time.strftime('%H:%M:%S'), result.address, result.trim_message]
+                           for result in results)
+
+            def rendered() -> None:
+                now = time.perf_counter()
+                for seq in seqs:
+                    timings.rendered[seq] = now
+
+            table.call_after_refresh(rendered)
+
+        updates = UpdateScheduler(render, max_fps=max_fps)
+        await source.start(mmng_binary, multimon_args(False), lambda source: TimedForwarder(source, timings))
+        # Swap in a feeder that notes write times; nothing has been buffered yet
+        source.writer.cancel()
+        source.writer = asyncio.get_running_loop().create_task(
+            source.audio.feed(TimedStdin(source.process.stdin, timings)))
+
+        async def read() -> None:
+            async for records in read_records(source.process.stdout):
+                now = time.perf_counter()
+                for record in records:
+                    timings.read[sequence(record)] = now
+                    updates.add(record)
+
+        reader = asyncio.create_task(read())
+        start = time.perf_counter()
+        with socket.socket(socket.AF_INET6, socket.SOCK_DGRAM) as sock:
+            for seq in range(count):
+                if rate:
+                    delay = start + seq / rate - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                else:
+                    # asyncio reads one datagram per loop iteration, so sending any faster just overflows the socket
+                    await asyncio.sleep(0)
+                timings.sent[seq] = time.perf_counter()
+                sock.sendto(f'{seq}\n'.encode(), ('::1', port))
+
+        # Wait until everything that arrived has been drawn, or nothing more turns up
+        last, idle_since = -1, time.perf_counter()
+        while len(timings.rendered) < len(timings.ingested) or len(timings.ingested) < count:
+            await asyncio.sleep(0.05)
+            if len(timings.rendered) != last:
+                last, idle_since = len(timings.rendered), time.perf_counter()
+            elif time.perf_counter() - idle_since > 2:
+                break
+        elapsed = max(timings.rendered.values(), default=start) - start
+
+        updates.close()
+        reader.cancel()
+        await source.close()
+    return timings, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=5_000, help='datagrams to send')
+    parser.add_argument('--rate', type=float, default=1_000, help='datagrams per second, or 0 for as fast as possible')
+    parser.add_argument('--max-fps', type=float, default=20, help='UI frame rate cap')
+    parser.add_argument('--mmng-binary', default=STUB, help='decoder to run (default: the stub)')
+    options = parser.parse_args()
+
+    timings, elapsed = asyncio.run(run(options.mmng_binary, options.count, options.rate, options.max_fps))
+
+    rendered = len(timings.rendered)
+    print(f'{options.count:,} datagrams sent at {options.rate or "max"}/s, {len(timings.ingested):,} received, '
+          f'{rendered:,} rendered')
+    if elapsed:
+        print(f'sustained throughput: {rendered / elapsed:,.0f} messages/s')
+    print(f'{"stage":<16}{"median":>10}{"p95":>10}{"p99":>10}{"max":>10}  (ms)')
+    for stage, values in timings.stages().items():
+        if not values:
+            continue
+        values.sort()
+        p95 = values[int(len(values) * 0.95) - 1]
+        p99 = values[int(len(values) * 0.99) - 1]
+        print(f'{stage:<16}{statistics.median(values) * 1000:>10.3f}{p95 * 1000:>10.3f}{p99 * 1000:>10.3f}'
+              f'{values[-1] * 1000:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
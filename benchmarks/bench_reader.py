@@ -0,0 +1,71 @@
+"""
+Compare ``ParseLine.parse`` throughput against the original implementation, and each installed JSON decoder.
+
+Run with ``python benchmarks/bench_reader.py``; the original implementation needs the ``moment`` extra, and is skipped
+without it.
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from mmng_ui import reader  # noqa: E402
+from mmng_ui.jsondecode import BACKENDS, select_backend  # noqa: E402
+from samples import JSON_LINES, POCSAG_LINES, corpus  # noqa: E402
+
+try:
+    import legacy_reader
+except ImportError:  # moment is not installed
+    legacy_reader = None
+
+LINES = 50_000
+
+
+def lines_per_second(parser_class, lines: list[str]) -> float:
+    parser = parser_class()
+    parse = parser.parse
+    start = time.perf_counter()
+    for line in lines:
+        parse(line)
+    return len(lines) / (time.perf_counter() - start)
+
+
+def batch_lines_per_second(lines: list[str]) -> float:
+    """Throughput of ``parse_many`` over the same lines as one raw bytes buffer."""
+    chunk = '\n'.join(lines).encode()
+    parser = reader.ParseLine()
+    start = time.perf_counter()
+    for _ in parser.parse_many(chunk):
+        pass
+    return len(lines) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    for name, sample in (('text', POCSAG_LINES), ('json', JSON_LINES)):
+        lines = corpus(sample, LINES)
+        after = lines_per_second(reader.ParseLine, lines)
+        batch = batch_lines_per_second(lines)
+        if legacy_reader is None:
+            print(f'{name:>5}: current {after:>10,.0f} lines/s   parse_many(bytes) {batch:>10,.0f} lines/s   '
+                  f'(legacy needs moment)')
+            continue
+        before = lines_per_second(legacy_reader.ParseLine, lines)
+        print(f'{name:>5}: legacy {before:>10,.0f} lines/s   current {after:>10,.0f} lines/s   '
+              f'parse_many(bytes) {batch:>10,.0f} lines/s   speedup {after / before:.2f}x / {batch / before:.2f}x')
+
+    records = [line.encode() for line in corpus(JSON_LINES, LINES)]
+    for name in BACKENDS:
+        try:
+            _, decode = select_backend(name)
+        except ImportError:
+            print(f'{name:>8}: not installed')
+            continue
+        start = time.perf_counter()
+        for record in records:
+            decode(record)
+        print(f'{name:>8}: {len(records) / (time.perf_counter() - start):>10,.0f} JSON lines/s decoded')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Startup cost: importing the command line, with and without Textual, and probing multimon-ng with and without the cache.
+
+Each import is timed in a fresh interpreter, less the cost of starting one that imports nothing.  ``mmng_ui.cli`` is
+what headless mode and the replay commands load; ``mmng_ui.pocsag`` adds the Textual UI, as every launch used to.
+Run with ``python benchmarks/bench_startup.py``; ``--mmng-binary`` probes the real decoder instead of the stub.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from mmng_ui.decoder import probe_multimon
+
+STUB = str(Path(__file__).parent / 'stub_multimon.py')
+MODULES = ('mmng_ui.cli', 'mmng_ui.pocsag')
+
+
+def interpreter_time(statement: str, repeat: int) -> float:
+    """Best-of-``repeat`` wall time of a fresh interpreter running ``statement``, in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], check=True)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def probe_time(mmng_binary: str, cache_path: str | None, repeat: int) -> float:
+    """Best-of-``repeat`` time of one probe, in milliseconds, with the cache already filled if there is one."""
+    async def run() -> float:
+        await probe_multimon(mmng_binary, cache_path)
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await probe_multimon(mmng_binary, cache_path)
+            best = min(best, time.perf_counter() - start)
+        return best * 1000
+
+    return asyncio.run(run())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mmng-binary', default=STUB)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    baseline = interpreter_time('pass', args.repeat)
+    print(f'{"import":>28} {"ms":>8}')
+    for module in MODULES:
+        print(f'{module:>28} {interpreter_time(f"import {module}", args.repeat) - baseline:>8.1f}')
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f'\n{"multimon-ng probe":>28} {"ms":>8}')
+        print(f'{"uncached":>28} {probe_time(args.mmng_binary, None, args.repeat):>8.1f}')
+        cache_path = os.path.join(directory, 'probe.json')
+        print(f'{"cached":>28} {probe_time(args.mmng_binary, cache_path, args.repeat):>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Reading and parsing multimon-ng's stdout: line by line as ``str``, against whole chunks parsed as bytes.
+
+The line path is what the pipeline used to do: ``readline()``, decode and strip each line, then ``ParseLine.parse``.
+The record path reads 16 KiB at a time with ``read_records``, split into lines in one call, and hands each to
+``ParseLine.parse_record``, so only the message body is decoded.  Both read the same output from an
+``asyncio.StreamReader``, and are reported in microseconds per message, the most memory ``tracemalloc`` saw in use at
+once, and the memory each kept message holds.
+
+Run with ``python benchmarks/bench_stdout.py``.
+"""
+import asyncio
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from mmng_ui.decoder import read_lines, read_records  # noqa: E402
+from mmng_ui.reader import ParseLine, PocsagMessage  # noqa: E402
+from samples import POCSAG_LINES, corpus  # noqa: E402
+
+LINES = 50_000
+
+
+async def stream(data: bytes) -> asyncio.StreamReader:
+    """A stream that ``data`` arrives on in pipe-sized pieces, each once the reader has taken the last."""
+    reader = asyncio.StreamReader(limit=1 << 20)
+
+    async def write() -> None:
+        for start in range(0, len(data), 1 << 16):
+            reader.feed_data(data[start:start + (1 << 16)])
+            await asyncio.sleep(0)
+        reader.feed_eof()
+
+    asyncio.get_running_loop().create_task(write())
+    return reader
+
+
+async def by_line(data: bytes, keep: Callable[[PocsagMessage], Any]) -> None:
+    parser = ParseLine()
+    async for line in read_lines(await stream(data)):
+        keep(parser.parse(line)[0])
+
+
+async def by_record(data: bytes, keep: Callable[[PocsagMessage], Any]) -> None:
+    parser = ParseLine()
+    async for records in read_records(await stream(data)):
+        for record in records:
+            keep(parser.parse_record(record))
+
+
+def measure(path, data: bytes, repeat: int = 10) -> tuple[float, float, float]:
+    """Best microseconds per message, peak KiB in use, and bytes retained per message, for one way of reading."""
+    best = float('inf')
+    for _ in range(repeat):
+        kept = []
+        start = time.perf_counter()
+        asyncio.run(path(data, kept.append))
+        best = min(best, time.perf_counter() - start)
+
+    # Keep one run's messages, then measure another that keeps none: its peak is the working set of reading and
+    # parsing alone
+    tracemalloc.start()
+    kept = []
+    asyncio.run(path(data, kept.append))
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    asyncio.run(path(data, lambda message: None))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best / len(kept) * 1e6, (peak - retained) / 1024, retained / len(kept)
+
+
+def main() -> None:
+    data = ('\n'.join(corpus(POCSAG_LINES, LINES)) + '\n').encode()
+    print(f'{LINES:,} lines of POCSAG output')
+    print(f'{"path":>10} {"µs/msg":>8} {"peak KiB":>9} {"B/msg kept":>11}')
+    for name, path in (('line', by_line), ('record', by_record)):
+        per_message, peak, retained = measure(path, data)
+        print(f'{name:>10} {per_message:>8.2f} {peak:>9.0f} {retained:>11.0f}')
+
+
+if __name__ == '__main__':
+    main()
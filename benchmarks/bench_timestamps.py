@@ -0,0 +1,47 @@
+"""
+Per-line cost of timestamp handling: ``moment`` (mmng-ui 1.0.x) against the datetime path in the reader.
+
+Run with ``python benchmarks/bench_timestamps.py``; needs the ``moment`` extra for the baseline.
+"""
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import moment  # noqa: E402
+
+import legacy_reader  # noqa: E402
+from mmng_ui import reader  # noqa: E402
+from samples import POCSAG_LINES  # noqa: E402
+
+NUMBER = 20_000
+
+
+def per_call(statement, number: int = NUMBER) -> float:
+    """Best-of-five cost of one call to ``statement``, in microseconds."""
+    return min(timeit.repeat(statement, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    iso, long = '2024-09-23 12:38:00', '23 September 2024 12:38:00'
+    rows = [
+        ('current time', lambda: moment.now(), datetime.now),
+        ('ISO timestamp', lambda: moment.date(iso, 'YYYY-MM-DD HH:mm:ss'),
+         lambda: reader.decode_timestamp.__wrapped__(iso)),
+        ('long timestamp', lambda: moment.date(long, '%d %B %Y %H:%M:%S'),
+         lambda: reader.decode_timestamp.__wrapped__(long)),
+        ('memoized timestamp', lambda: moment.date(iso, 'YYYY-MM-DD HH:mm:ss'),
+         lambda: reader.decode_timestamp(iso)),
+    ]
+    legacy, current = legacy_reader.ParseLine(), reader.ParseLine()
+    rows.append(('whole line', lambda: legacy.parse(POCSAG_LINES[0]), lambda: current.parse(POCSAG_LINES[0])))
+
+    print(f'{"":>20} {"before":>10} {"after":>10}')
+    for name, before, after in rows:
+        print(f'{name:>20} {per_call(before):>8.2f}us {per_call(after):>8.2f}us')
+
+
+if __name__ == '__main__':
+    main()
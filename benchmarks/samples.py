@@ -0,0 +1,22 @@
+"""Representative multimon-ng output shared by the benchmarks."""
+
+POCSAG_LINES = [
+    '2024-09-23 12:38:00: POCSAG512: Address:  162202  Function: 0  Alpha:   @@E24092310740 SIG2 BNSD7879 REQ1220 '
+    'DSP1237 LOC 122 DAY ST BAIRNSDALE /VICTORIA ST :@BAIRNSDALE PUBLIC HOSPITAL SVVB SE 8501 E11 CC: IHTAIR2 - AIR '
+    'AMBULANCE TRANSFER ACUITY: MEDIUM<NUL>',
+    '2024-09-23 12:38:01: POCSAG1200: Address: 1920312  Function: 3  Alpha:   Time Critical Incident - Clear ASAP<EOT>',
+    '2024-09-23 12:38:02: POCSAG1200: Address:  123456  Function: 1  Numeric:   0412 345 678',
+    '2024-09-23 12:38:03: POCSAG2400: Address:    2001  Function: 2  Alpha:   ÄTESTÜ Weekly page test<ETX><NUL>',
+    '2024-09-23 12:38:04: POCSAG512: Address:  162202  Function: 0 ',
+]
+
+JSON_LINES = [
+    '{"demod_name":"POCSAG1200","address":1920312,"function":3,'
+    '"alpha":"Time Critical Incident - Clear ASAP - or advise Comms of Time to Clear (Via Radio)"}',
+    '{"demod_name":"POCSAG512","address":162202,"function":0,"alpha":"@@E24092310740 SIG2 BNSD7879 REQ1220<NUL>"}',
+]
+
+
+def corpus(lines: list[str], size: int) -> list[str]:
+    """Repeat ``lines`` out to ``size`` entries."""
+    return (lines * (size // len(lines) + 1))[:size]
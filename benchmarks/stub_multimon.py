@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+A stand-in for multimon-ng that decodes instantly: every whitespace-separated word of "audio" on stdin comes back as one
+POCSAG alpha line, so the pipeline can be benchmarked anywhere, without a radio or the real decoder.
+"""
+import sys
+
+PAGE = 'AMBULANCE TRANSFER ACUITY: MEDIUM LOC 122 DAY ST BAIRNSDALE /VICTORIA ST'
+
+if '-h' in sys.argv:
+    sys.stderr.write('multimon-ng 1.3.1 (benchmark stub)\n')
+    sys.exit(1)
+
+for chunk in iter(lambda: sys.stdin.buffer.read1(65536), b''):
+    sys.stdout.write(''.join(
+        f'2024-09-23 12:38:00: POCSAG1200: Address:  162202  Function: 0  Alpha:   {word} {PAGE}<NUL>\n'
+        for word in chunk.decode(errors='replace').split()
+    ))
+    sys.stdout.flush()
@@ -0,0 +1,292 @@
+"""Flag messages containing any of a list of keywords, and send them to alert sinks."""
+from __future__ import annotations
+
+import json
+import os
+import queue
+import re
+import threading
+from typing import Callable, Iterable
+
+from mmng_ui.reader import PocsagMessage
+
+#: An alert sink is called with each message that matched, and the rules it matched
+AlertSink = Callable[[PocsagMessage, list], None]
+
+
+class AlertConfigError(Exception):
+    """Raised when an alert rules file can't be read or parsed."""
+
+
+_word_char = re.compile(r'\w').match
+
+# Flags at the very start of a pattern, which apply to all of it
+_GLOBAL_FLAGS = re.compile(r'\(\?([aiLmsux]+)\)')
+# An escape, so a backslash's own escape is skipped along with it, or a named group
+_ESCAPE_OR_NAMED_GROUP = re.compile(r'\\(.)|\(\?P[<=]', re.DOTALL)
+
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """
+    A regular expression matching any of ``words``, factored into a trie so each character is examined about once
+    rather than once per word.
+
+    :param words: literal words, in lower case
+    :type words: Iterable[str]
+    :return: the pattern, without any grouping around it
+    :rtype: str
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = None
+
+    def pattern(node: dict) -> str:
+        ends = '' in node
+        branches = [re.escape(char) + pattern(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not ends:
+            return branches[0]
+        alternation = '(?:' + '|'.join(branches) + ')'
+        return alternation + '?' if ends else alternation
+
+    return pattern(trie)
+
+
+def scoped_pattern(pattern: str) -> str:
+    """
+    ``pattern`` made safe to join with others into one regular expression.
+
+    Flags at its start, like ``(?i)``, are scoped to it alone.  Backreferences and named groups are refused, as
+    numbered groups shift and names can clash once patterns are joined.
+
+    :param pattern: a regular expression
+    :type pattern: str
+    :return: the pattern, wrapped in a non-capturing group
+    :rtype: str
+    :raises AlertConfigError: if the pattern is invalid or can't be joined with others
+    """
+    flags = _GLOBAL_FLAGS.match(pattern)
+    if flags:
+        pattern = f'(?{flags.group(1)}:{pattern[flags.end():]})'
+    for part in _ESCAPE_OR_NAMED_GROUP.finditer(pattern):
+        if part.group(1) is None:
+            raise AlertConfigError(f'bad pattern {pattern!r}: named groups are not supported; use (?:...)')
+        if part.group(1) in '123456789':
+            raise AlertConfigError(f'bad pattern {pattern!r}: backreferences are not supported')
+    try:
+        re.compile(pattern)
+    except re.error as error:
+        raise AlertConfigError(f'bad pattern {pattern!r}: {error}') from None
+    return f'(?:{pattern})'
+
+
+class AlertRules:
+    """
+    Keywords and patterns to flag messages for.
+
+    The keywords are compiled into one regular expression, searched for in the casefolded message, so the message is
+    scanned once however many there are.  The search looks ahead from each position rather than consuming the
+    match, so keywords that overlap are all found.  Rules beginning ``re:`` are joined into a second regular
+    expression, and only a message that matches it is tried against each of them.
+
+    Keywords match case-insensitively, as whole words.  Rules beginning ``re:`` are regular expressions, and match
+    case-insensitively anywhere; they can't use backreferences or named groups.
+
+    :param rules: the rules, one per item
+    :type rules: Iterable[str]
+    :raises AlertConfigError: if a pattern is invalid
+    """
+
+    def __init__(self, rules: Iterable[str] = ()) -> None:
+        self.keywords: dict[str, str] = {}
+        self.patterns: list[str] = []
+        for rule in rules:
+            if rule.startswith('re:'):
+                self.patterns.append(rule[3:])
+            else:
+                self.keywords.setdefault(rule.casefold(), rule)
+
+        # Matched against casefolded text, so keywords like "straße" or "ﬁre" match however they are written; the
+        # capture inside the lookahead is the longest keyword starting at each position
+        self._keyword_regex = None
+        if self.keywords:
+            self._keyword_regex = re.compile(rf'(?<!\w)(?=({trie_pattern(self.keywords)})(?!\w))')
+        scoped = [scoped_pattern(pattern) for pattern in self.patterns]
+        try:
+            self._pattern_regex = re.compile('|'.join(scoped), re.IGNORECASE) if scoped else None
+            self._patterns = [re.compile(pattern, re.IGNORECASE) for pattern in scoped]
+        except re.error as error:
+            raise AlertConfigError(f'bad patterns: {error}') from None
+
+    def __len__(self) -> int:
+        return len(self.keywords) + len(self.patterns)
+
+    def match(self, text: str | None) -> list[str]:
+        """
+        Every rule ``text`` matches, each once, in the order they first match; of those first matching at the same
+        place, the longest match comes first.
+
+        :param text: the message
+        :type text: str
+        :return: the keywords as written in the rules, and ``re:`` rules in full
+        :rtype: list[str]
+        """
+        if not text:
+            return []
+        found: dict[str, tuple[int, int]] = {}
+        if self._keyword_regex is not None:
+            keywords = self.keywords
+            folded = text.casefold()
+            for match in self._keyword_regex.finditer(folded):
+                start, word = match.start(), match.group(1)
+                found.setdefault(keywords[word], (start, -len(word)))
+                # Shorter keywords starting here, such as "ACUITY" inside "ACUITY: HIGH", end at a word boundary
+                for end in range(len(word) - 1, 0, -1):
+                    if not _word_char(word, end) and word[:end] in keywords:
+                        found.setdefault(keywords[word[:end]], (start, -end))
+        if self._pattern_regex is not None and self._pattern_regex.search(text):
+            for pattern, regex in zip(self.patterns, self._patterns):
+                match = regex.search(text)
+                if match:
+                    found[f're:{pattern}'] = (match.start(), match.start() - match.end())
+        return sorted(found, key=found.__getitem__)
+
+
+class AlertEngine:
+    """
+    :class:`AlertRules` loaded from a file, one rule per line with ``#`` starting a comment, and reloaded by
+    :meth:`reload` when the file changes.
+
+    :param path: the rules file
+    :type path: str
+    :param sinks: called with each message that matches
+    :type sinks: list[AlertSink]
+    """
+
+    def __init__(self, path: str, sinks: Iterable[AlertSink] = ()) -> None:
+        self.path = path
+        self.sinks = list(sinks)
+        self.rules = AlertRules()
+        self.alerts = 0
+        self._signature: tuple[int, int] | None = None
+        self.reload()
+
+    def reload(self) -> bool:
+        """
+        Load the rules file again if it has changed since it was last loaded.
+
+        If the new rules are bad, the old ones stay in place.
+
+        :return: whether the rules changed
+        :rtype: bool
+        :raises AlertConfigError: if the file can't be read or parsed
+        """
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == self._signature:
+                return False
+            with open(self.path, encoding='utf-8') as rules_file:
+                text = rules_file.read()
+        except OSError as error:
+            raise AlertConfigError(f'{self.path}: {error.strerror}') from None
+        self._signature = signature
+        rules = (line.split('#', 1)[0].strip() for line in text.splitlines())
+        try:
+            self.rules = AlertRules(rule for rule in rules if rule)
+        except AlertConfigError as error:
+            raise AlertConfigError(f'{self.path}: {error}') from None
+        return True
+
+    def check(self, message: PocsagMessage) -> list[str]:
+        """Match ``message`` against the rules, sending it to every sink if it matches any."""
+        matched = self.rules.match(message.trim_message)
+        if matched:
+            self.alerts += 1
+            for sink in self.sinks:
+                sink(message, matched)
+        return matched
+
+
+class FileSink:
+    """Append each alert to a file as a JSON line: the message, plus the rules it matched as ``alerts``."""
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def __call__(self, message: PocsagMessage, matched: list[str]) -> None:
+        self._file.write(json.dumps({**message.to_dict(), 'alerts': matched}, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class WebhookSink:
+    """
+    POST each alert as JSON to a URL, from a background thread so a slow or absent server never holds up decoding.
+
+    At most ``max_pending`` alerts wait to be sent; beyond that they are dropped and counted.
+    """
+
+    def __init__(self, url: str, timeout: float = 5, max_pending: int = 1000) -> None:
+        self.url = url
+        self.timeout = timeout
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(max_pending)
+        self._thread = threading.Thread(target=self._post_all, name='mmng-ui webhook', daemon=True)
+        self._thread.start()
+
+    def __call__(self, message: PocsagMessage, matched: list[str]) -> None:
+        body = json.dumps({**message.to_dict(), 'alerts': matched}, ensure_ascii=False).encode()
+        try:
+            self._queue.put_nowait(body)
+        except queue.Full:
+            self.dropped += 1
+
+    def _post_all(self) -> None:
+        # Imported here, on the sender thread, as it is slow to import and most runs never POST anything
+        import urllib.request
+
+        for body in iter(self._queue.get, None):
+            request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout):
+                    self.sent += 1
+            except Exception:
+                # Not only OSError: a bad URL or a garbled response must not stop every alert after it
+                self.failed += 1
+
+    def close(self) -> None:
+        """Send whatever is queued, then stop; if the queue stays full, give up on it rather than wait forever."""
+        try:
+            self._queue.put(None, timeout=self.timeout)
+        except queue.Full:
+            return
+        self._thread.join()
+
+
+def make_sink(spec: str, bell: Callable[[], None]) -> AlertSink:
+    """
+    Build a sink from its command line form: ``bell``, ``file:PATH``, or an ``http://`` or ``https://`` URL.
+
+    :param spec: the sink
+    :type spec: str
+    :param bell: rings the terminal bell
+    :type bell: Callable
+    :return: the sink
+    :rtype: AlertSink
+    """
+    if spec == 'bell':
+        return lambda message, matched: bell()
+    if spec.startswith('file:'):
+        return FileSink(spec[5:])
+    if spec.startswith(('http://', 'https://')):
+        return WebhookSink(spec)
+    raise ValueError(f'Unknown alert sink: {spec}')
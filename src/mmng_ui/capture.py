@@ -0,0 +1,77 @@
+"""Record raw UDP audio datagrams to a file, and read them back for replay."""
+from __future__ import annotations
+
+import struct
+import time
+from typing import Iterator
+
+MAGIC = b'MMNGCAP\x01'
+# Magic, then the wall-clock time capture started
+HEADER = struct.Struct('<8sd')
+# Seconds since capture started, UDP port, datagram length; the datagram follows
+RECORD = struct.Struct('<dHI')
+
+
+class CaptureError(Exception):
+    """Raised when a file is not a capture, or is truncated."""
+
+
+class CaptureWriter:
+    """
+    Append every datagram written to a capture file, stamped with when it arrived and the port it arrived on.
+
+    Several sources can share one writer, so a capture of a multi-port session replays as one.
+
+    :param path: the capture file, which is overwritten
+    :type path: str
+    :param clock: monotonic clock the timestamps come from
+    :type clock: Callable[[], float]
+    """
+
+    def __init__(self, path: str, clock=time.monotonic) -> None:
+        self.path = path
+        self.clock = clock
+        self.datagrams = 0
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, time.time()))
+        self._start = clock()
+
+    def __enter__(self) -> CaptureWriter:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, port: int, data: bytes) -> None:
+        self._file.write(RECORD.pack(self.clock() - self._start, port, len(data)))
+        self._file.write(data)
+        self.datagrams += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def read_capture(path: str) -> Iterator[tuple[float, int, bytes]]:
+    """
+    Read a capture back.
+
+    :param path: the capture file
+    :type path: str
+    :return: the seconds since capture started, port and datagram of each record, in order
+    :rtype: Iterator[tuple[float, int, bytes]]
+    """
+    with open(path, 'rb') as capture:
+        header = capture.read(HEADER.size)
+        if len(header) < HEADER.size or HEADER.unpack(header)[0] != MAGIC:
+            raise CaptureError(f'{path} is not an mmng-ui capture')
+        while True:
+            record = capture.read(RECORD.size)
+            if not record:
+                return
+            if len(record) < RECORD.size:
+                raise CaptureError(f'{path} is truncated')
+            offset, port, length = RECORD.unpack(record)
+            data = capture.read(length)
+            if len(data) < length:
+                raise CaptureError(f'{path} is truncated')
+            yield offset, port, data
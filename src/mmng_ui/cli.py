@@ -0,0 +1,189 @@
+"""The ``mmng-ui`` command line: the Textual UI, headless mode, and replay tools.
+
+Textual is only imported when the UI is actually started, so headless mode and the replay commands start quickly.
+"""
+from __future__ import annotations
+
+import asyncio
+import shutil
+import sys
+
+import click
+
+from mmng_ui.alerts import AlertConfigError, AlertEngine, make_sink
+from mmng_ui.capture import CaptureWriter
+from mmng_ui.decoder import DEMODULATORS, OVERFLOW_POLICIES, POCSAG_DEMODULATORS, probe_cache_path
+from mmng_ui.dedup import Deduplicator
+from mmng_ui.filters import CapcodeFilter, FilterConfigError
+from mmng_ui.headless import run_headless, run_replay
+from mmng_ui.pool import replay
+from mmng_ui.publish import Publisher, make_output
+from mmng_ui.store import MessageStore, default_path
+from mmng_ui._version import __version__
+
+
+@click.group(invoke_without_command=True)
+@click.option('--mmng-binary', '-m', required=False, default='multimon-ng', help='Path to multimon-ng binary')
+@click.option('--port', '-p', 'ports', required=False, type=int, multiple=True, default=[8888], show_default=True,
+              help='Port to listen on; repeat to decode several sources, each with its own multimon-ng')
+@click.option('--headless', is_flag=True, default=False, help='Run without the UI, writing messages as JSON Lines')
+@click.option('--output', '-o', type=click.File('w', lazy=False), default='-',
+              help='Where --headless writes messages (default: stdout)')
+@click.option('--max-rows', type=click.IntRange(min=1), default=10_000, show_default=True,
+              help='Messages to keep in the table before older ones move to on-disk history')
+@click.option('--max-log-lines', type=click.IntRange(min=1), default=10_000, show_default=True,
+              help='Lines to keep in the log pane')
+@click.option('--history-file', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='Keep message history in this file rather than a temporary one')
+@click.option('--max-fps', type=click.FloatRange(min=1), default=20, show_default=True,
+              help='Most UI updates per second; output arriving faster is batched')
+@click.option('--audio-buffer', type=click.IntRange(min=2), default=1 << 20, show_default=True,
+              help='Bytes of audio to buffer while multimon-ng catches up')
+@click.option('--overflow', type=click.Choice(OVERFLOW_POLICIES), default='drop-oldest', show_default=True,
+              help='What to drop when the audio buffer is full')
+@click.option('--silence-timeout', type=click.FloatRange(min=0), default=0, show_default=True,
+              help='Restart multimon-ng if it prints nothing for this many seconds while audio is arriving; 0 never')
+@click.option('--demod', 'demodulators', type=click.Choice(DEMODULATORS, case_sensitive=False), multiple=True,
+              default=POCSAG_DEMODULATORS, show_default=True, help='multimon-ng demodulator to run; repeat for several')
+@click.option('--adaptive', is_flag=True, default=False,
+              help='Run only the demodulators that decode anything, trying all of them again now and then')
+@click.option('--learn-window', type=click.FloatRange(min=1), default=300, show_default=True,
+              help='Seconds --adaptive runs every demodulator to learn which are in use')
+@click.option('--reprobe-interval', type=click.FloatRange(min=1), default=3600, show_default=True,
+              help='Seconds --adaptive runs the narrowed demodulators before learning again')
+@click.option('--db', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='SQLite database every message is stored in and searched from [default: in the app directory]')
+@click.option('--store/--no-store', default=True, show_default=True, help='Store messages in the database')
+@click.option('--capture', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='Record every UDP datagram received to this file, for replay-audio')
+@click.option('--filters', type=click.Path(exists=True, dir_okay=False), default=None,
+              help='Capcode allow/deny lists and aliases; reloaded whenever the file changes')
+@click.option('--alerts', 'alert_rules', type=click.Path(exists=True, dir_okay=False), default=None,
+              help='Keywords to alert on, one per line; reloaded whenever the file changes')
+@click.option('--alert-sink', 'alert_sinks', multiple=True, default=['bell'], show_default=True,
+              help='Where alerts go: bell, file:PATH, or an http(s) URL to POST to; repeat for several')
+@click.option('--alert-style', default='bold white on dark_red', show_default=True,
+              help='Rich style for rows that match an alert rule')
+@click.option('--dedup-window', type=click.FloatRange(min=0), default=30, show_default=True,
+              help='Seconds within which a repeat of a message is collapsed into the first; 0 to show every copy')
+@click.option('--publish', 'outputs', multiple=True,
+              help='Also send every message as JSON Lines to tcp://HOST:PORT or unix:PATH, served to any number of '
+                   'subscribers, udp://HOST:PORT, or an http(s) URL to POST to; repeat for several')
+@click.option('--publish-queue', type=click.IntRange(min=1), default=1000, show_default=True,
+              help='Messages to queue for each subscriber before dropping them')
+@click.option('--publish-overflow', type=click.Choice(OVERFLOW_POLICIES), default='drop-oldest', show_default=True,
+              help="Which message to drop when a subscriber's queue is full")
+@click.option('--metrics-file', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='Write a JSON snapshot of pipeline metrics to this file periodically')
+@click.option('--metrics-interval', type=click.FloatRange(min=0.1), default=5, show_default=True,
+              help='Seconds between metrics snapshots')
+@click.version_option(version=__version__)
+@click.pass_context
+def main(ctx, mmng_binary, ports, headless, output, max_rows, max_log_lines, history_file, max_fps, audio_buffer,
+         overflow, silence_timeout, demodulators, adaptive, learn_window, reprobe_interval, db, store, capture, filters,
+         alert_rules, alert_sinks, alert_style, dedup_window, outputs, publish_queue, publish_overflow, metrics_file,
+         metrics_interval):
+    if ctx.invoked_subcommand is not None:
+        return
+
+    if not shutil.which(mmng_binary):
+        click.echo('multimon-ng binary not found!', err=True)
+        sys.exit(1)
+
+    try:
+        capcodes = CapcodeFilter(filters) if filters else None
+    except FilterConfigError as error:
+        click.echo(f'Bad capcode filters: {error}', err=True)
+        sys.exit(1)
+    try:
+        alerts = AlertEngine(alert_rules) if alert_rules else None
+    except AlertConfigError as error:
+        click.echo(f'Bad alert rules: {error}', err=True)
+        sys.exit(1)
+
+    try:
+        publisher = Publisher(make_output(spec, publish_queue, publish_overflow) for spec in outputs)
+    except ValueError as error:
+        click.echo(error, err=True)
+        sys.exit(1)
+    if not publisher.outputs:
+        publisher = None
+
+    demodulators = tuple(dict.fromkeys(demodulators))
+    dedup = Deduplicator(dedup_window) if dedup_window else None
+    message_store = MessageStore(db or default_path(ports)) if store else None
+    capture_writer = CaptureWriter(capture) if capture else None
+    try:
+        if headless:
+            bell = lambda: click.echo('\a', nl=False, err=True)
+        else:
+            from mmng_ui.pocsag import Pocsag
+
+            app = Pocsag(mmng_binary, ports, max_rows=max_rows, max_log_lines=max_log_lines,
+                         history_file=history_file, max_fps=max_fps, audio_buffer=audio_buffer, overflow=overflow,
+                         store=message_store, capture=capture_writer, metrics_file=metrics_file,
+                         metrics_interval=metrics_interval, capcodes=capcodes, alerts=alerts, alert_style=alert_style,
+                         dedup=dedup, publisher=publisher, silence_timeout=silence_timeout,
+                         probe_cache=probe_cache_path(), demodulators=demodulators, adaptive=adaptive,
+                         learn_window=learn_window, reprobe_interval=reprobe_interval)
+            bell = app.bell
+        if alerts is not None:
+            try:
+                alerts.sinks = [make_sink(spec, bell) for spec in alert_sinks]
+            except ValueError as error:
+                click.echo(error, err=True)
+                sys.exit(1)
+
+        if headless:
+            try:
+                asyncio.run(run_headless(mmng_binary, ports, output, audio_buffer, overflow, store=message_store,
+                                         capture=capture_writer, metrics_file=metrics_file,
+                                         metrics_interval=metrics_interval, capcodes=capcodes, alerts=alerts,
+                                         dedup=dedup, publisher=publisher, silence_timeout=silence_timeout,
+                                         probe_cache=probe_cache_path(), demodulators=demodulators,
+                                         adaptive=adaptive, learn_window=learn_window,
+                                         reprobe_interval=reprobe_interval))
+            except KeyboardInterrupt:
+                pass
+        else:
+            app.run()
+    finally:
+        if alerts is not None:
+            for sink in alerts.sinks:
+                if hasattr(sink, 'close'):
+                    sink.close()
+        if message_store is not None:
+            message_store.close()
+        if capture_writer is not None:
+            capture_writer.close()
+
+
+@main.command('replay')
+@click.argument('log_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--workers', '-w', type=click.IntRange(min=0), multiple=True, default=[0, 1, 2, 4], show_default=True,
+              help='Worker processes to parse with, 0 meaning inline; repeat to compare several')
+@click.option('--output', '-o', type=click.File('w'), default=None,
+              help='Write the messages from the first run here, as JSON Lines')
+def replay_command(log_file, workers, output):
+    """Replay a captured multimon-ng log through the parser, and report the throughput for each worker count."""
+    for run, worker_count in enumerate(workers):
+        count, seconds = replay(log_file, worker_count, output if run == 0 else None)
+        rate = count / seconds if seconds else 0
+        click.echo(f'{worker_count:>3} workers: {count:,} messages in {seconds:.2f}s, {rate:,.0f} messages/s')
+
+
+@main.command('replay-audio')
+@click.argument('capture_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--mmng-binary', '-m', default='multimon-ng', help='Path to multimon-ng binary')
+@click.option('--speed', type=click.FloatRange(min=0), default=1, show_default=True,
+              help='Multiple of real time to replay at; 0 replays as fast as multimon-ng decodes')
+@click.option('--output', '-o', type=click.File('w', lazy=False), default='-',
+              help='Where to write messages, as JSON Lines (default: stdout)')
+def replay_audio_command(capture_file, mmng_binary, speed, output):
+    """Feed audio recorded with --capture back through multimon-ng, writing the messages decoded as JSON Lines."""
+    if not shutil.which(mmng_binary):
+        click.echo('multimon-ng binary not found!', err=True)
+        sys.exit(1)
+    count, seconds = asyncio.run(run_replay(mmng_binary, capture_file, output, speed,
+                                            probe_cache=probe_cache_path()))
+    click.echo(f'{count:,} messages in {seconds:.2f}s', err=True)
@@ -0,0 +1,35 @@
+"""
+Compatibility with the ``moment``-based reader of mmng-ui 1.0.x.
+
+The reader now works in plain :class:`datetime.datetime`.  Code that still expects ``Moment`` objects can convert
+results with :func:`moment_message`, which needs the optional ``moment`` extra (``pip install mmng-ui[moment]``).
+"""
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime
+from typing import Any
+
+from mmng_ui.reader import PocsagMessage, ParseLine
+
+
+def to_moment(value: datetime | None) -> Any:
+    """Wrap a datetime in a ``Moment``, passing None through."""
+    if value is None:
+        return None
+    import moment
+
+    return moment.date(value)
+
+
+def moment_message(message: PocsagMessage) -> PocsagMessage:
+    """Return a copy of ``message`` with ``current_time`` and ``timestamp`` as ``Moment`` objects."""
+    return replace(message, current_time=to_moment(message.current_time), timestamp=to_moment(message.timestamp))
+
+
+class MomentParseLine(ParseLine):
+    """A :class:`ParseLine` that returns ``Moment`` timestamps, as mmng-ui 1.0.x did."""
+
+    def parse(self, line: str) -> tuple[PocsagMessage, bool]:
+        result, json_detected = super().parse(line)
+        return (moment_message(result) if result is not None else None), json_detected
@@ -0,0 +1,691 @@
+"""The UI-independent half of the pipeline: UDP audio in, multimon-ng, lines out."""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import shlex
+import shutil
+import tempfile
+import time
+from asyncio.subprocess import Process
+from subprocess import PIPE
+from typing import AsyncIterator, Callable, Iterable
+
+import click
+
+from mmng_ui.capture import CaptureWriter
+from mmng_ui.filters import CapcodeFilter
+from mmng_ui.metrics import METRICS
+from mmng_ui.reader import ParseLine, PocsagMessage
+
+OVERFLOW_POLICIES = ('drop-oldest', 'drop-newest')
+
+POCSAG_DEMODULATORS = ('POCSAG512', 'POCSAG1200', 'POCSAG2400')
+DEMODULATORS = (*POCSAG_DEMODULATORS, 'FLEX')
+MMNG_OPTIONS = '-f alpha -t raw -u -q --timestamp -p'
+
+# multimon-ng takes signed 16-bit mono at 22050 Hz
+AUDIO_BYTES_PER_SECOND = 22050 * 2
+
+DATAGRAMS = METRICS.counter('datagrams')
+UDP_BYTES = METRICS.counter('udp bytes')
+LINES = METRICS.counter('lines')
+RESTARTS = METRICS.counter('decoder restarts')
+
+
+def probe_cache_path() -> str:
+    return os.path.join(click.get_app_dir('mmng-ui'), 'probe.json')
+
+
+async def probe_multimon(mmng_binary: str, cache_path: str | None = None) -> tuple[str, bool]:
+    """
+    Run ``multimon-ng -h`` to find its version and whether it supports ``--json``.
+
+    With a ``cache_path``, results are kept there, keyed by the binary's real path, modification time and size, and
+    multimon-ng is only run again once the binary changes.
+
+    :param mmng_binary: path to the multimon-ng binary
+    :type mmng_binary: str
+    :param cache_path: JSON file to cache results in, if any
+    :type cache_path: str
+    :return: the version line and JSON capability
+    :rtype: tuple
+    """
+    cache: dict = {}
+    key = signature = None
+    if cache_path is not None:
+        found = shutil.which(mmng_binary)
+        if found:
+            key = os.path.realpath(found)
+            stat = os.stat(key)
+            signature = [stat.st_mtime_ns, stat.st_size]
+            try:
+                with open(cache_path, encoding='utf-8') as cache_file:
+                    cache = json.load(cache_file)
+                entry = cache.get(key)
+            except (OSError, ValueError, AttributeError):
+                cache, entry = {}, None
+            if isinstance(entry, dict) and entry.get('signature') == signature:
+                return entry['version'], entry['json']
+
+    mmng_help_process = await asyncio.create_subprocess_exec(mmng_binary, '-h', stderr=PIPE)
+    mmng_help = await mmng_help_process.stderr.read()
+    await mmng_help_process.wait()
+    mmng_text = mmng_help.decode()
+    lines = mmng_text.splitlines()
+    version, json_capable = lines[0] if lines else '', '--json' in mmng_text
+
+    if key is not None:
+        cache[key] = {'signature': signature, 'version': version, 'json': json_capable}
+        try:
+            write_cache(cache_path, cache)
+        except OSError:
+            pass
+    return version, json_capable
+
+
+def write_cache(path: str, cache: dict) -> None:
+    """Write ``cache`` to ``path`` as JSON, replacing the file atomically so concurrent launches never see half."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', dir=directory, prefix='.probe-', suffix='.json', delete=False) as file:
+        json.dump(cache, file)
+    os.replace(file.name, path)
+
+
+def multimon_args(json_capable: bool, demodulators: Iterable[str] = POCSAG_DEMODULATORS) -> str:
+    """The multimon-ng command line arguments for decoding raw audio from stdin with each of ``demodulators``."""
+    enabled = ' '.join(f'-a {name}' for name in demodulators)
+    return f'{enabled} {MMNG_OPTIONS} {"--json" if json_capable else ""} -'
+
+
+def process_cpu_time(pid: int) -> float | None:
+    """User and system CPU seconds ``pid`` has used so far, from ``/proc``; None where that isn't available."""
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as stat:
+            # The command name can contain spaces and brackets, so count fields from the last bracket
+            fields = stat.read().rsplit(b')', 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+async def start_multimon(mmng_binary: str, args: str) -> Process:
+    """Start multimon-ng with all three standard streams piped."""
+    return await asyncio.create_subprocess_exec(
+        mmng_binary,
+        *shlex.split(args),
+        stdin=PIPE,
+        stdout=PIPE,
+        stderr=PIPE
+    )
+
+
+async def read_lines(output: asyncio.StreamReader) -> AsyncIterator[str]:
+    """Read a subprocess stream line by line, until EOF.  Nothing is counted, as this also reads stderr."""
+    while True:
+        line = await output.readline()
+        if not line:
+            break
+        yield line.decode().strip()
+
+
+async def read_records(output: asyncio.StreamReader, chunk_size: int = 1 << 14) -> AsyncIterator[list[bytes]]:
+    """
+    Read a subprocess stream in large chunks, until EOF, yielding the complete lines in each.
+
+    Each chunk is split in one call, so nothing is decoded and no Python code runs per line, and the chunk itself is
+    freed as soon as it is split; only the partial line at its end is carried over and joined to the next.  Empty lines
+    are skipped.
+
+    :param output: the stream, usually multimon-ng's stdout
+    :type output: asyncio.StreamReader
+    :param chunk_size: most bytes to read at once
+    :type chunk_size: int
+    :return: the lines from each read, in order, without their newlines
+    :rtype: AsyncIterator[list[bytes]]
+    """
+    partial = b''
+    while True:
+        chunk = await output.read(chunk_size)
+        if not chunk:
+            if partial:
+                LINES.add()
+                yield [partial]
+            return
+        records = chunk.split(b'\n')
+        del chunk
+        if partial:
+            records[0] = partial + records[0]
+        partial = records.pop()
+        records = [record for record in records if record] if b'' in records else records
+        if records:
+            LINES.add(len(records))
+            yield records
+
+
+class AudioBuffer:
+    """
+    A fixed-size ring buffer of raw audio between the UDP socket and multimon-ng's stdin.
+
+    If multimon-ng falls behind, the buffer fills and then drops audio according to ``overflow`` rather than growing:
+    ``drop-oldest`` discards the oldest buffered audio to make room, ``drop-newest`` discards the incoming datagram.
+    Audio is signed 16-bit, so whole samples are always dropped together.
+
+    :param capacity: buffer size in bytes
+    :type capacity: int
+    :param overflow: ``drop-oldest`` or ``drop-newest``
+    :type overflow: str
+    """
+
+    def __init__(self, capacity: int = 1 << 20, overflow: str = 'drop-oldest') -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'Unknown overflow policy: {overflow}')
+        capacity -= capacity % 2
+        if capacity <= 0:
+            raise ValueError('Audio buffer capacity must be at least one sample')
+        self.capacity = capacity
+        self.overflow = overflow
+        self.bytes_received = 0
+        self.bytes_written = 0
+        self.bytes_dropped = 0
+        self.in_flight = 0
+        self._buffer = bytearray(capacity)
+        self._start = 0
+        self._size = 0
+        self._ready: asyncio.Event | None = None
+        self._room: asyncio.Event | None = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            'received': self.bytes_received,
+            'written': self.bytes_written,
+            'dropped': self.bytes_dropped,
+            'buffered': self._size,
+        }
+
+    def put(self, data: bytes) -> None:
+        """Buffer ``data``, dropping audio if there isn't room."""
+        length = len(data)
+        self.bytes_received += length
+        free = self.capacity - self._size
+        if length > free:
+            if self.overflow == 'drop-newest':
+                self.bytes_dropped += length
+                return
+            if length > self.capacity:
+                # Only the newest capacity's worth of this datagram can ever fit
+                skip = length - self.capacity
+                skip += skip % 2
+                self.bytes_dropped += skip
+                data = memoryview(data)[skip:]
+                length -= skip
+            excess = length - free
+            excess += excess % 2
+            excess = min(excess, self._size)
+            self._start = (self._start + excess) % self.capacity
+            self._size -= excess
+            self.bytes_dropped += excess
+
+        view = memoryview(data)
+        end = (self._start + self._size) % self.capacity
+        first = min(length, self.capacity - end)
+        self._buffer[end:end + first] = view[:first]
+        if first < length:
+            self._buffer[:length - first] = view[first:]
+        self._size += length
+        if self._ready is not None:
+            self._ready.set()
+
+    async def put_wait(self, data: bytes) -> None:
+        """Buffer ``data``, first waiting for room rather than dropping audio."""
+        if self._room is None:
+            self._room = asyncio.Event()
+        while self._size and len(data) > self.capacity - self._size:
+            self._room.clear()
+            await self._room.wait()
+        self.put(data)
+
+    async def get(self) -> bytes:
+        """Wait for audio, then take as much as is contiguous in the buffer."""
+        if self._ready is None:
+            self._ready = asyncio.Event()
+        while not self._size:
+            self._ready.clear()
+            await self._ready.wait()
+        length = min(self._size, self.capacity - self._start)
+        chunk = bytes(self._buffer[self._start:self._start + length])
+        self._start = (self._start + length) % self.capacity
+        self._size -= length
+        if self._room is not None:
+            self._room.set()
+        return chunk
+
+    def clear(self) -> None:
+        self._start = 0
+        self._size = 0
+
+    async def feed(self, stdin: asyncio.StreamWriter) -> None:
+        """Write buffered audio to ``stdin`` until it closes, waiting for each write to drain."""
+        while not stdin.is_closing():
+            chunk = await self.get()
+            stdin.write(chunk)
+            self.bytes_written += len(chunk)
+            self.in_flight = len(chunk)
+            try:
+                await stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            finally:
+                self.in_flight = 0
+
+
+class UDPForwarder(asyncio.DatagramProtocol):
+    """Forward a source's raw audio datagrams into its :class:`AudioBuffer` on their way to multimon-ng."""
+
+    def __init__(self, source: DecodeSource):
+        self.source = source
+        self.audio = source.audio
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        DATAGRAMS.add()
+        UDP_BYTES.add(len(data))
+        self.source.peer = addr[0]
+        if self.source.capture is not None:
+            self.source.capture.write(self.source.port, data)
+        self.audio.put(data)
+
+
+class DecodeSource:
+    """
+    One UDP listener and the multimon-ng worker decoding its audio.
+
+    Each source has its own process, audio buffer and :class:`ParseLine`, so several can run side by side and their
+    messages be merged, tagged with the port and peer they came from.
+
+    :param port: UDP port to listen on
+    :type port: int
+    :param audio: buffer between the socket and multimon-ng, or None for the default
+    :type audio: AudioBuffer
+    :param capcodes: which capcodes to keep, and their aliases
+    :type capcodes: CapcodeFilter
+    """
+
+    def __init__(self, port: int, audio: AudioBuffer | None = None, capcodes: CapcodeFilter | None = None) -> None:
+        self.port = port
+        self.audio = audio or AudioBuffer()
+        self.parse_line = ParseLine(capcodes=capcodes)
+        self.peer: str | None = None
+        self.process: Process | None = None
+        self.transport: asyncio.DatagramTransport | None = None
+        self.protocol: UDPForwarder | None = None
+        self.writer: asyncio.Task | None = None
+        self.capture: CaptureWriter | None = None
+
+    def __repr__(self) -> str:
+        return f'DecodeSource(port={self.port}, peer={self.peer})'
+
+    @property
+    def name(self) -> str:
+        return f':{self.port}'
+
+    async def start(self, mmng_binary: str, args: str,
+                    protocol_factory: Callable[[DecodeSource], UDPForwarder] = UDPForwarder,
+                    listen: bool = True) -> None:
+        """Start multimon-ng, the task feeding it audio, and unless ``listen`` is false, the UDP listener."""
+        await self.spawn(mmng_binary, args)
+        if listen:
+            await self.listen(protocol_factory)
+
+    async def spawn(self, mmng_binary: str, args: str) -> None:
+        """Start multimon-ng and the task feeding it audio."""
+        self.process = await start_multimon(mmng_binary, args)
+        self.writer = asyncio.get_running_loop().create_task(self.audio.feed(self.process.stdin))
+
+    async def listen(self, protocol_factory: Callable[[DecodeSource], UDPForwarder] = UDPForwarder) -> None:
+        """Start listening for audio datagrams."""
+        self.transport, self.protocol = await asyncio.get_running_loop().create_datagram_endpoint(
+            lambda: protocol_factory(self),
+            local_addr=('::', self.port)
+        )
+
+    async def lines(self) -> AsyncIterator[str]:
+        """Read multimon-ng's stdout line by line, counting each in the ``lines`` metric."""
+        async for line in read_lines(self.process.stdout):
+            LINES.add()
+            yield line
+
+    def parse(self, line: str) -> PocsagMessage | None:
+        """Parse one line of this source's output, tagged with where it came from; None if it was filtered out."""
+        result, _ = self.parse_line.parse(line)
+        if result is None:
+            return None
+        result.port = self.port
+        result.peer = self.peer
+        return result
+
+    def parse_record(self, record: bytes) -> PocsagMessage | None:
+        """Like :meth:`parse`, for a line still in bytes; see :meth:`ParseLine.parse_record`."""
+        result = self.parse_line.parse_record(record)
+        if result is None:
+            return None
+        result.port = self.port
+        result.peer = self.peer
+        return result
+
+    async def finish(self) -> None:
+        """Once the buffered audio is written, close multimon-ng's stdin so it decodes what is left and exits."""
+        while len(self.audio):
+            await asyncio.sleep(0.01)
+        self.writer.cancel()
+        self.process.stdin.close()
+        try:
+            await self.process.stdin.wait_closed()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    async def stop(self) -> None:
+        """Stop feeding audio, and kill multimon-ng if it is still running; buffered audio and the socket are kept."""
+        if self.writer is not None:
+            self.writer.cancel()
+        if self.process is not None:
+            if self.process.returncode is None:
+                self.process.kill()
+            await self.process.wait()
+
+    async def close(self) -> None:
+        """Stop listening and feeding audio, and kill multimon-ng if it is still running."""
+        if self.transport is not None:
+            self.transport.close()
+        await self.stop()
+
+
+class Supervisor:
+    """
+    Keep a source's multimon-ng running, restarting it when it exits or hangs.
+
+    :meth:`lines` reads stdout and stderr side by side, so a chatty stderr can never fill its pipe and block the
+    decoder.  multimon-ng is counted as hung if audio is waiting for it but it has taken none for ``stall_timeout``
+    seconds, or, if ``silence_timeout`` is set, if audio has kept arriving but it has printed nothing for that long.
+    Quiet channels are normal, so the second check is off by default.
+
+    Restarts wait ``min_backoff`` seconds, doubling with each consecutive failure up to ``max_backoff``; a decoder that
+    stays up for ``stable_after`` seconds resets the count.  The source's UDP socket and audio buffer live on through
+    restarts, so audio arriving in the meantime is decoded once multimon-ng is back.  :meth:`reconfigure` changes the
+    arguments without a restart's gap.
+
+    :param source: the source to decode, already listening if it is going to
+    :type source: DecodeSource
+    :param mmng_binary: path to the multimon-ng binary
+    :type mmng_binary: str
+    :param args: multimon-ng command line arguments
+    :type args: str
+    :param report: called with each line multimon-ng writes to stderr, and a line about each restart
+    :type report: Callable[[str], None]
+    """
+
+    def __init__(self, source: DecodeSource, mmng_binary: str, args: str,
+                 report: Callable[[str], None] = lambda text: None, stall_timeout: float = 10.0,
+                 silence_timeout: float = 0.0, min_backoff: float = 0.5, max_backoff: float = 30.0,
+                 stable_after: float = 60.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.source = source
+        self.mmng_binary = mmng_binary
+        self.args = args
+        self.report = report
+        self.stall_timeout = stall_timeout
+        self.silence_timeout = silence_timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.clock = clock
+        self.restarts = 0
+        self.downtime = 0.0
+        self.running = False
+        self.last_output = 0.0
+        self._hung: str | None = None
+
+    @property
+    def stats(self) -> dict[str, float]:
+        return {'restarts': self.restarts, 'downtime': self.downtime, 'running': self.running}
+
+    async def lines(self) -> AsyncIterator[str]:
+        """Yield multimon-ng's output line by line, decoded, forever, restarting it as needed."""
+        async for records in self.records():
+            for record in records:
+                line = str(record, 'utf-8', 'replace').strip()
+                if line:
+                    yield line
+
+    async def records(self) -> AsyncIterator[list[bytes]]:
+        """Yield multimon-ng's output a read at a time, as undecoded lines, forever, restarting it as needed."""
+        source = self.source
+        loop = asyncio.get_running_loop()
+        failures = 0
+        down_since = None
+        while True:
+            try:
+                await source.spawn(self.mmng_binary, self.args)
+            except OSError as error:
+                reason = f'failed to start: {error.strerror}'
+                started = None
+            else:
+                started = self.last_output = self.clock()
+                if down_since is not None:
+                    self.downtime += started - down_since
+                self.running = True
+                self._hung = None
+                errors = []
+                watchdog = loop.create_task(self._watch())
+                try:
+                    while True:
+                        process = source.process
+                        errors.append(loop.create_task(self._read_errors(process)))
+                        async for records in read_records(process.stdout):
+                            self.last_output = self.clock()
+                            yield records
+                        if source.process is process:
+                            break
+                        # reconfigure() handed over to a new multimon-ng, and the old one has decoded all it was given
+                        await process.wait()
+                finally:
+                    watchdog.cancel()
+                    self.running = False
+                    await source.stop()
+                    await asyncio.gather(*errors, return_exceptions=True)
+                reason = self._hung or f'exited with status {source.process.returncode}'
+
+            now = self.clock()
+            if down_since is None or started is not None:
+                down_since = now
+            if started is not None and now - started >= self.stable_after:
+                failures = 0
+            delay = min(self.min_backoff * 2 ** failures, self.max_backoff)
+            failures += 1
+            self.restarts += 1
+            RESTARTS.add()
+            self.report(f'multimon-ng {reason}; restarting in {delay:g}s')
+            await asyncio.sleep(delay)
+
+    async def reconfigure(self, args: str) -> None:
+        """
+        Switch multimon-ng to ``args`` without losing audio.
+
+        A new multimon-ng takes over feeding from the audio buffer before the old one's stdin is closed, so the old one
+        decodes everything already written to it and exits, and :meth:`records` reads its output to the end before
+        moving on to the new one's.  If multimon-ng isn't running, ``args`` apply from the next restart; if the new one
+        won't start, the old one carries on.
+
+        :param args: multimon-ng command line arguments
+        :type args: str
+        """
+        source = self.source
+        if not self.running:
+            self.args = args
+            return
+        process, writer = source.process, source.writer
+        # The feeder only stops between writes, so no audio is taken from the buffer without reaching a decoder
+        writer.cancel()
+        await asyncio.gather(writer, return_exceptions=True)
+        try:
+            await source.spawn(self.mmng_binary, args)
+        except OSError as error:
+            self.report(f'multimon-ng failed to start with new arguments: {error.strerror}')
+            source.writer = asyncio.get_running_loop().create_task(source.audio.feed(process.stdin))
+            return
+        self.args = args
+        process.stdin.close()
+
+    async def _read_errors(self, process: Process) -> None:
+        async for error in read_lines(process.stderr):
+            self.report(f'Error: {error}')
+
+    async def _watch(self) -> None:
+        audio = self.source.audio
+        interval = min(timeout for timeout in (self.stall_timeout, self.silence_timeout, 4) if timeout) / 4
+        written = audio.bytes_written
+        received = audio.bytes_received
+        progress = self.clock()
+        while True:
+            await asyncio.sleep(interval)
+            now = self.clock()
+            if audio.bytes_written != written or not (len(audio) or audio.in_flight):
+                written = audio.bytes_written
+                progress = now
+            elif self.stall_timeout and now - progress >= self.stall_timeout:
+                self._hung = f'took no audio for {self.stall_timeout:g}s'
+                break
+            arriving = audio.bytes_received != received
+            received = audio.bytes_received
+            if self.silence_timeout and arriving and now - self.last_output >= self.silence_timeout:
+                self._hung = f'printed nothing for {self.silence_timeout:g}s while receiving audio'
+                break
+        try:
+            self.source.process.kill()
+        except ProcessLookupError:
+            pass
+
+
+class DemodSelector:
+    """
+    Narrow a source's multimon-ng down to the demodulators its channel actually uses, to save decoder CPU.
+
+    For ``learn_window`` seconds every candidate runs, and :meth:`observe` notes which one decoded each message.  Then
+    multimon-ng is handed over to just those heard, without losing audio (see :meth:`Supervisor.reconfigure`), and
+    every ``reprobe_interval`` seconds all the candidates run again for another window in case the channel has
+    changed.  A window in which nothing, or every candidate, was heard leaves them all running.
+
+    Where ``/proc`` is available, the decoder's CPU time is sampled every ``sample_interval`` seconds and divided by
+    the audio it was given, with every candidate and with the narrowed set, to estimate the CPU time saved.
+
+    :param supervisor: the supervisor of the source's multimon-ng
+    :type supervisor: Supervisor
+    :param candidates: demodulators to choose from, all running to start with
+    :type candidates: Iterable[str]
+    :param json_capable: whether multimon-ng is run with ``--json``
+    :type json_capable: bool
+    :param learn_window: seconds to listen with every candidate before narrowing
+    :type learn_window: float
+    :param reprobe_interval: seconds to run the narrowed set before listening with every candidate again
+    :type reprobe_interval: float
+    """
+
+    def __init__(self, supervisor: Supervisor, candidates: Iterable[str], json_capable: bool,
+                 learn_window: float = 300.0, reprobe_interval: float = 3600.0, sample_interval: float = 5.0) -> None:
+        self.supervisor = supervisor
+        self.candidates = tuple(candidates)
+        self.json_capable = json_capable
+        self.learn_window = learn_window
+        self.reprobe_interval = reprobe_interval
+        self.sample_interval = sample_interval
+        self.active = self.candidates
+        self.learning = True
+        self.seen: set[str] = set()
+        self.cpu = {'all': 0.0, 'narrowed': 0.0}
+        self.audio = {'all': 0.0, 'narrowed': 0.0}
+        self._candidates = frozenset(self.candidates)
+        self._pid: int | None = None
+        self._cpu = 0.0
+        self._written = 0
+
+    def observe(self, message: PocsagMessage) -> None:
+        """Note which demodulator decoded ``message``."""
+        if self.learning and message.demod_name in self._candidates:
+            self.seen.add(message.demod_name)
+
+    async def run(self) -> None:
+        """Learn, narrow and re-probe, forever."""
+        while True:
+            self.learning = True
+            await self._wait(self.learn_window)
+            self.learning = False
+            heard = tuple(name for name in self.candidates if name in self.seen)
+            self.seen = set()
+            if not heard:
+                continue
+            if len(heard) == len(self.candidates):
+                await self._wait(self.reprobe_interval)
+                continue
+            await self._switch(heard)
+            self.supervisor.report(f'only heard {", ".join(heard)}; running just those')
+            await self._wait(self.reprobe_interval)
+            await self._switch(self.candidates)
+            self.supervisor.report(f'listening with every demodulator again for {self.learn_window:g}s')
+
+    async def _wait(self, seconds: float) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + seconds
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(remaining, self.sample_interval))
+            self._sample()
+
+    async def _switch(self, demodulators: tuple[str, ...]) -> None:
+        self._sample()
+        await self.supervisor.reconfigure(multimon_args(self.json_capable, demodulators))
+        self.active = demodulators
+        self._pid = None
+
+    def _sample(self) -> None:
+        """Add the decoder's CPU time and audio since the last sample to the totals for what is running."""
+        process = self.supervisor.source.process
+        cpu = process_cpu_time(process.pid) if process is not None and process.returncode is None else None
+        written = self.supervisor.source.audio.bytes_written
+        if cpu is not None and process.pid == self._pid:
+            phase = 'narrowed' if self.active != self.candidates else 'all'
+            self.cpu[phase] += cpu - self._cpu
+            self.audio[phase] += (written - self._written) / AUDIO_BYTES_PER_SECOND
+        self._pid = process.pid if cpu is not None else None
+        self._cpu = cpu or 0.0
+        self._written = written
+
+    @property
+    def stats(self) -> dict[str, float | None]:
+        """
+        CPU seconds per second of audio with every candidate and with the narrowed set, and an estimate of the CPU
+        seconds saved by narrowing; each is None until it has been measured.
+        """
+        load = {phase: self.cpu[phase] / self.audio[phase] if self.audio[phase] else None for phase in self.cpu}
+        saved = None
+        if load['all'] is not None and load['narrowed'] is not None:
+            saved = (load['all'] - load['narrowed']) * self.audio['narrowed']
+        return {'cpu all': load['all'], 'cpu narrowed': load['narrowed'], 'cpu saved': saved}
+
+    def describe(self) -> str:
+        """The demodulators running, and what narrowing has saved, in a line."""
+        text = ', '.join(self.active) + (' (learning)' if self.learning else '')
+        stats = self.stats
+        if stats['cpu saved'] is not None:
+            text += (f'; decoder CPU {stats["cpu narrowed"]:.1%} of real time, {stats["cpu all"]:.1%} with all, '
+                     f'{stats["cpu saved"]:.1f}s saved')
+        return text
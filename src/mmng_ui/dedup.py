@@ -0,0 +1,99 @@
+"""Collapse copies of a message sent again by other transmitters or on other bitrates."""
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from mmng_ui.metrics import METRICS
+from mmng_ui.reader import PocsagMessage
+
+DUPLICATES = METRICS.counter('duplicates')
+
+
+class Sighting:
+    """The first copy of a message, how many times it has been seen in all, and whatever the caller attached to it."""
+
+    __slots__ = ('message', 'count', 'payload')
+
+    def __init__(self, message: PocsagMessage) -> None:
+        self.message = message
+        self.count = 1
+        self.payload: Any = None
+
+
+class Deduplicator:
+    """
+    Recognise a message seen within the last ``window`` seconds, by a hash of its address and its text with case and
+    whitespace normalised.
+
+    Each first copy is remembered until ``window`` seconds after it arrived; copies arriving in that time count against
+    it rather than being remembered themselves.  Expiry runs oldest first on every check, and beyond ``max_entries``
+    the oldest is evicted early, so memory stays bounded however fast messages arrive.
+
+    :param window: seconds within which a repeat counts as a copy
+    :type window: float
+    :param max_entries: most messages to remember
+    :type max_entries: int
+    """
+
+    def __init__(self, window: float = 30.0, max_entries: int = 1 << 16,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.window = window
+        self.max_entries = max_entries
+        self.clock = clock
+        self.unique = 0
+        self.duplicates = 0
+        self.expired = 0
+        self.evicted = 0
+        self._entries: OrderedDict[int, tuple[float, Sighting]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(message: PocsagMessage) -> int:
+        return hash((message.address, ' '.join((message.trim_message or '').casefold().split())))
+
+    def check(self, message: PocsagMessage) -> tuple[Sighting, bool]:
+        """
+        Look ``message`` up, remembering it if it's new.
+
+        :param message: a freshly parsed message
+        :type message: PocsagMessage
+        :return: the sighting of the first copy, with its count updated, and whether ``message`` is a copy
+        :rtype: tuple
+        """
+        now = self.clock()
+        entries = self._entries
+        while entries:
+            key, (deadline, _) = next(iter(entries.items()))
+            if deadline > now:
+                break
+            del entries[key]
+            self.expired += 1
+
+        key = self.key(message)
+        entry = entries.get(key)
+        if entry is not None:
+            sighting = entry[1]
+            sighting.count += 1
+            self.duplicates += 1
+            DUPLICATES.add()
+            return sighting, True
+
+        sighting = Sighting(message)
+        entries[key] = (now + self.window, sighting)
+        self.unique += 1
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.evicted += 1
+        return sighting, False
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {'remembered': len(self._entries), 'unique': self.unique, 'duplicates': self.duplicates,
+                'expired': self.expired, 'evicted': self.evicted}
@@ -0,0 +1,180 @@
+"""Capcode allow and deny lists, and alias names, loaded from a config file that is reloaded when it changes."""
+from __future__ import annotations
+
+import os
+from bisect import bisect_right
+
+
+class FilterConfigError(Exception):
+    """Raised when a filter config file can't be read or parsed."""
+
+
+def _merge(ranges: list[tuple[int, int]]) -> tuple[list[int], list[int]]:
+    """Sort and merge overlapping ranges into parallel lists of starts and inclusive ends, for bisecting."""
+    starts: list[int] = []
+    ends: list[int] = []
+    for start, end in sorted(ranges):
+        if ends and start <= ends[-1] + 1:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+class CapcodeRules:
+    """
+    A compiled set of capcodes: single capcodes in a hash set, ranges merged into sorted lists for bisecting.
+
+    :param capcodes: single capcodes
+    :type capcodes: set[int]
+    :param ranges: inclusive ``(first, last)`` ranges
+    :type ranges: list[tuple[int, int]]
+    """
+
+    def __init__(self, capcodes: set[int] | None = None, ranges: list[tuple[int, int]] | None = None) -> None:
+        self.capcodes = frozenset(capcodes or ())
+        self._starts, self._ends = _merge(ranges or [])
+
+    def __bool__(self) -> bool:
+        return bool(self.capcodes or self._starts)
+
+    def __contains__(self, capcode: int) -> bool:
+        if capcode in self.capcodes:
+            return True
+        i = bisect_right(self._starts, capcode) - 1
+        return i >= 0 and capcode <= self._ends[i]
+
+
+def parse_config(text: str, name: str = '<config>') -> tuple[CapcodeRules, CapcodeRules, dict[int, str]]:
+    """
+    Parse a filter config into allow rules, deny rules and aliases.
+
+    Each line is ``allow`` or ``deny`` and then capcodes and ``first-last`` ranges, separated by spaces or commas, or
+    ``alias``, a capcode and a name.  ``#`` starts a comment.
+
+    :param text: the config
+    :type text: str
+    :param name: where the config came from, for error messages
+    :type name: str
+    :return: allow rules, deny rules, and alias by capcode
+    :rtype: tuple
+    """
+    lists: dict[str, tuple[set[int], list[tuple[int, int]]]] = {'allow': (set(), []), 'deny': (set(), [])}
+    aliases: dict[int, str] = {}
+    for number, line in enumerate(text.splitlines(), start=1):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        keyword, _, rest = line.partition(' ')
+        try:
+            if keyword == 'alias':
+                capcode, _, alias = rest.strip().partition(' ')
+                if not alias.strip():
+                    raise ValueError('alias needs a capcode and a name')
+                aliases[int(capcode)] = alias.strip()
+            elif keyword in lists:
+                capcodes, ranges = lists[keyword]
+                for item in rest.replace(',', ' ').split():
+                    first, dash, last = item.partition('-')
+                    if dash:
+                        if int(first) > int(last):
+                            raise ValueError(f'range {item} is backwards')
+                        ranges.append((int(first), int(last)))
+                    else:
+                        capcodes.add(int(first))
+            else:
+                raise ValueError(f'unknown keyword {keyword!r}')
+        except ValueError as error:
+            raise FilterConfigError(f'{name}, line {number}: {error}') from None
+    return CapcodeRules(*lists['allow']), CapcodeRules(*lists['deny']), aliases
+
+
+class CapcodeFilter:
+    """
+    Decide which capcodes to keep, and what to call them.
+
+    A capcode is dropped if it is denied, or if there are allow rules and it matches none of them.  Decisions are
+    cached by the capcode as multimon-ng printed it, so the usual cost per message is one dictionary lookup.
+
+    With a ``path``, rules are loaded from that file, and :meth:`reload` picks up changes to it.
+
+    :param path: the config file, or None to start with no rules
+    :type path: str
+    :param cache_size: most decisions to cache before starting afresh
+    :type cache_size: int
+    """
+
+    def __init__(self, path: str | None = None, cache_size: int = 1 << 16) -> None:
+        self.path = path
+        self.cache_size = cache_size
+        self.allow = CapcodeRules()
+        self.deny = CapcodeRules()
+        self.aliases: dict[int, str] = {}
+        self.dropped = 0
+        self._decisions: dict[str, tuple[bool, str | None]] = {}
+        self._signature: tuple[int, int] | None = None
+        if path is not None:
+            self.reload()
+
+    @classmethod
+    def from_text(cls, text: str) -> CapcodeFilter:
+        capcode_filter = cls()
+        capcode_filter.set_rules(*parse_config(text))
+        return capcode_filter
+
+    def set_rules(self, allow: CapcodeRules, deny: CapcodeRules, aliases: dict[int, str]) -> None:
+        self.allow = allow
+        self.deny = deny
+        self.aliases = aliases
+        self._decisions = {}
+
+    def reload(self) -> bool:
+        """
+        Load the config file again if it has changed since it was last loaded.
+
+        If the new config is bad, the old rules stay in place.
+
+        :return: whether the rules changed
+        :rtype: bool
+        :raises FilterConfigError: if the file can't be read or parsed
+        """
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == self._signature:
+                return False
+            with open(self.path, encoding='utf-8') as config:
+                text = config.read()
+        except OSError as error:
+            raise FilterConfigError(f'{self.path}: {error.strerror}') from None
+        self._signature = signature
+        self.set_rules(*parse_config(text, self.path))
+        return True
+
+    def lookup(self, capcode: str | bytes) -> tuple[bool, str | None]:
+        """
+        Whether to keep messages for ``capcode``, and its alias if it has one.
+
+        :param capcode: the capcode as multimon-ng printed it, without any function code, decoded or not
+        :type capcode: str | bytes
+        :return: keep, alias
+        :rtype: tuple
+        """
+        decision = self._decisions.get(capcode)
+        if decision is None:
+            decision = self._decide(capcode)
+            if len(self._decisions) >= self.cache_size:
+                self._decisions = {}
+            self._decisions[capcode] = decision
+        if not decision[0]:
+            self.dropped += 1
+        return decision
+
+    def _decide(self, capcode: str | bytes) -> tuple[bool, str | None]:
+        try:
+            number = int(capcode)
+        except ValueError:
+            return not self.allow, None
+        keep = number not in self.deny and (not self.allow or number in self.allow)
+        return keep, self.aliases.get(number)
@@ -0,0 +1,251 @@
+"""Run the decode pipeline without the Textual UI, writing messages out as JSON Lines."""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Sequence, TextIO
+
+import click
+
+from mmng_ui.alerts import AlertConfigError, AlertEngine
+from mmng_ui.capture import CaptureWriter, read_capture
+from mmng_ui.decoder import (AudioBuffer, DecodeSource, DemodSelector, POCSAG_DEMODULATORS, Supervisor, multimon_args,
+                             probe_multimon, read_lines)
+from mmng_ui.dedup import Deduplicator
+from mmng_ui.filters import CapcodeFilter, FilterConfigError
+from mmng_ui.jsondecode import backend as json_backend
+from mmng_ui.metrics import METRICS, write_snapshot
+from mmng_ui.publish import Publisher
+from mmng_ui.rates import RateStats
+from mmng_ui.store import MessageStore
+
+
+async def run_headless(mmng_binary: str, ports: Sequence[int], output: TextIO, audio_buffer: int = 1 << 20,
+                       overflow: str = 'drop-oldest', store: MessageStore | None = None,
+                       capture: CaptureWriter | None = None, metrics_file: str | None = None,
+                       metrics_interval: float = 5, capcodes: CapcodeFilter | None = None,
+                       alerts: AlertEngine | None = None, dedup: Deduplicator | None = None,
+                       publisher: Publisher | None = None, silence_timeout: float = 0,
+                       probe_cache: str | None = None, demodulators: Sequence[str] = POCSAG_DEMODULATORS,
+                       adaptive: bool = False, learn_window: float = 300, reprobe_interval: float = 3600) -> None:
+    """
+    Decode UDP audio on each of ``ports`` through its own multimon-ng, writing every message to ``output`` as a JSON
+    line tagged with the port and peer it came from.
+
+    Diagnostics go to stderr, so ``output`` carries nothing but messages.  Each multimon-ng is restarted if it exits
+    or hangs; see :class:`Supervisor`.
+
+    :param mmng_binary: path to the multimon-ng binary
+    :type mmng_binary: str
+    :param ports: UDP ports to listen on
+    :type ports: Sequence[int]
+    :param output: where to write JSON Lines
+    :type output: TextIO
+    :param audio_buffer: bytes of audio to buffer for each source
+    :type audio_buffer: int
+    :param overflow: what each audio buffer drops when full
+    :type overflow: str
+    :param store: where to also store every message, if anywhere
+    :type store: MessageStore
+    :param capture: where to record every datagram received, if anywhere
+    :type capture: CaptureWriter
+    :param metrics_file: where to write a JSON snapshot of pipeline metrics every ``metrics_interval`` seconds
+    :type metrics_file: str
+    :param metrics_interval: seconds between metrics snapshots
+    :type metrics_interval: float
+    :param capcodes: which capcodes to keep, and their aliases; reloaded from its file when that changes
+    :type capcodes: CapcodeFilter
+    :param alerts: rules to check every message against, and where to send those that match
+    :type alerts: AlertEngine
+    :param dedup: drops copies of a recent message, across all sources
+    :type dedup: Deduplicator
+    :param publisher: where else to send every message
+    :type publisher: Publisher
+    :param silence_timeout: restart a multimon-ng that prints nothing for this many seconds while receiving audio
+    :type silence_timeout: float
+    :param probe_cache: where to cache what multimon-ng supports, if anywhere
+    :type probe_cache: str
+    :param demodulators: multimon-ng demodulators to run
+    :type demodulators: Sequence[str]
+    :param adaptive: narrow each source down to the demodulators its traffic uses; see :class:`DemodSelector`
+    :type adaptive: bool
+    :param learn_window: seconds to watch which demodulators decode anything before narrowing
+    :type learn_window: float
+    :param reprobe_interval: seconds between going back to every demodulator to learn again
+    :type reprobe_interval: float
+    """
+    version, json_capable = await probe_multimon(mmng_binary, probe_cache)
+    click.echo(f'multimon-ng version: {version}', err=True)
+    click.echo(f'JSON capable: {json_capable}', err=True)
+    if json_capable:
+        click.echo(f'JSON decoder: {json_backend()[0]}', err=True)
+
+    sources = [DecodeSource(port, AudioBuffer(audio_buffer, overflow), capcodes) for port in ports]
+    for source in sources:
+        source.capture = capture
+    supervisors = [Supervisor(source, mmng_binary, multimon_args(json_capable, demodulators),
+                              lambda text, source=source: click.echo(f'{source.name} {text}', err=True),
+                              silence_timeout=silence_timeout)
+                   for source in sources]
+    selectors = {}
+    if adaptive and len(demodulators) > 1:
+        selectors = {supervisor.source.port: DemodSelector(supervisor, demodulators, json_capable, learn_window,
+                                                           reprobe_interval)
+                     for supervisor in supervisors}
+    write = output.write
+    rates = RateStats()
+
+    async def pump(supervisor: Supervisor) -> None:
+        source = supervisor.source
+        selector = selectors.get(source.port)
+        async for records in supervisor.records():
+            for record in records:
+                message = source.parse_record(record)
+                if message is None:
+                    continue
+                if selector is not None:
+                    selector.observe(message)
+                if dedup is not None and dedup.check(message)[1]:
+                    continue
+                rates.record(message)
+                if store is not None:
+                    store.add(message)
+                if alerts is not None:
+                    alerts.check(message)
+                if publisher is not None:
+                    publisher.publish(message)
+                write(message.to_json() + '\n')
+            output.flush()
+
+    async def export_metrics() -> None:
+        snapshot = None
+        while True:
+            await asyncio.sleep(metrics_interval)
+            snapshot = METRICS.snapshot(snapshot)
+            write_snapshot(metrics_file, snapshot)
+
+    async def reload_configs() -> None:
+        while True:
+            await asyncio.sleep(2)
+            for config, name in ((capcodes, 'capcode filters'), (alerts, 'alert rules')):
+                if config is None or not config.path:
+                    continue
+                try:
+                    if config.reload():
+                        click.echo(f'Reloaded {name} from {config.path}', err=True)
+                except (FilterConfigError, AlertConfigError) as error:
+                    click.echo(f'{name.capitalize()} not reloaded: {error}', err=True)
+
+    exporter = asyncio.create_task(export_metrics()) if metrics_file else None
+    reloader = asyncio.create_task(reload_configs()) if capcodes is not None or alerts is not None else None
+    selecting = []
+    try:
+        if publisher is not None:
+            try:
+                await publisher.start()
+            except OSError as error:
+                raise click.ClickException(f'Cannot publish messages: {error}') from None
+        for source in sources:
+            await source.listen()
+            click.echo(f'Listening on UDP port {source.port}', err=True)
+        selecting = [asyncio.create_task(selector.run()) for selector in selectors.values()]
+        await asyncio.gather(*(pump(supervisor) for supervisor in supervisors))
+    finally:
+        for task in (exporter, reloader, *selecting):
+            if task is not None:
+                task.cancel()
+        for supervisor in supervisors:
+            source = supervisor.source
+            await source.close()
+            stats = source.audio.stats
+            click.echo(f'{source.name} audio bytes received: {stats["received"]}, written: {stats["written"]}, '
+                       f'dropped: {stats["dropped"]}', err=True)
+            if supervisor.restarts:
+                click.echo(f'{source.name} multimon-ng restarts: {supervisor.restarts}, '
+                           f'down for {supervisor.downtime:.1f}s', err=True)
+            if source.port in selectors:
+                click.echo(f'{source.name} demodulators: {selectors[source.port].describe()}', err=True)
+        if dedup is not None:
+            stats = dedup.stats
+            click.echo(f'Messages unique: {stats["unique"]}, duplicates dropped: {stats["duplicates"]}', err=True)
+        if store is not None:
+            stats = store.stats
+            if stats['dropped'] or stats['failed']:
+                click.echo(f'Messages stored: {stats["written"]}, dropped: {stats["dropped"]}, '
+                           f'failed: {stats["failed"]} ({store.error})', err=True)
+        busiest = rates.busiest(5)
+        if busiest:
+            click.echo(f'Busiest capcodes: {", ".join(f"{address} ({count})" for address, count in busiest)}', err=True)
+        if publisher is not None:
+            await publisher.close()
+            for name, stats in publisher.stats.items():
+                click.echo(f'Published to {name}: {stats["messages"]}, dropped: {stats["dropped"]}, '
+                           f'failed: {stats["failed"]}', err=True)
+
+
+async def run_replay(mmng_binary: str, capture_path: str, output: TextIO, speed: float = 1.0,
+                     audio_buffer: int = 1 << 20, probe_cache: str | None = None) -> tuple[int, float]:
+    """
+    Feed a capture made with ``--capture`` back through multimon-ng, writing every message to ``output`` as a JSON line.
+
+    Each port in the capture gets its own multimon-ng, as it did live.  At a ``speed`` of 0, audio goes in as fast as
+    multimon-ng takes it, and nothing is dropped.
+
+    :param mmng_binary: path to the multimon-ng binary
+    :type mmng_binary: str
+    :param capture_path: the capture file
+    :type capture_path: str
+    :param output: where to write JSON Lines
+    :type output: TextIO
+    :param speed: multiple of real time to replay at, or 0 for as fast as possible
+    :type speed: float
+    :param audio_buffer: bytes of audio to buffer for each source
+    :type audio_buffer: int
+    :param probe_cache: where to cache what multimon-ng supports, if anywhere
+    :type probe_cache: str
+    :return: messages decoded and seconds taken
+    :rtype: tuple
+    """
+    _, json_capable = await probe_multimon(mmng_binary, probe_cache)
+    args = multimon_args(json_capable)
+    sources: dict[int, DecodeSource] = {}
+    pumps = []
+    count = 0
+
+    async def pump(source: DecodeSource) -> None:
+        nonlocal count
+        # Drain stderr alongside stdout, or a chatty multimon-ng fills the pipe and stalls mid-replay
+        errors = loop.create_task(report_errors(source))
+        try:
+            async for line in source.lines():
+                output.write(source.parse(line).to_json() + '\n')
+                count += 1
+        finally:
+            await asyncio.gather(errors, return_exceptions=True)
+
+    async def report_errors(source: DecodeSource) -> None:
+        async for error in read_lines(source.process.stderr):
+            click.echo(f'{source.name} Error: {error}', err=True)
+
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        for offset, port, data in read_capture(capture_path):
+            source = sources.get(port)
+            if source is None:
+                source = sources[port] = DecodeSource(port, AudioBuffer(audio_buffer, 'drop-newest'))
+                await source.start(mmng_binary, args, listen=False)
+                pumps.append(loop.create_task(pump(source)))
+            if speed:
+                delay = start + offset / speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await source.audio.put_wait(data)
+        for source in sources.values():
+            await source.finish()
+        await asyncio.gather(*pumps)
+    finally:
+        for source in sources.values():
+            await source.close()
+    output.flush()
+    return count, time.perf_counter() - start
@@ -0,0 +1,138 @@
+"""
+Decode multimon-ng's JSON output, one line per message, into :class:`MultimonRecord` s.
+
+The fastest decoder installed is used: ``msgspec`` decodes into a struct holding only the fields mmng-ui uses,
+skipping the rest, ``orjson`` into a dict, and the standard library's ``json`` does the same when neither is installed
+(``pip install mmng-ui[msgspec]`` or ``mmng-ui[orjson]``).  The fields are left untyped by every backend and then
+normalised the same way by :func:`make_record`, so the backends always agree.
+"""
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from typing import Any, Callable, NamedTuple, Optional
+
+
+class MultimonRecord(NamedTuple):
+    """The fields mmng-ui uses from a line of multimon-ng's JSON output; any it leaves out or can't use are None."""
+    demod_name: Optional[str] = None
+    address: Optional[str] = None
+    function: Optional[int] = None
+    alpha: Optional[str] = None
+    numeric: Optional[str] = None
+
+
+def _text(value: Any) -> str | None:
+    return value if value is None or isinstance(value, str) else str(value)
+
+
+def make_record(demod_name: Any, address: Any, function: Any, alpha: Any, numeric: Any) -> MultimonRecord:
+    """
+    A record from the fields as decoded, whatever JSON types multimon-ng used for them.
+
+    The address becomes a string, whole numbers written as floats without their ``.0``, and the function code an int,
+    or None if it isn't a whole number; any other field that isn't a string becomes one.
+    """
+    if isinstance(address, float) and address.is_integer():
+        address = int(address)
+    address = None if address is None else str(address).strip()
+    if isinstance(function, str):
+        function = int(function) if function.strip().isdigit() else None
+    elif isinstance(function, float):
+        function = int(function) if function.is_integer() else None
+    elif not isinstance(function, int) or isinstance(function, bool):
+        function = None
+    return MultimonRecord(_text(demod_name), address, function, _text(alpha), _text(numeric))
+
+
+def _from_object(fields: object) -> MultimonRecord:
+    if not isinstance(fields, dict):
+        raise ValueError('Not a JSON object')
+    get = fields.get
+    return make_record(get('demod_name'), get('address'), get('function'), get('alpha'), get('numeric'))
+
+
+def _stdlib_decoder() -> Callable[[str | bytes], MultimonRecord]:
+    loads = json.loads
+
+    def decode(data: str | bytes | memoryview) -> MultimonRecord:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return _from_object(loads(data))
+
+    return decode
+
+
+def _orjson_decoder() -> Callable[[str | bytes], MultimonRecord]:
+    import orjson
+
+    loads = orjson.loads
+
+    def decode(data: str | bytes | memoryview) -> MultimonRecord:
+        # orjson.JSONDecodeError is a ValueError
+        return _from_object(loads(data))
+
+    return decode
+
+
+def _msgspec_decoder() -> Callable[[str | bytes], MultimonRecord]:
+    import msgspec
+
+    # Any, rather than the types expected, so that odd values are normalised by make_record as the other backends do,
+    # not rejected
+    class Record(msgspec.Struct):
+        demod_name: Any = None
+        address: Any = None
+        function: Any = None
+        alpha: Any = None
+        numeric: Any = None
+
+    decoder = msgspec.json.Decoder(Record)
+    error = msgspec.DecodeError
+
+    def decode(data: str | bytes | memoryview) -> MultimonRecord:
+        try:
+            record = decoder.decode(data)
+        except error as problem:
+            raise ValueError(str(problem)) from None
+        return make_record(record.demod_name, record.address, record.function, record.alpha, record.numeric)
+
+    return decode
+
+
+BACKENDS = {
+    'msgspec': _msgspec_decoder,
+    'orjson': _orjson_decoder,
+    'json': _stdlib_decoder,
+}
+
+
+def select_backend(name: str | None = None) -> tuple[str, Callable[[str | bytes], MultimonRecord]]:
+    """
+    Choose a JSON decoder: ``name`` if given, or else the first of ``msgspec``, ``orjson`` and ``json`` that imports.
+
+    :param name: the backend to use
+    :type name: str
+    :return: the backend's name, and a function decoding one line to a record that raises ValueError if the line
+        isn't a JSON object
+    :rtype: tuple
+    """
+    if name is not None:
+        return name, BACKENDS[name]()
+    for name in ('msgspec', 'orjson'):
+        try:
+            return name, BACKENDS[name]()
+        except ImportError:
+            pass
+    return 'json', _stdlib_decoder()
+
+
+@lru_cache(maxsize=None)
+def backend() -> tuple[str, Callable[[str | bytes], MultimonRecord]]:
+    """The decoder :func:`select_backend` picks, chosen on first use so nothing is imported unless it is needed."""
+    return select_backend()
+
+
+def decode_record(data: str | bytes | memoryview) -> MultimonRecord:
+    """Decode one line of multimon-ng's JSON output, raising ValueError if it isn't a JSON object."""
+    return backend()[1](data)
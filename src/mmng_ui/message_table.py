@@ -0,0 +1,415 @@
+"""Bounded, virtualized widgets for the message table and log panes."""
+from __future__ import annotations
+
+import json
+import tempfile
+import textwrap
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+
+from rich.segment import Segment
+from rich.style import Style
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.widgets import RichLog
+
+
+@dataclass
+class Column:
+    """
+    A column of a :class:`MessageTable`.
+
+    Columns that don't wrap grow to fit the widest cell seen; the wrapping column gets whatever width is left over.
+    """
+    key: str
+    label: str
+    justify: str = 'left'
+    wrap: bool = False
+
+
+class TableRow:
+    """A row of a :class:`MessageTable`.  ``start`` is its first line, counted from the very first row added."""
+
+    __slots__ = ('index', 'cells', 'style', 'height', 'start')
+
+    def __init__(self, index: int, cells: tuple[str, ...], style: str | None = None):
+        self.index = index
+        self.cells = cells
+        self.style = style
+        self.height = 1
+        self.start = 0
+
+
+class RowHistory:
+    """
+    Append-only on-disk store of rows evicted from a :class:`MessageTable`, read back a page at a time.
+
+    :param path: file to keep history in, or None for an anonymous temporary file
+    :type path: str
+    """
+
+    def __init__(self, path: str | None = None):
+        self._file = open(path, 'w+b') if path else tempfile.TemporaryFile()
+        self._offsets = array('Q')
+        self._end = 0
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def append(self, row: TableRow) -> None:
+        record = json.dumps([row.cells, row.style], ensure_ascii=False).encode() + b'\n'
+        self._offsets.append(self._end)
+        self._file.seek(self._end)
+        self._file.write(record)
+        self._end += len(record)
+
+    def read(self, start: int, stop: int) -> list[TableRow]:
+        """Read back rows ``start`` to ``stop`` (exclusive)."""
+        stop = min(stop, len(self._offsets))
+        if start >= stop:
+            return []
+        self._file.flush()
+        self._file.seek(self._offsets[start])
+        end = self._offsets[stop] if stop < len(self._offsets) else self._end
+        records = self._file.read(end - self._offsets[start]).splitlines()
+        rows = []
+        for index, record in enumerate(records, start=start):
+            cells, style = json.loads(record)
+            rows.append(TableRow(index, tuple(cells), style))
+        return rows
+
+    def clear(self) -> None:
+        self._file.truncate(0)
+        self._offsets = array('Q')
+        self._end = 0
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class MessageTable(ScrollView, can_focus=True):
+    """
+    A table that keeps at most ``max_rows`` rows in memory and only renders the ones on screen.
+
+    Rows beyond the cap are evicted oldest first and written to a :class:`RowHistory`.  Scrolling to the top pages
+    older rows back in from there, ``page_size`` at a time; they are dropped again once the view returns to the bottom.
+
+    :param columns: the table's columns, in order
+    :type columns: Column
+    :param max_rows: rows to keep in memory
+    :type max_rows: int
+    :param page_size: rows to read back from history each time the view reaches the top
+    :type page_size: int
+    :param history_path: file to keep evicted rows in, or None for a temporary file
+    :type history_path: str
+    """
+
+    DEFAULT_CSS = """
+    MessageTable {
+        background: $surface;
+        overflow-x: hidden;
+    }
+    """
+
+    CELL_PADDING = 1
+
+    def __init__(self, *columns: Column, max_rows: int = 10_000, page_size: int = 500,
+                 history_path: str | None = None, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.columns = list(columns)
+        self.max_rows = max(max_rows, 1)
+        self.page_size = page_size
+        self.history = RowHistory(history_path)
+        self._widths = [len(column.label) for column in self.columns]
+        self._wrap_column = next((i for i, column in enumerate(self.columns) if column.wrap), None)
+        self._wrap_width = 0
+        self._rows: list[TableRow | None] = []
+        self._starts: list[int] = []
+        self._head = 0
+        self._spilled = 0
+        self._next_index = 0
+        self._browsing = False
+        self._adjusting = False
+        self._strips: dict[tuple[int, int, int], Strip] = {}
+        self._styles: dict[str, Style] = {}
+
+    def __len__(self) -> int:
+        """Rows currently held in memory, including any paged in from history."""
+        return len(self._rows) - self._head
+
+    @property
+    def row_count(self) -> int:
+        """Rows added since the table was last cleared, whether in memory or in history."""
+        return self._next_index
+
+    @property
+    def _first_line(self) -> int:
+        return self._starts[self._head] if self._head < len(self._rows) else 0
+
+    @property
+    def _end_line(self) -> int:
+        if self._head == len(self._rows):
+            return 0
+        last = self._rows[-1]
+        return last.start + last.height
+
+    def add_row(self, *cells: str, style: str | None = None) -> TableRow:
+        """Add one row; see :meth:`add_rows`."""
+        return self.add_rows([cells], style=style)[0]
+
+    def add_rows(self, rows: Iterable[Sequence[str]], style: str | None = None,
+                 styles: Iterable[str | None] | None = None) -> list[TableRow]:
+        """
+        Add rows to the bottom of the table, evicting the oldest beyond ``max_rows``.
+
+        The view follows new rows if it was already scrolled to the bottom.
+
+        :param rows: cells for each row, one per column
+        :type rows: Iterable[Sequence[str]]
+        :param style: Rich style applied to the whole of each row
+        :type style: str
+        :param styles: a style for each row, in place of ``style``
+        :type styles: Iterable[str | None]
+        :return: the new rows
+        :rtype: list[TableRow]
+        """
+        follow = self.is_vertical_scroll_end and not self._browsing
+        widths = self._widths
+        relayout = False
+        added = []
+        end = self._end_line
+        row_styles = iter(styles) if styles is not None else None
+        for cells in rows:
+            row = TableRow(self._next_index, tuple(cells), next(row_styles) if row_styles is not None else style)
+            self._next_index += 1
+            for i, cell in enumerate(row.cells):
+                if i != self._wrap_column and len(cell) > widths[i]:
+                    widths[i] = len(cell)
+                    relayout = True
+            row.height = self._measure(row)
+            row.start = end
+            end += row.height
+            self._rows.append(row)
+            self._starts.append(row.start)
+            added.append(row)
+
+        if relayout:
+            self._relayout()
+        self._evict()
+        self._update_virtual_size()
+        if follow:
+            self.scroll_end(animate=False, immediate=True, force=True, x_axis=False)
+        self.refresh()
+        return added
+
+    def refresh_row(self, row: TableRow) -> None:
+        """Redraw ``row`` after its cells or style have been changed in place."""
+        self._strips.clear()
+        relayout = self._measure(row) != row.height
+        for i, cell in enumerate(row.cells):
+            if i != self._wrap_column and len(cell) > self._widths[i]:
+                self._widths[i] = len(cell)
+                relayout = True
+        if relayout:
+            self._relayout()
+            self._update_virtual_size()
+        self.refresh()
+
+    def clear(self) -> None:
+        """Remove every row, from memory and from history."""
+        self._rows.clear()
+        self._starts.clear()
+        self._head = 0
+        self._spilled = 0
+        self._next_index = 0
+        self._browsing = False
+        self._strips.clear()
+        self.history.clear()
+        self._update_virtual_size()
+        self.scroll_home(animate=False, immediate=True)
+        self.refresh()
+
+    def on_unmount(self) -> None:
+        self.history.close()
+
+    def on_resize(self) -> None:
+        self._relayout()
+        self._update_virtual_size()
+        if not self._browsing:
+            self.scroll_end(animate=False, immediate=True, force=True, x_axis=False)
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        if self._adjusting:
+            return
+        if round(new_value) == 0 and round(old_value) != 0 and self._can_page_back():
+            self.call_later(self.page_back)
+        elif self._browsing and new_value >= self.max_scroll_y:
+            self._browsing = False
+            self.call_later(self._drop, self._spilled)
+
+    def _can_page_back(self) -> bool:
+        return self._head < len(self._rows) and self._rows[self._head].index > 0
+
+    def page_back(self) -> None:
+        """Read the ``page_size`` rows before the oldest one on screen back in from history."""
+        if not self._can_page_back():
+            return
+        stop = self._rows[self._head].index
+        page = self.history.read(max(stop - self.page_size, 0), stop)
+        if not page:
+            return
+        start = self._first_line
+        for row in page:
+            row.height = self._measure(row)
+        for row in reversed(page):
+            start -= row.height
+            row.start = start
+        added = self._first_line - start
+        self._rows[:self._head] = page
+        self._starts[:self._head] = [row.start for row in page]
+        self._head = 0
+        self._spilled += len(page)
+        self._browsing = True
+        self._update_virtual_size()
+        self._scroll_by_lines(added)
+        self.refresh()
+
+    def _evict(self) -> None:
+        """Spill the oldest rows beyond ``max_rows`` to history, then drop what is no longer wanted in memory."""
+        live = len(self._rows) - self._head - self._spilled
+        while live > self.max_rows:
+            row = self._rows[self._head + self._spilled]
+            if row.index >= len(self.history):
+                self.history.append(row)
+            self._spilled += 1
+            live -= 1
+        if not self._browsing:
+            self._drop(self._spilled)
+        elif self._spilled > self.max_rows:
+            self._drop(self._spilled - self.max_rows)
+
+    def _drop(self, count: int) -> None:
+        """Drop ``count`` rows from the top, which are already in history."""
+        count = min(count, self._spilled)
+        if count <= 0:
+            return
+        first_line = self._first_line
+        for i in range(self._head, self._head + count):
+            self._rows[i] = None
+        self._head += count
+        self._spilled -= count
+        dropped_lines = self._first_line - first_line
+        if self._head > 1024 and self._head * 2 > len(self._rows):
+            del self._rows[:self._head]
+            del self._starts[:self._head]
+            self._head = 0
+        self._update_virtual_size()
+        self._scroll_by_lines(-dropped_lines)
+
+    def _scroll_by_lines(self, lines: int) -> None:
+        """Move the scroll position so the rows on screen stay put after rows above them are added or removed."""
+        if not lines:
+            return
+        self._adjusting = True
+        try:
+            self.scroll_to(y=max(self.scroll_y + lines, 0), animate=False, immediate=True, force=True)
+        finally:
+            self._adjusting = False
+
+    def _measure(self, row: TableRow) -> int:
+        if self._wrap_column is None or self._wrap_width <= 0:
+            return 1
+        return len(self._wrap(row.cells[self._wrap_column])) or 1
+
+    def _wrap(self, text: str) -> list[str]:
+        return textwrap.wrap(text, self._wrap_width) if self._wrap_width > 0 else [text]
+
+    def _relayout(self) -> None:
+        """Recompute every row's height after the wrapping column changes width."""
+        padding = 2 * self.CELL_PADDING * len(self.columns)
+        fixed = sum(width for i, width in enumerate(self._widths) if i != self._wrap_column)
+        self._wrap_width = max(self.scrollable_content_region.width - fixed - padding, 0)
+        self._strips.clear()
+        line = self._first_line
+        for i in range(self._head, len(self._rows)):
+            row = self._rows[i]
+            row.height = self._measure(row)
+            row.start = line
+            self._starts[i] = line
+            line += row.height
+
+    def _update_virtual_size(self) -> None:
+        # One extra line for the header
+        self.virtual_size = Size(self.scrollable_content_region.width, self._end_line - self._first_line + 1)
+
+    def _style(self, style: str | None) -> Style:
+        if not style:
+            return Style.null()
+        if style not in self._styles:
+            self._styles[style] = Style.parse(style)
+        return self._styles[style]
+
+    def _cells_strip(self, cells: Sequence[str], style: Style, width: int) -> Strip:
+        pad = ' ' * self.CELL_PADDING
+        segments = []
+        for i, (column, cell) in enumerate(zip(self.columns, cells)):
+            cell_width = self._wrap_width if i == self._wrap_column else self._widths[i]
+            if column.justify == 'right':
+                cell = cell.rjust(cell_width)
+            else:
+                cell = cell.ljust(cell_width)
+            segments.append(Segment(f'{pad}{cell[:cell_width]}{pad}', style))
+        return Strip(segments).crop_extend(0, width, style)
+
+    def render_line(self, y: int) -> Strip:
+        width = self.scrollable_content_region.width
+        if y == 0:
+            header = self._cells_strip([column.label for column in self.columns], Style(bold=True), width)
+            return header.apply_style(self.rich_style)
+
+        line = self._first_line + round(self.scroll_y) + y - 1
+        if self._head == len(self._rows) or line >= self._end_line:
+            return Strip.blank(width, self.rich_style)
+
+        i = bisect_right(self._starts, line, lo=self._head) - 1
+        row = self._rows[i]
+        key = (row.index, line - row.start, width)
+        strip = self._strips.get(key)
+        if strip is None:
+            if len(self._strips) > 4096:
+                self._strips.clear()
+            sub_line = line - row.start
+            cells = [cell if sub_line == 0 else '' for cell in row.cells]
+            if self._wrap_column is not None:
+                wrapped = self._wrap(row.cells[self._wrap_column])
+                cells[self._wrap_column] = wrapped[sub_line] if sub_line < len(wrapped) else ''
+            strip = self._cells_strip(cells, self._style(row.style), width).apply_style(self.rich_style)
+            self._strips[key] = strip
+        return strip
+
+
+class BoundedLog(RichLog):
+    """
+    A :class:`RichLog` holding at most ``max_lines`` lines.
+
+    RichLog's own ``max_lines`` copies the whole line list on every write once full; this trims in blocks of an eighth
+    of the cap instead, so eviction stays O(1) amortized per line.
+    """
+
+    def __init__(self, *args, max_lines: int | None = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.line_cap = max_lines
+
+    def write(self, *args, **kwargs) -> BoundedLog:
+        super().write(*args, **kwargs)
+        if self.line_cap and len(self.lines) > self.line_cap + max(self.line_cap // 8, 1):
+            excess = len(self.lines) - self.line_cap
+            del self.lines[:excess]
+            self._start_line += excess
+            self.virtual_size = Size(self._widest_line_width, len(self.lines))
+            self.refresh()
+        return self
@@ -0,0 +1,159 @@
+"""Lightweight counters, gauges and latency histograms for the decode pipeline."""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+from typing import Any
+
+
+class Counter:
+    """A running total, such as datagrams received; rates come from comparing snapshots."""
+
+    __slots__ = ('total',)
+
+    def __init__(self) -> None:
+        self.total = 0
+
+    def add(self, amount: int = 1) -> None:
+        self.total += amount
+
+
+class Gauge:
+    """A level that goes up and down, such as a queue's depth, and the highest it has been."""
+
+    __slots__ = ('value', 'peak')
+
+    def __init__(self) -> None:
+        self.value = 0
+        self.peak = 0
+
+    def set(self, value: float) -> None:
+        self.value = value
+        if value > self.peak:
+            self.peak = value
+
+
+class Histogram:
+    """
+    Durations counted into power-of-two microsecond buckets: bucket 0 is under 1 µs, bucket ``n`` is ``2**(n-1)`` up to
+    ``2**n`` µs.  Observing is a handful of integer operations, and quantiles are accurate to within a factor of two.
+    """
+
+    __slots__ = ('buckets', 'count', 'sum', 'max')
+
+    BUCKETS = 32
+
+    def __init__(self) -> None:
+        self.buckets = [0] * self.BUCKETS
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float, count: int = 1) -> None:
+        """Record ``count`` durations of ``seconds`` each."""
+        bucket = int(seconds * 1_000_000).bit_length()
+        self.buckets[bucket if bucket < self.BUCKETS else self.BUCKETS - 1] += count
+        self.count += count
+        self.sum += seconds * count
+        if seconds > self.max:
+            self.max = seconds
+
+
+def quantile(buckets: list[int], q: float) -> float:
+    """The upper bound, in seconds, of the bucket holding quantile ``q`` of ``buckets``."""
+    total = sum(buckets)
+    if not total:
+        return 0.0
+    rank = q * total
+    seen = 0
+    for bucket, count in enumerate(buckets):
+        seen += count
+        if seen >= rank:
+            return (1 << bucket) / 1_000_000
+    return (1 << (len(buckets) - 1)) / 1_000_000
+
+
+class Metrics:
+    """
+    A registry of named counters, gauges and histograms, read through :meth:`snapshot`.
+
+    Instruments are created on first use and live as long as the registry, so hot paths can look them up once and keep
+    a reference.
+    """
+
+    def __init__(self, clock=time.monotonic) -> None:
+        self.clock = clock
+        self.started = clock()
+        self.counters: dict[str, Counter] = {}
+        self.gauges: dict[str, Gauge] = {}
+        self.histograms: dict[str, Histogram] = {}
+
+    def counter(self, name: str) -> Counter:
+        return self.counters.setdefault(name, Counter())
+
+    def gauge(self, name: str) -> Gauge:
+        return self.gauges.setdefault(name, Gauge())
+
+    def histogram(self, name: str) -> Histogram:
+        return self.histograms.setdefault(name, Histogram())
+
+    def snapshot(self, previous: dict[str, Any] | None = None) -> dict[str, Any]:
+        """
+        Every instrument's state, as JSON-friendly types, with times in milliseconds.
+
+        Rates, and the mean and quantiles of each histogram, cover the time since ``previous``, an earlier snapshot of
+        this registry, or since the registry was created.
+
+        :param previous: an earlier snapshot to measure from
+        :type previous: dict
+        :return: the snapshot
+        :rtype: dict
+        """
+        now = self.clock()
+        uptime = now - self.started
+        elapsed = uptime - previous['uptime'] if previous else uptime
+        counters = {}
+        for name, counter in self.counters.items():
+            before = previous['counters'].get(name, {}).get('total', 0) if previous else 0
+            counters[name] = {
+                'total': counter.total,
+                'rate': (counter.total - before) / elapsed if elapsed > 0 else 0.0,
+            }
+        histograms = {}
+        for name, histogram in self.histograms.items():
+            before = previous['histograms'].get(name) if previous else None
+            buckets = list(histogram.buckets)
+            window = [count - earlier for count, earlier in zip(buckets, before['buckets'])] if before else buckets
+            count = histogram.count - (before['count'] if before else 0)
+            total = histogram.sum - (before['sum'] / 1000 if before else 0)
+            histograms[name] = {
+                'count': histogram.count,
+                'sum': histogram.sum * 1000,
+                'max': histogram.max * 1000,
+                'mean': total / count * 1000 if count else 0.0,
+                'p50': quantile(window, 0.5) * 1000,
+                'p95': quantile(window, 0.95) * 1000,
+                'p99': quantile(window, 0.99) * 1000,
+                'buckets': buckets,
+            }
+        return {
+            'time': time.time(),
+            'uptime': uptime,
+            'counters': counters,
+            'gauges': {name: {'value': gauge.value, 'peak': gauge.peak} for name, gauge in self.gauges.items()},
+            'histograms': histograms,
+        }
+
+
+def write_snapshot(path: str, snapshot: dict[str, Any]) -> None:
+    """Write ``snapshot`` to ``path`` as JSON, replacing the file atomically so readers never see half of one."""
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile('w', dir=directory, prefix='.metrics-', suffix='.json', delete=False) as file:
+        json.dump(snapshot, file, indent=2)
+    os.replace(file.name, path)
+
+
+#: The pipeline's own metrics
+METRICS = Metrics()
@@ -1,33 +1,38 @@
-import shlex
-import shutil
-import sys
+from __future__ import annotations
+
 import asyncio
-from subprocess import PIPE
+import time
 from dataclasses import dataclass
-import json
+from typing import Sequence
 
-import click
-from rich.text import Text
 from textual.app import App, ComposeResult
-from textual.containers import Container, Horizontal, VerticalScroll, Vertical
+from textual.containers import Container, Vertical
 from textual.reactive import reactive
 from textual.screen import ModalScreen, Screen
 from textual.widget import Widget
-from textual.widgets import Header, Static, RichLog, DataTable, Footer, HelpPanel, Markdown, Sparkline
-from textual import work, events
-from textual.message import Message
+from textual.widgets import DataTable, Header, Input, Static, Footer, Sparkline
+from textual import work
 from textual.binding import Binding
-from textual.actions import SkipAction
-
-from mmng_ui.reader import ParseLine, PocsagMessage
-from mmng_ui._version import __version__
 
+from mmng_ui.alerts import AlertConfigError, AlertEngine
+from mmng_ui.capture import CaptureWriter
+from mmng_ui.decoder import (AudioBuffer, DecodeSource, DemodSelector, POCSAG_DEMODULATORS, Supervisor, UDPForwarder,
+                             multimon_args, probe_multimon)
+from mmng_ui.dedup import Deduplicator
+from mmng_ui.filters import CapcodeFilter, FilterConfigError
+from mmng_ui.jsondecode import backend as json_backend
+from mmng_ui.message_table import BoundedLog, Column, MessageTable
+from mmng_ui.metrics import METRICS, write_snapshot
+from mmng_ui.publish import Publisher
+from mmng_ui.rates import RESOLUTIONS, RateStats
+from mmng_ui.reader import PocsagMessage
+from mmng_ui.scheduler import UpdateScheduler
+from mmng_ui.store import MessageStore, parse_query
 
 
-@dataclass
-class OutputMessage(Message, bubble=False):
-    """Custom message class to handle subprocess output."""
-    output: str
+QUEUE_DEPTH = METRICS.gauge('queue depth')
+RENDER_TIME = METRICS.histogram('render')
+FRAMES = METRICS.counter('frames')
 
 
 @dataclass
@@ -41,44 +46,111 @@ class Status:
     def __repr__(self):
         return f'Receiver: {self.receiver}\nIP address: {self.ip_address}'
 
-class UDPHandler(asyncio.DatagramProtocol):
+class UDPHandler(UDPForwarder):
     """Handle UDP traffic"""
 
-    def __init__(self, app, loop):
-        self.app = app
+    def __init__(self, source, status, loop):
+        super().__init__(source)
         self.loop = loop
-        self.status = self.app.query_one('#status')
+        self.status = status
         self.last_activity_time = 0
 
     def connection_made(self, transport):
-        self.transport = transport
-        self.status.receiver = 'ready'
+        super().connection_made(transport)
+        self.status.update_source(self.source.port, receiver='ready')
 
     def connection_lost(self, exc):
-        self.status.receiver = 'Closed'
+        self.status.update_source(self.source.port, receiver='Closed')
 
     def datagram_received(self, data, addr):
         self.last_activity_time = self.loop.time()
-        self.status.ip_address = addr[0]
-        self.app.process.stdin.write(data)
-        self.app.process.stdin.drain()
+        if addr[0] != self.source.peer:
+            self.status.update_source(self.source.port, ip_address=addr[0])
+        super().datagram_received(data, addr)
 
     async def idle_task(self):
         """This updates the things in the status pane."""
         while True:
+            changes = {}
             if self.loop.time() - self.last_activity_time > 5:
-                self.status.receiver = '[wheat4]idle[/]'
+                changes['receiver'] = '[wheat4]idle[/]'
+            fill = 100 * len(self.audio) // self.audio.capacity
+            changes['audio'] = f'{fill}% full, {self.audio.bytes_dropped} B dropped'
+            self.status.update_source(self.source.port, **changes)
             await asyncio.sleep(1)
 
+
+@dataclass
+class SourceStatus:
+    """Status of one UDP source and its multimon-ng worker."""
+
+    receiver: str = '[dark_red]Not connected[/]'
+    ip_address: str = '[wheat4]None[/]'
+    audio: str = '[wheat4]Empty[/]'
+    decoder: str = '[wheat4]Starting[/]'
+    demodulators: str = ''
+
+
 class StatusWidget(Widget):
     """The status pane."""
 
-    receiver = reactive('[dark_red]Not connected[/]')
-    ip_address = reactive('[wheat4]None[/]')
     json_mode = reactive('[wheat4]Unknown[/]')
 
+    def __init__(self, sources: dict[int, SourceStatus], **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.sources = sources
+
     def render(self) -> str:
-        return f'Receiver: {self.receiver}\nIP address: {self.ip_address}\nJSON mode: {self.json_mode}'
+        if len(self.sources) == 1:
+            (source,) = self.sources.values()
+            text = (f'Receiver: {source.receiver}\nIP address: {source.ip_address}\nJSON mode: {self.json_mode}\n'
+                    f'Audio buffer: {source.audio}\nDecoder: {source.decoder}')
+            if source.demodulators:
+                text += f'\nDemodulators: {source.demodulators}'
+            return text
+        lines = [f'JSON mode: {self.json_mode}']
+        for port, source in self.sources.items():
+            lines.append(f'[b]:{port}[/] {source.receiver} {source.ip_address}\n  Audio buffer: {source.audio}\n'
+                         f'  Decoder: {source.decoder}')
+            if source.demodulators:
+                lines.append(f'  Demodulators: {source.demodulators}')
+        return '\n'.join(lines)
+
+
+class PerfWidget(Static):
+    """The performance pane: pipeline rates and latencies since the last refresh."""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.previous = None
+
+    def update_metrics(self) -> None:
+        snapshot = METRICS.snapshot(self.previous)
+        self.previous = snapshot
+        counters = snapshot['counters']
+        histograms = snapshot['histograms']
+        queue = snapshot['gauges'].get('queue depth', {'value': 0, 'peak': 0})
+        busiest = ', '.join(f'{address} ×{count}' for address, count in self.app.rates.busiest(3)) or '[wheat4]-[/]'
+
+        def rate(name: str) -> float:
+            return counters.get(name, {}).get('rate', 0.0)
+
+        def latency(name: str) -> str:
+            histogram = histograms.get(name)
+            if not histogram or not histogram['p99']:
+                # Nothing observed since the last refresh
+                return '[wheat4]-[/]'
+            return f'{histogram["p50"]:g}/{histogram["p99"]:g} ms'
+
+        self.update(
+            f'Datagrams: {rate("datagrams"):,.0f}/s, {rate("udp bytes") / 1024:,.1f} KiB/s\n'
+            f'Lines: {rate("lines"):,.0f}/s\n'
+            f'Parse p50/p99: {latency("parse")}\n'
+            f'Duplicates: {rate("duplicates"):,.1f}/s\n'
+            f'Queue: {queue["value"]} (peak {queue["peak"]})\n'
+            f'Render p50/p99: {latency("render")}, {rate("frames"):.0f} fps, {rate("coalesced"):,.0f} coalesced/s\n'
+            f'Busiest: {busiest}'
+        )
 
 
 class HelpScreen(ModalScreen):
@@ -113,7 +185,8 @@ The status panel shows any incoming connections.  Receiver will transition betwe
 Just below the status panel is a sparkline -- this updates on each decode, and reflects character length of said
 decode.
 
-Underneath the log window in another sparkline, and this shows messages per second, for the last minute.
+Underneath the log window is another sparkline, showing messages per second for the last minute.  Press `g` to
+switch it to messages per minute for the last hour, per hour for the last day, or per day for the last month.
 
 The footer shows available keyboard choices to quit the app, show a help screen, and clear all logging panes.
 
@@ -127,37 +200,95 @@ JSON output isn't yet in `multimon-ng`, but I have a working
 fork [here](https://github.com/lingfish/multimon-ng/tree/add-json).
 
 [//]: # (README.md ends here)"""
+        # Markdown pulls in a parser and highlighter the rest of the app doesn't need, so wait until help is asked for
+        from textual.widgets import Markdown
+
         yield Markdown(text, id='help')
 
 
 
-class MsgsPerSecond(Sparkline):
-    """Calculate/update the messages per second sparkline."""
+class SearchScreen(ModalScreen):
+    """Search every stored message."""
 
-    def __init__(self, samples=[0]*60, **kwargs):
-        super().__init__(**kwargs)
-        self.samples = samples
+    BINDINGS = [("escape", "app.pop_screen", "Close")]
+
+    def compose(self) -> ComposeResult:
+        with Vertical(id='search'):
+            yield Input(placeholder='Words to find, address:1234567, since:2024-09-23, until:2024-09-23T18:00',
+                        id='search-input')
+            yield DataTable(id='search-results', cursor_type='row')
+
+    def on_mount(self) -> None:
+        self.query_one('#search').border_title = 'Search history'
+        self.query_one(DataTable).add_columns('Received', 'Address', 'Message')
+        self.run_search('')
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        self.run_search(event.value)
+
+    @work(thread=True, exclusive=True)
+    def run_search(self, query: str) -> None:
+        start = time.perf_counter()
+        results = self.app.store.search(**parse_query(query))
+        elapsed = time.perf_counter() - start
+        self.app.call_from_thread(self.show_results, results, elapsed)
+
+    def show_results(self, results: list[PocsagMessage], elapsed: float) -> None:
+        table = self.query_one(DataTable)
+        table.clear()
+        table.add_rows([(result.current_time.strftime('%Y-%m-%d %H:%M:%S'), result.address, result.trim_message or '')
+                        for result in results])
+        self.query_one('#search').border_subtitle = f'{len(results)} results in {elapsed * 1000:.1f} ms'
+
+
+class RateGraph(Sparkline):
+    """Messages per second, minute, hour or day, redrawn every second from the app's rate statistics."""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__([], **kwargs)
+        self.resolution = RESOLUTIONS[0][0]
 
     def on_mount(self) -> None:
-        self.update_timer = self.set_interval(1, self.update_graph)
-        self.data = self.samples
+        self.set_interval(1, self.update_graph)
+        self.update_graph()
 
     def update_graph(self) -> None:
-        self.data = self.data[-59:] + [len(self.app.message_count)]
-        self.app.message_count = []
+        self.data = self.app.rates.series(self.resolution)
+        self.tooltip = f'Messages per {self.resolution}'
+
+    def cycle(self) -> str:
+        """Switch to the next resolution, returning its name."""
+        names = [name for name, _, _ in RESOLUTIONS]
+        self.resolution = names[(names.index(self.resolution) + 1) % len(names)]
+        self.update_graph()
+        return self.resolution
 
 
 class MainScreen(Screen):
     def compose(self):
+        columns = [Column('time', 'Time')]
+        if len(self.app.ports) > 1:
+            columns.append(Column('source', 'Source'))
+        columns.append(Column('address', 'Address', justify='right'))
+        if self.app.dedup is not None:
+            columns.append(Column('seen', 'Seen', justify='right'))
+        columns.append(Column('message', 'Message', wrap=True))
+
         yield Header()
         with Container(id="app-grid"):
-            yield DataTable(id='messages')
-            yield RichLog(id='log', highlight=True, markup=True)
+            yield MessageTable(
+                *columns,
+                id='messages',
+                max_rows=self.app.max_rows,
+                history_path=self.app.history_file,
+            )
+            yield BoundedLog(id='log', highlight=True, markup=True, max_lines=self.app.max_log_lines)
             # yield StatusWidget(id='status')
             with Container(id="status-container"):
-                yield StatusWidget(id='status')
+                yield StatusWidget(self.app.source_status, id='status')
+                yield PerfWidget(id='perf')
                 yield Sparkline([], id='spark')
-        yield MsgsPerSecond(id='msgs-per-second')
+        yield RateGraph(id='rates')
         yield Footer()
 
     async def on_mount(self) -> None:
@@ -168,127 +299,166 @@ class MainScreen(Screen):
         log = self.screen.query_one('#log')
         status = self.screen.query_one('#status')
 
-        table.add_column('Time', key='time')
-        table.add_column('Address', key='address')
-        table.add_column('Message', key='message')
-        table.cursor_type = 'none'
         table.border_title ='POCSAG messages'
         log.border_title = 'Log window'
         status.border_title = 'Status'
-
-        self.parse_line = ParseLine()
-
-        # Run multimon-ng, grab version and JSON support
-        mmng_help_process = await asyncio.create_subprocess_exec(self.app.mmng_binary, '-h', stderr=PIPE)
-        mmng_help = await mmng_help_process.stderr.read()
-        await mmng_help_process.wait()
-        mmng_text = mmng_help.decode()
-        json_capable = '--json' in mmng_text
-        log.write(f'multimon-ng version: {mmng_text.splitlines()[0]}')
-        log.write(f'JSON capable: {json_capable}')
-
-        mmng_args = f'-a POCSAG512 -a POCSAG1200 -a POCSAG2400 -f alpha -t raw -u -q --timestamp -p {"--json" if json_capable else ""} -'
-        self.log('About to start multimon')
-        self.stream_subprocess(self.app.mmng_binary, mmng_args)
-        self.log('AFTER: About to start multimon')
-
-    @work(exclusive=True)
-    async def stream_subprocess(self, command, args):
-        """Stream output from a subprocess and post it using post_message."""
-        self.log('   in stream_subprocess')
-        self.process = await asyncio.create_subprocess_exec(
-            command,
-            *shlex.split(args),
-            stdin=PIPE,
-            stdout=PIPE,
-            stderr=PIPE
-        )
-        self.log('*** process is assigned')
-
-        network_loop = asyncio.get_running_loop()
-        transport, protocol = await network_loop.create_datagram_endpoint(
-            lambda: UDPHandler(self, network_loop),
-            local_addr=('::', self.app.port)
-        )
-        network_loop.create_task(protocol.idle_task())
-
-        # Stream stdout asynchronously
-        async for line in self.read_process_output(self.process.stdout):
-            self.log(f'Raw output from multimon: {line}')
-            self.post_message(OutputMessage(line))
-            self.set_timer(1, lambda: setattr(self.query_one('#status'), 'receiver', '[dark_green]waiting[/]'))
-            self.query_one('#spark').data = self.query_one('#spark').data[-9:] + [len(line)]
-            self.app.message_count.append(1)
-
-        # Handle any stderr errors
-        async for error in self.read_process_output(self.process.stderr):
-            self.post_message(OutputMessage(f'[red]Error: {error}'))
-
-    async def read_process_output(self, output):
-        """Read the output of a subprocess line by line."""
-        self.log('   in read_process_output')
-        status = self.query_one('#status')
-        while True:
-            status.receiver = '[blink bold bright_green]receiving[/]'
-            line = await output.readline()
-            self.log('   read a line')
-            if not line:
-                break
-            yield line.decode().strip()
-
-    async def on_resize(self, event: events.Resize) -> None:
-        self.current_width = event.size.width
-        table = self.screen.query_one('#messages')
-        self.recalc_width(table)
-
-    async def watch_show_vertical_scrollbar(self) -> None:
-        table = self.screen.query_one('#messages')
-        self.recalc_width(table)
-
-    async def on_output_message(self, message: OutputMessage):
-        """Handle OutputMessage to update UI components."""
+        perf = self.query_one(PerfWidget)
+        perf.border_title = 'Performance'
+        perf.display = False
+        self.set_interval(1, perf.update_metrics)
+        self.debug = self.app.devtools is not None
+
+        self.waiting_timers = {}
+
+        # Decoding started before the screen was built; catch up with anything it has produced since
+        self.app.main_screen = self
+        if self.app.early_log:
+            log.write('\n'.join(self.app.early_log))
+            self.app.early_log.clear()
+        if self.app.backlog:
+            lines, self.app.backlog = self.app.backlog, []
+            self.render_output(lines)
+
+    def render_output(self, lines: list[tuple[DecodeSource, bytes]]) -> None:
+        """Render one frame's worth of multimon-ng output: bulk-add the rows, then scroll and redraw once."""
         log = self.screen.query_one('#log')
         table = self.screen.query_one('#messages')
         status = self.screen.query_one('#status')
-
-        self.log(f'RECEIVED EVENT: {message}')
-        # Process the output as it becomes available
-        log.write(f'[bold magenta]multimon-ng: {message.output}')
-
-        result, json_detected = self.parse_line.parse(message.output)
-        self.log(f'result: {result}')
-
-        status.json_mode = json_detected
-
-        self.log('Adding a row')
-        if message:
-            table.add_row(str(result.current_time.strftime('%H:%M:%S')), Text(result.address, justify='right'),
-                          result.trim_message, height=None)
-        else:
-            log.write('WARNING: No valid message decoded from multimon-ng')
-
-        self.recalc_width(table)
-
-    def recalc_width(self, table) -> None:
-        message_col_width = table.columns['time'].get_render_width(table) + table.columns['address'].get_render_width(
-            table)
-        if table.show_vertical_scrollbar:
-            scroll_padding = table.styles.scrollbar_size_vertical
-        else:
-            scroll_padding = 0
-        table.columns["message"].width = (table.size.width - message_col_width) - (
-                    2 * table.cell_padding) - scroll_padding
-        table.columns["message"].auto_width = False
-        try:
-            table.action_scroll_bottom()
-        except SkipAction:
-            pass
+        spark = self.query_one('#spark')
+        many_sources = len(self.app.sources) > 1
+        start = time.perf_counter()
+
+        if self.debug:
+            self.log(f'Rendering {len(lines)} lines from multimon-ng')
+
+        # Parse first, so lines for filtered-out capcodes never reach the log or the table
+        logged = []
+        lengths = []
+        rows = []
+        styles = []
+        sightings = []
+        repeated = {}
+        store = self.app.store
+        alerts = self.app.alerts
+        dedup = self.app.dedup
+        publisher = self.app.publisher
+        rates = self.app.rates
+        selectors = self.app.selectors
+        for source, record in lines:
+            result = source.parse_record(record)
+            if result is None:
+                continue
+            if selectors:
+                selectors[source.port].observe(result)
+            # Only records that survived the filter get this far, so only those are decoded whole for the log
+            line = str(record, 'utf-8', 'replace').strip()
+            if many_sources:
+                # Tagged with the peer as well as the port, as several senders can share a port
+                origin = f'{source.name} {result.peer}' if result.peer else source.name
+                logged.append(f'[bold magenta]multimon-ng {origin}: {line}')
+            else:
+                logged.append(f'[bold magenta]multimon-ng: {line}')
+            lengths.append(len(result.trim_message or ''))
+            if dedup is not None:
+                sighting, duplicate = dedup.check(result)
+                if duplicate:
+                    # Rows added this frame get their count below; earlier ones are updated in place
+                    if sighting.payload is not None:
+                        repeated[id(sighting)] = sighting
+                    continue
+                sightings.append(sighting)
+            rates.record(result)
+            if store is not None:
+                store.add(result)
+            matched = alerts.check(result) if alerts is not None else None
+            if publisher is not None:
+                publisher.publish(result)
+            if matched:
+                logged.append(f'[bold red]Alert: {", ".join(matched)}')
+            styles.append(self.app.alert_style if matched else None)
+            address = f'{result.alias} ({result.address})' if result.alias else result.address
+            row = [result.current_time.strftime('%H:%M:%S'), address, result.trim_message or '']
+            if dedup is not None:
+                row.insert(2, '')
+            if many_sources:
+                row.insert(1, origin)
+            rows.append(row)
+        for source in {source for source, _ in lines}:
+            status.json_mode = source.parse_line.json_detected
+        if logged:
+            log.write('\n'.join(logged))
+        added = table.add_rows(rows, styles=styles)
+
+        for sighting, table_row in zip(sightings, added):
+            sighting.payload = table_row
+            if sighting.count > 1:
+                repeated[id(sighting)] = sighting
+        for sighting in repeated.values():
+            table_row = sighting.payload
+            table_row.cells = table_row.cells[:-2] + (f'×{sighting.count}',) + table_row.cells[-1:]
+            table.refresh_row(table_row)
+
+        spark.data = (spark.data + lengths)[-10:]
+
+        for source in {source for source, _ in lines}:
+            if source.port in self.waiting_timers:
+                self.waiting_timers[source.port].stop()
+            self.waiting_timers[source.port] = self.set_timer(
+                1, lambda port=source.port: self.app.update_source(port, receiver='[dark_green]waiting[/]'))
+
+        QUEUE_DEPTH.set(self.app.updates.pending)
+        FRAMES.add()
+        RENDER_TIME.observe(time.perf_counter() - start)
 
 
 class Pocsag(App):
-    def __init__(self, mmng_binary: str, port:int) -> None:
+    def __init__(self, mmng_binary: str, ports: Sequence[int], max_rows: int = 10_000, max_log_lines: int = 10_000,
+                 history_file: str | None = None, max_fps: float = 20, audio_buffer: int = 1 << 20,
+                 overflow: str = 'drop-oldest', store: MessageStore | None = None,
+                 capture: CaptureWriter | None = None, metrics_file: str | None = None,
+                 metrics_interval: float = 5, capcodes: CapcodeFilter | None = None,
+                 alerts: AlertEngine | None = None, alert_style: str = 'bold white on dark_red',
+                 dedup: Deduplicator | None = None, publisher: Publisher | None = None,
+                 silence_timeout: float = 0, probe_cache: str | None = None,
+                 demodulators: Sequence[str] = POCSAG_DEMODULATORS, adaptive: bool = False,
+                 learn_window: float = 300, reprobe_interval: float = 3600) -> None:
         self.mmng_binary = mmng_binary
-        self.port = port
+        self.ports = tuple(ports)
+        self.probe_cache = probe_cache
+        self.audio_buffer = audio_buffer
+        self.overflow = overflow
+        self.max_fps = max_fps
+        self.max_rows = max_rows
+        self.max_log_lines = max_log_lines
+        self.history_file = history_file
+        self.store = store
+        self.store_error: str | None = None
+        self.capture = capture
+        self.metrics_file = metrics_file
+        self.metrics_interval = metrics_interval
+        self.metrics_snapshot = None
+        self.capcodes = capcodes
+        self.alerts = alerts
+        self.alert_style = alert_style
+        self.dedup = dedup
+        self.publisher = publisher
+        self.silence_timeout = silence_timeout
+        self.demodulators = tuple(demodulators)
+        self.adaptive = adaptive
+        self.learn_window = learn_window
+        self.reprobe_interval = reprobe_interval
+        self.selectors: dict[int, DemodSelector] = {}
+        self.rates = RateStats()
+        self.sources = [DecodeSource(port, AudioBuffer(audio_buffer, overflow), capcodes) for port in self.ports]
+        for source in self.sources:
+            source.capture = capture
+        self.source_status = {port: SourceStatus() for port in self.ports}
+        self.supervisors: list[Supervisor] = []
+        self.updates: UpdateScheduler | None = None
+        # Until the main screen is mounted, output and log lines wait here
+        self.main_screen: MainScreen | None = None
+        self.backlog: list[tuple[DecodeSource, bytes]] = []
+        self.early_log: list[str] = []
         super().__init__()
 
     CSS_PATH = "pocsag.tcss"
@@ -304,29 +474,149 @@ class Pocsag(App):
             key_display="?",
         ),
         Binding(key='c', action='clear_screen', description='Clear all panes'),
+        Binding(key='slash', action='search', description='Search history', key_display='/'),
+        Binding(key='p', action='toggle_perf', description='Performance'),
+        Binding(key='g', action='cycle_graph', description='Graph scale'),
     ]
 
-    message_count = []
+    async def on_load(self) -> None:
+        """Start decoding before the UI is built, so no audio is missed while it is; output waits for the screen."""
+        loop = asyncio.get_running_loop()
+        self.updates = UpdateScheduler(self.render_output, max_fps=self.max_fps)
+
+        # Find multimon-ng's version and JSON support, from the cache unless it has changed
+        version, json_capable = await probe_multimon(self.mmng_binary, self.probe_cache)
+        self.write_log(f'multimon-ng version: {version}')
+        self.write_log(f'JSON capable: {json_capable}')
+        if json_capable:
+            self.write_log(f'JSON decoder: {json_backend()[0]}')
+
+        if self.publisher is not None:
+            try:
+                await self.publisher.start()
+            except OSError as error:
+                self.write_log(f'[red]Cannot publish messages: {error}')
+
+        args = multimon_args(json_capable, self.demodulators)
+        for source in self.sources:
+            await source.listen(lambda source: UDPHandler(source, self, loop))
+            self.run_worker(source.protocol.idle_task(), group='status')
+            prefix = f'multimon-ng {source.name}: ' if len(self.sources) > 1 else 'multimon-ng: '
+            supervisor = Supervisor(source, self.mmng_binary, args,
+                                    lambda text, prefix=prefix: self.write_log(f'[red]{prefix}{text}'),
+                                    silence_timeout=self.silence_timeout)
+            self.supervisors.append(supervisor)
+            self.decode(supervisor)
+            if self.adaptive and len(self.demodulators) > 1:
+                selector = self.selectors[source.port] = DemodSelector(
+                    supervisor, self.demodulators, json_capable, self.learn_window, self.reprobe_interval)
+                self.run_worker(selector.run(), group='selectors')
+
+    @work(group='decoders')
+    async def decode(self, supervisor: Supervisor) -> None:
+        """Stream output from a source's multimon-ng into the update scheduler, restarting it if it exits or hangs."""
+        source = supervisor.source
+        async for records in supervisor.records():
+            self.update_source(source.port, receiver='[blink bold bright_green]receiving[/]')
+            for record in records:
+                self.updates.add((source, record))
+            QUEUE_DEPTH.set(self.updates.pending)
+
+    def render_output(self, lines: list[tuple[DecodeSource, bytes]]) -> None:
+        if self.main_screen is None:
+            self.backlog.extend(lines)
+        else:
+            self.main_screen.render_output(lines)
+
+    def write_log(self, text: str) -> None:
+        if self.main_screen is None:
+            self.early_log.append(text)
+        else:
+            self.main_screen.query_one('#log').write(text)
+
+    def update_source(self, port: int, **changes) -> None:
+        status = self.source_status[port]
+        for name, value in changes.items():
+            setattr(status, name, value)
+        if self.main_screen is not None:
+            self.main_screen.query_one(StatusWidget).refresh()
+
+    def update_decoders(self) -> None:
+        for supervisor in self.supervisors:
+            decoder = '[dark_green]running[/]' if supervisor.running else '[red]restarting[/]'
+            if supervisor.restarts:
+                decoder += f', {supervisor.restarts} restarts, down {supervisor.downtime:.1f}s'
+            self.update_source(supervisor.source.port, decoder=decoder)
+        for port, selector in self.selectors.items():
+            self.update_source(port, demodulators=selector.describe())
+        if self.store is not None and self.store.error != self.store_error:
+            self.store_error = self.store.error
+            self.write_log(f'[red]Messages not stored: {self.store_error}')
 
     def on_mount(self):
         self.push_screen(MainScreen())
+        self.set_interval(1, self.update_decoders)
+        if self.metrics_file:
+            self.set_interval(self.metrics_interval, self.export_metrics)
+        if self.capcodes is not None or self.alerts is not None:
+            self.set_interval(2, self.reload_configs)
+
+    async def on_unmount(self) -> None:
+        if self.updates is not None:
+            # Whatever arrived since the last frame still goes to the store, alerts and subscribers
+            self.updates.close()
+        if self.publisher is not None:
+            await self.publisher.close()
+
+    def reload_configs(self) -> None:
+        for config, name in ((self.capcodes, 'capcode filters'), (self.alerts, 'alert rules')):
+            if config is None or not config.path:
+                continue
+            try:
+                if config.reload():
+                    self.write_log(f'Reloaded {name} from {config.path}')
+            except (FilterConfigError, AlertConfigError) as error:
+                self.write_log(f'[red]{name.capitalize()} not reloaded: {error}')
+
+    def export_metrics(self) -> None:
+        self.metrics_snapshot = METRICS.snapshot(self.metrics_snapshot)
+        write_snapshot(self.metrics_file, self.metrics_snapshot)
+
+    # Bindings can fire while a modal is on top, so these act on the main screen rather than self.screen
+    def action_toggle_perf(self) -> None:
+        if self.main_screen is None:
+            return
+        perf = self.main_screen.query_one(PerfWidget)
+        perf.display = not perf.display
+        self.main_screen.query_one('#status-container').set_class(perf.display, 'perf')
+        if perf.display:
+            perf.update_metrics()
 
     def action_clear_screen(self) -> None:
-        self.screen.query_one(DataTable).clear()
-        self.screen.query_one('#log').clear()
-
-
-
-@click.command()
-@click.option('--mmng-binary', '-m', required=False, default='multimon-ng', help='Path to multimon-ng binary')
-@click.option('--port', '-p', required=False, type=int, default=8888, help='Port to listen on')
-@click.version_option(version=__version__)
-def main(mmng_binary, port):
-    if not shutil.which(mmng_binary):
-        click.echo('multimon-ng binary not found!', err=True)
-        sys.exit(1)
-
-    Pocsag(mmng_binary, port).run()
+        if self.main_screen is None:
+            return
+        self.main_screen.query_one(MessageTable).clear()
+        self.main_screen.query_one('#log').clear()
+        if self.dedup is not None:
+            self.dedup.clear()
+        self.rates.clear()
+        self.main_screen.query_one(RateGraph).update_graph()
+
+    def action_cycle_graph(self) -> None:
+        if self.main_screen is None:
+            return
+        resolution = self.main_screen.query_one(RateGraph).cycle()
+        self.notify(f'Graph shows messages per {resolution}')
+
+    def action_search(self) -> None:
+        if self.store is None:
+            self.notify('Message store is disabled', severity='warning')
+        elif not isinstance(self.screen, SearchScreen):
+            self.push_screen(SearchScreen())
+
+
+# The console script was mmng_ui.pocsag:main before the command line moved out, so keep it working for old installs
+from mmng_ui.cli import main  # noqa: E402
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,372 @@
+"""Publish decoded messages as JSON Lines to other programs, over TCP, a UNIX socket, UDP or HTTP."""
+from __future__ import annotations
+
+import asyncio
+from abc import ABC, abstractmethod
+import urllib.parse
+from collections import deque
+from typing import Iterable
+
+from mmng_ui.decoder import OVERFLOW_POLICIES
+from mmng_ui.metrics import METRICS
+from mmng_ui.reader import PocsagMessage
+
+PUBLISHED = METRICS.counter('published')
+
+
+class Outbox:
+    """
+    A bounded queue of encoded messages for one subscriber, emptied in batches.
+
+    When the subscriber falls behind and the queue is full, messages are dropped according to ``overflow`` rather
+    than holding up decoding: ``drop-oldest`` discards the oldest queued message, ``drop-newest`` the incoming one.
+
+    :param capacity: most messages to queue
+    :type capacity: int
+    :param overflow: ``drop-oldest`` or ``drop-newest``
+    :type overflow: str
+    """
+
+    def __init__(self, capacity: int = 1000, overflow: str = 'drop-oldest') -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'Unknown overflow policy: {overflow}')
+        self.capacity = capacity
+        self.overflow = overflow
+        self.dropped = 0
+        self._lines: deque[bytes] = deque()
+        self._ready: asyncio.Event | None = None
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def put(self, line: bytes) -> bool:
+        """Queue ``line``, returning whether a message had to be dropped."""
+        if len(self._lines) >= self.capacity:
+            self.dropped += 1
+            if self.overflow == 'drop-newest':
+                return True
+            self._lines.popleft()
+            self._lines.append(line)
+            return True
+        self._lines.append(line)
+        if self._ready is not None:
+            self._ready.set()
+        return False
+
+    async def get_batch(self, max_bytes: int) -> list[bytes]:
+        """Wait for messages, then take as many as fit in ``max_bytes``, and always at least one."""
+        if self._ready is None:
+            self._ready = asyncio.Event()
+        while not self._lines:
+            self._ready.clear()
+            await self._ready.wait()
+        lines = self._lines
+        batch = [lines.popleft()]
+        size = len(batch[0])
+        while lines and size + len(lines[0]) <= max_bytes:
+            size += len(lines[0])
+            batch.append(lines.popleft())
+        return batch
+
+
+class Output(ABC):
+    """
+    Somewhere messages are published to.
+
+    Subclasses queue each line in one or more :class:`Outbox` es and send from them in a task of their own, calling
+    :meth:`sent` for what got through.  :attr:`stats` has the totals, and the pipeline metrics carry each output's
+    message and drop counts, so throughput shows up as a rate.
+
+    :param name: how the output appears in stats and metrics
+    :type name: str
+    :param capacity: most messages to queue for each subscriber
+    :type capacity: int
+    :param overflow: which message each queue drops when full
+    :type overflow: str
+    :param max_batch: most bytes to send at once
+    :type max_batch: int
+    """
+
+    def __init__(self, name: str, capacity: int = 1000, overflow: str = 'drop-oldest',
+                 max_batch: int = 1 << 16) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'Unknown overflow policy: {overflow}')
+        self.name = name
+        self.capacity = capacity
+        self.overflow = overflow
+        self.max_batch = max_batch
+        self.messages = 0
+        self.bytes = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failed = 0
+        self._messages = METRICS.counter(f'published {name}')
+        self._dropped = METRICS.counter(f'publish drops {name}')
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {'messages': self.messages, 'bytes': self.bytes, 'batches': self.batches, 'dropped': self.dropped,
+                'failed': self.failed}
+
+    def sent(self, batch: list[bytes]) -> None:
+        self.messages += len(batch)
+        self.bytes += sum(map(len, batch))
+        self.batches += 1
+        self._messages.add(len(batch))
+
+    def drop(self, count: int = 1) -> None:
+        self.dropped += count
+        self._dropped.add(count)
+
+    @abstractmethod
+    def publish(self, line: bytes) -> None:
+        """Queue ``line``, a JSON-encoded message ending in a newline, to be sent."""
+
+    @abstractmethod
+    async def start(self) -> None:
+        """Start listening or sending."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Send what is queued, as far as possible, then stop."""
+
+
+class StreamServerOutput(Output):
+    """
+    A TCP or UNIX socket server sending every message to every connected client.
+
+    Each client has its own :class:`Outbox` and writer task, so one that reads slowly loses messages without holding
+    up the others.
+
+    :param host: address to listen on, for TCP
+    :type host: str
+    :param port: port to listen on, for TCP
+    :type port: int
+    :param path: socket to listen on, for a UNIX socket
+    :type path: str
+    """
+
+    def __init__(self, name: str, host: str | None = None, port: int | None = None, path: str | None = None,
+                 **kwargs) -> None:
+        super().__init__(name, **kwargs)
+        self.host = host
+        self.port = port
+        self.path = path
+        self.server: asyncio.AbstractServer | None = None
+        self._clients: dict[asyncio.StreamWriter, Outbox] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {**super().stats, 'subscribers': len(self._clients)}
+
+    async def start(self) -> None:
+        if self.path is not None:
+            self.server = await asyncio.start_unix_server(self._serve, self.path)
+        else:
+            self.server = await asyncio.start_server(self._serve, self.host, self.port)
+            if not self.port:
+                self.port = self.server.sockets[0].getsockname()[1]
+
+    def publish(self, line: bytes) -> None:
+        for outbox in self._clients.values():
+            if outbox.put(line):
+                self.drop()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        outbox = self._clients[writer] = Outbox(self.capacity, self.overflow)
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            while True:
+                batch = await outbox.get_batch(self.max_batch)
+                writer.write(b''.join(batch))
+                await writer.drain()
+                self.sent(batch)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            del self._clients[writer]
+            self._tasks.discard(task)
+            writer.close()
+
+    async def close(self) -> None:
+        if self.server is None:
+            return
+        self.server.close()
+        for task in list(self._tasks):
+            task.cancel()
+        await self.server.wait_closed()
+
+
+class UDPOutput(Output):
+    """
+    Send messages to a UDP address, packing as many whole lines into each datagram as fit in ``max_batch`` bytes.
+
+    :param host: where to send
+    :type host: str
+    :param port: port to send to
+    :type port: int
+    """
+
+    def __init__(self, name: str, host: str, port: int, max_batch: int = 1400, **kwargs) -> None:
+        super().__init__(name, max_batch=max_batch, **kwargs)
+        self.host = host
+        self.port = port
+        self.transport: asyncio.DatagramTransport | None = None
+        self._outbox = Outbox(self.capacity, self.overflow)
+        self._sender: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol,
+                                                                remote_addr=(self.host, self.port))
+        self._sender = loop.create_task(self._send_all())
+
+    def publish(self, line: bytes) -> None:
+        if self._outbox.put(line):
+            self.drop()
+
+    async def _send_all(self) -> None:
+        while True:
+            batch = await self._outbox.get_batch(self.max_batch)
+            try:
+                self.transport.sendto(b''.join(batch))
+            except OSError:
+                self.failed += 1
+                continue
+            self.sent(batch)
+            # Let more lines queue up behind this datagram rather than sending each the moment it arrives
+            await asyncio.sleep(0)
+
+    async def close(self) -> None:
+        if self._sender is not None:
+            self._sender.cancel()
+        if self.transport is not None:
+            self.transport.close()
+
+
+class HTTPOutput(Output):
+    """
+    POST messages to a URL as JSON Lines, as many per request as have queued up while the previous one was sent.
+
+    Requests are made on a worker thread, one at a time, so a slow or absent server only fills the queue.
+
+    :param url: where to POST
+    :type url: str
+    :param timeout: seconds to wait for each request
+    :type timeout: float
+    """
+
+    def __init__(self, name: str, url: str, timeout: float = 5, **kwargs) -> None:
+        super().__init__(name, **kwargs)
+        self.url = url
+        self.timeout = timeout
+        self._outbox = Outbox(self.capacity, self.overflow)
+        self._sender: asyncio.Task | None = None
+        self._posting = False
+
+    async def start(self) -> None:
+        self._sender = asyncio.get_running_loop().create_task(self._send_all())
+
+    def publish(self, line: bytes) -> None:
+        if self._outbox.put(line):
+            self.drop()
+
+    def _post(self, body: bytes) -> None:
+        import urllib.request
+
+        request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/x-ndjson'})
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+    async def _send_all(self) -> None:
+        while True:
+            batch = await self._outbox.get_batch(self.max_batch)
+            self._posting = True
+            try:
+                await asyncio.to_thread(self._post, b''.join(batch))
+            except Exception:
+                # Not only OSError: a bad URL or a garbled response must not stop every batch after it
+                self.failed += 1
+                continue
+            finally:
+                self._posting = False
+            self.sent(batch)
+
+    async def close(self) -> None:
+        """Send whatever is queued, giving up after ``timeout``, then stop."""
+        if self._sender is None:
+            return
+        try:
+            await asyncio.wait_for(self._drain(), self.timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._sender.cancel()
+
+    async def _drain(self) -> None:
+        while len(self._outbox) or self._posting:
+            await asyncio.sleep(0.01)
+
+
+def make_output(spec: str, capacity: int = 1000, overflow: str = 'drop-oldest') -> Output:
+    """
+    Build an output from its command line form: ``tcp://HOST:PORT`` or ``unix:PATH`` to serve subscribers,
+    ``udp://HOST:PORT`` to send datagrams to, or an ``http://`` or ``https://`` URL to POST to.
+
+    :param spec: the output
+    :type spec: str
+    :param capacity: most messages to queue for each subscriber
+    :type capacity: int
+    :param overflow: which message each queue drops when full
+    :type overflow: str
+    :return: the output, not yet started
+    :rtype: Output
+    """
+    options = {'capacity': capacity, 'overflow': overflow}
+    if spec.startswith('unix:'):
+        return StreamServerOutput(spec, path=spec[5:], **options)
+    if spec.startswith(('http://', 'https://')):
+        return HTTPOutput(spec, spec, **options)
+    url = urllib.parse.urlsplit(spec)
+    if url.scheme in ('tcp', 'udp'):
+        try:
+            port = url.port
+        except ValueError:
+            port = None
+        if port is None or not url.hostname:
+            raise ValueError(f'{spec}: expected {url.scheme}://HOST:PORT')
+        if url.scheme == 'tcp':
+            return StreamServerOutput(spec, host=url.hostname, port=port, **options)
+        return UDPOutput(spec, url.hostname, port, **options)
+    raise ValueError(f'Unknown output: {spec}')
+
+
+class Publisher:
+    """
+    Send every message to each of ``outputs``, encoded to JSON once however many there are.
+
+    :param outputs: where to publish to
+    :type outputs: Iterable[Output]
+    """
+
+    def __init__(self, outputs: Iterable[Output]) -> None:
+        self.outputs = list(outputs)
+
+    async def start(self) -> None:
+        for output in self.outputs:
+            await output.start()
+
+    def publish(self, message: PocsagMessage) -> None:
+        line = (message.to_json() + '\n').encode()
+        for output in self.outputs:
+            output.publish(line)
+        PUBLISHED.add()
+
+    async def close(self) -> None:
+        for output in self.outputs:
+            await output.close()
+
+    @property
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {output.name: output.stats for output in self.outputs}
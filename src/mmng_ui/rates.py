@@ -0,0 +1,151 @@
+"""Message rates over several time scales, and the busiest capcodes, at a constant cost per message."""
+from __future__ import annotations
+
+import heapq
+import time
+from operator import itemgetter
+from typing import Callable, Hashable
+
+from mmng_ui.reader import PocsagMessage
+
+# Name, seconds per bucket, buckets kept: a minute of seconds, an hour of minutes, a day of hours, a month of days
+RESOLUTIONS = (
+    ('second', 1, 60),
+    ('minute', 60, 60),
+    ('hour', 3600, 24),
+    ('day', 86400, 30),
+)
+
+
+class RateSeries:
+    """
+    Counts per fixed-length time bucket, in a ring of the last ``length`` buckets.
+
+    Adding is an index and an increment; buckets that went by with nothing in them are zeroed as time moves on, each
+    once, so the cost stays constant however the messages are spread out.
+
+    :param resolution: seconds per bucket
+    :type resolution: float
+    :param length: buckets to keep
+    :type length: int
+    :param now: the current time, in the clock's seconds
+    :type now: float
+    """
+
+    __slots__ = ('resolution', 'counts', 'bucket')
+
+    def __init__(self, resolution: float, length: int, now: float) -> None:
+        self.resolution = resolution
+        self.counts = [0] * length
+        self.bucket = int(now // resolution)
+
+    def _advance(self, now: float) -> int:
+        """Move the ring on to the bucket for ``now``, clearing any skipped, and return its index."""
+        bucket = int(now // self.resolution)
+        counts = self.counts
+        length = len(counts)
+        if bucket > self.bucket:
+            if bucket - self.bucket >= length:
+                counts[:] = [0] * length
+            else:
+                for skipped in range(self.bucket + 1, bucket + 1):
+                    counts[skipped % length] = 0
+            self.bucket = bucket
+        return self.bucket % length
+
+    def add(self, now: float, count: int = 1) -> None:
+        self.counts[self._advance(now)] += count
+
+    def values(self, now: float) -> list[int]:
+        """Every bucket's count, oldest first, ending with the one for ``now``."""
+        newest = self._advance(now) + 1
+        return self.counts[newest:] + self.counts[:newest]
+
+
+class HeavyHitters:
+    """
+    The most frequent keys in a stream, tracked in at most ``capacity`` counters (the Misra-Gries summary).
+
+    A new key takes a free counter; when there is none, every counter is decremented instead and those reaching zero
+    are freed.  Each decrement round is paid for by the additions before it, so adding costs O(1) on average.  Any key
+    seen more than ``total / (capacity + 1)`` times is guaranteed to be held, and a held key's count is low by at most
+    :attr:`error`.
+
+    :param capacity: most keys to count
+    :type capacity: int
+    """
+
+    def __init__(self, capacity: int = 100) -> None:
+        self.capacity = capacity
+        self.total = 0
+        self.error = 0
+        self._counts: dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def add(self, key: Hashable) -> None:
+        self.total += 1
+        counts = self._counts
+        if key in counts:
+            counts[key] += 1
+        elif len(counts) < self.capacity:
+            counts[key] = 1
+        else:
+            self.error += 1
+            self._counts = {key: count - 1 for key, count in counts.items() if count > 1}
+
+    def top(self, n: int = 10) -> list[tuple[Hashable, int]]:
+        """The ``n`` keys with the highest counts, highest first, with their counts."""
+        return heapq.nlargest(n, self._counts.items(), key=itemgetter(1))
+
+    def clear(self) -> None:
+        self.total = 0
+        self.error = 0
+        self._counts = {}
+
+
+class RateStats:
+    """
+    Decoded messages per second, minute, hour and day, and the busiest capcodes.
+
+    :meth:`record` is called once per message and costs the same however long the history, so the graphs read from
+    :meth:`series` whenever they redraw rather than being fed each message.
+
+    :param top: most capcodes to keep counts for
+    :type top: int
+    """
+
+    def __init__(self, top: int = 100, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        now = clock()
+        self.resolutions = {name: RateSeries(resolution, length, now) for name, resolution, length in RESOLUTIONS}
+        self.capcodes = HeavyHitters(top)
+        self._all = tuple(self.resolutions.values())
+
+    def record(self, message: PocsagMessage) -> None:
+        """Count ``message``, unless it is a line multimon-ng wrote that wasn't a page."""
+        if not message.address:
+            return
+        now = self.clock()
+        for series in self._all:
+            series.add(now)
+        self.capcodes.add(message.address)
+
+    def series(self, name: str) -> list[int]:
+        """Messages in each ``second``, ``minute``, ``hour`` or ``day`` bucket, oldest first."""
+        return self.resolutions[name].values(self.clock())
+
+    def busiest(self, n: int = 10) -> list[tuple[str, int]]:
+        return self.capcodes.top(n)
+
+    def clear(self) -> None:
+        now = self.clock()
+        for series in self._all:
+            series.counts[:] = [0] * len(series.counts)
+            series.bucket = int(now // series.resolution)
+        self.capcodes.clear()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {'messages': self.capcodes.total, 'capcodes': len(self.capcodes), 'error': self.capcodes.error}
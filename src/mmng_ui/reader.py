@@ -2,22 +2,217 @@ from __future__ import annotations
 
 import json
 import re
+import sys
+import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from json import JSONDecodeError
-from typing import Any
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Hashable, Iterable, Iterator
 
-import moment
-from moment import Moment
+from mmng_ui.filters import CapcodeFilter
+from mmng_ui.jsondecode import MultimonRecord, decode_record
+from mmng_ui.metrics import METRICS
 
-frag = {}
+MONTHS = {
+    name: number for number, name in enumerate(
+        ('January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November',
+         'December'), start=1)
+}
+
+# Fast path: the layout multimon-ng emits for POCSAG, optionally prefixed by ``--timestamp``.  Everything is pulled out
+# in a single match; lines that don't fit fall back to the field-by-field patterns below.
+POCSAG_LINE = re.compile(
+    r'(?:(?P<timestamp>\d+-\d+-\d+ \d{2}:\d{2}:\d{2}|\d{2} \w+ \d{4} \d{2}:\d{2}:\d{2}): )?'
+    r'(?P<demod>POCSAG\d+): Address:(?P<address>.*?)Function: (?P<function>\d)\s*'
+    r'(?:(?P<kind>Alpha|Numeric):(?P<body>.*))?'
+)
+# The same layout over the raw bytes multimon-ng writes, so a record can be matched before anything is decoded
+POCSAG_RECORD = re.compile(POCSAG_LINE.pattern.encode())
+
+POCSAG_DETECT = re.compile(r'(POCSAG\d+): Address:')
+POCSAG_ADDRESS = re.compile(r'POCSAG\d+: Address:(.*?)Function')
+POCSAG_FUNCTION = re.compile(r'Function: (\d)')
+POCSAG_ALPHA = re.compile(r'Alpha:(.*?)$')
+POCSAG_NUMERIC = re.compile(r'Numeric:(.*?)$')
+
+FLEX_DETECT = re.compile(r'FLEX[:|]')
+FLEX_ADDRESS = re.compile(r'FLEX[:|] ?.*?[\[|](\d*?)[\]| ]')
+FLEX_TIMESTAMP = re.compile(r'FLEX[:|] ?(\d{2} \w+ \d{4} \d{2}:\d{2}:\d{2}|\d+-\d+-\d+ \d{2}:\d{2}:\d{2})')
+FLEX_TYPE = re.compile(r'[ |](?:ALN|GPN|NUM)[ |]')
+FLEX_MESSAGE = re.compile(r'FLEX[:|].*[|\[][0-9 ]*[|\]] ?...[ |](.+)')
+FLEX_FRAGMENT = re.compile(r'[ |]([0-9]{4}/[0-9])/([FC])/(.)[ |]')
+
+LONG_TIMESTAMP = re.compile(r'\d+ \w+ \d+ \d{2}:\d{2}:\d{2}')
+LONG_TIMESTAMP_DETECT = re.compile(r'\d{2} \w+ \d{4} \d{2}:\d{2}:\d{2}')
+ISO_TIMESTAMP = re.compile(r'\d+-\d+-\d+ \d{2}:\d{2}:\d{2}')
+
+CONTROL_SEQUENCE = re.compile(r'<[A-Za-z]{3}>')
+UMLAUTS = {'Ä': '[', 'Ü': ']'}
+
+PARSE_TIME = METRICS.histogram('parse')
+FRAGMENTS_EXPIRED = METRICS.counter('fragments expired')
+FRAGMENTS_EVICTED = METRICS.counter('fragments evicted')
+
+
+def clean_message(message: str) -> str:
+    """Strip multimon-ng control sequences such as ``<NUL>`` and map the German umlauts back to brackets."""
+    # Most messages have neither, and a containment test is far cheaper than a substitution that finds nothing
+    if '<' in message:
+        message = CONTROL_SEQUENCE.sub('', message)
+    for umlaut, bracket in UMLAUTS.items():
+        if umlaut in message:
+            message = message.replace(umlaut, bracket)
+    return message.strip()
+
+
+@lru_cache(maxsize=128)
+def decode_timestamp(time_string: str) -> datetime | None:
+    """
+    Decode either of the two timestamp formats multimon-ng can emit.
+
+    multimon-ng stamps at one-second resolution, so a burst of messages shares the same string and is decoded once.
+
+    :param time_string: ``YYYY-MM-DD HH:MM:SS`` or ``DD Month YYYY HH:MM:SS``
+    :type time_string: str
+    :return: the decoded timestamp, or None if it isn't a valid date
+    :rtype: datetime
+    """
+    try:
+        date, time = time_string.rsplit(' ', 1)
+        hour, minute, second = time.split(':')
+        if '-' in date:
+            year, month, day = date.split('-')
+            return datetime(int(year), int(month), int(day), int(hour), int(minute), int(second))
+        day, month_name, year = date.split(' ')
+        month = MONTHS.get(month_name)
+        if month is None:
+            return datetime.strptime(time_string, '%d %B %Y %H:%M:%S')
+        return datetime(int(year), month, int(day), int(hour), int(minute), int(second))
+    except ValueError:
+        return None
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    """Yield the stripped, non-empty lines of ``text`` without building an intermediate list."""
+    start = 0
+    find = text.find
+    while True:
+        end = find('\n', start)
+        if end == -1:
+            line = text[start:].strip()
+            if line:
+                yield line
+            return
+        line = text[start:end].strip()
+        if line:
+            yield line
+        start = end + 1
+
+
+class FragmentStore:
+    """
+    Pending FLEX message fragments, waiting for their continuation.
+
+    Entries expire ``ttl`` seconds after their last fragment, and beyond ``max_entries`` the least recently updated is
+    evicted, so a lost completion frame can't leak.  Expiry is checked on every access, oldest first, so it costs
+    nothing while there is nothing to expire.  Both are counted here and in :data:`~mmng_ui.metrics.METRICS`.
+
+    :param max_entries: most messages to hold fragments for
+    :type max_entries: int
+    :param ttl: seconds to wait for the next fragment of a message
+    :type ttl: float
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.expired = 0
+        self.evicted = 0
+        self._entries: OrderedDict[Hashable, tuple[float, str]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        self._expire()
+        return key in self._entries
+
+    def add(self, key: Hashable, text: str) -> None:
+        """Append a fragment to the message at ``key``."""
+        self._expire()
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            text = entry[1] + text
+        self._entries[key] = (self.clock() + self.ttl, text)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+            FRAGMENTS_EVICTED.add()
+
+    def pop(self, key: Hashable) -> str:
+        """Remove and return the fragments held for ``key``, or an empty string if there are none."""
+        self._expire()
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry is not None else ''
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _expire(self) -> None:
+        now = self.clock()
+        entries = self._entries
+        while entries:
+            key, (deadline, _) = next(iter(entries.items()))
+            if deadline > now:
+                break
+            del entries[key]
+            self.expired += 1
+            FRAGMENTS_EXPIRED.add()
+
+    @property
+    def memory(self) -> int:
+        """Approximate bytes held by pending fragments and their keys."""
+        total = sys.getsizeof(self._entries)
+        for key, (_, text) in self._entries.items():
+            total += sys.getsizeof(key) + sys.getsizeof(text)
+        return total
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {'pending': len(self._entries), 'expired': self.expired, 'evicted': self.evicted,
+                'memory': self.memory}
 
 
 @dataclass
 class PocsagMessage:
-    current_time: Moment = field(default_factory=moment.now)
-    timestamp: Moment = None
+    current_time: datetime = field(default_factory=datetime.now)
+    timestamp: datetime | None = None
     address: str = None
     trim_message: str = None
+    port: int | None = None
+    peer: str | None = None
+    alias: str | None = None
+    function: int | None = None
+    demod_name: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """The message as JSON-friendly types, with times in ISO 8601."""
+        return {
+            'current_time': self.current_time.isoformat(),
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None,
+            'address': self.address,
+            'message': self.trim_message,
+            'port': self.port,
+            'peer': self.peer,
+            'alias': self.alias,
+            'function': self.function,
+            'demod_name': self.demod_name,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False)
 
 
 @dataclass
@@ -30,143 +225,281 @@ class ParseLine:
     :param send_function_code: Not entirely sure!
     :type send_function_code: bool
     :param use_timestamp: Attempt to decode and return timestamps
-    :type use_timestamp: Moment
-    :return: tuple of current time, timestamp, pager address and message
+    :type use_timestamp: bool
+    :param fragments: Where FLEX fragments wait for their continuation
+    :type fragments: FragmentStore
+    :param capcodes: Which capcodes to keep, and their aliases; others are dropped as soon as their address is read
+    :type capcodes: CapcodeFilter
+    :return: tuple of current time, timestamp, pager address and message, or None for a message that was filtered out
     :rtype: tuple
     """
     send_function_code: bool = True
     use_timestamp: bool = True
     json_detected: bool | None = None
+    fragments: FragmentStore = field(default_factory=FragmentStore, repr=False, compare=False)
+    capcodes: CapcodeFilter | None = field(default=None, repr=False, compare=False)
 
-    def parse(self, line: str) -> tuple[PocsagMessage, bool]:
-        result = PocsagMessage()
-        message: str | None = None
-        trim_message: str | None = None
-        time_string: str | None = None
-        json_line: Any | None = None
-        timestamp: Moment = None
+    def parse(self, line: str) -> tuple[PocsagMessage | None, bool]:
+        start = time.perf_counter()
+        record: MultimonRecord | None = None
 
         if self.json_detected is None:
             try:
-                json_line = json.loads(line)
+                record = decode_record(line)
                 self.json_detected = True
-            except json.JSONDecodeError:
+            except ValueError:
                 self.json_detected = False
 
         if self.json_detected:
-            if not json_line:
-                try:
-                    json_line = json.loads(line)
-                except JSONDecodeError:
-                    result.trim_message = f'ERROR: multimon-ng returned non-JSON: {line}'
-                    result.address = ''
-                    return result, self.json_detected
-            result.trim_message = re.sub(r'<[A-Za-z]{3}>', '', json_line.get('alpha', '')).replace('Ä', '[').replace('Ü', ']').strip() or ''
-            result.address = str(json_line['address']) or ''
-
-            return result, self.json_detected
+            result = self._parse_json(line, record)
+        else:
+            result = self._parse_text(line)
+        PARSE_TIME.observe(time.perf_counter() - start)
+        return result, self.json_detected
+
+    def parse_many(self, lines: Iterable[str | bytes] | bytes | bytearray | memoryview) -> Iterator[PocsagMessage]:
+        """
+        Parse a batch of multimon-ng lines, such as a replayed capture log or a burst drained from stdout.
 
+        A bytes-like buffer is decoded once and split in place; an iterable may yield ``str`` or ``bytes`` lines.  Blank
+        lines, and messages filtered out by ``capcodes``, are skipped.  JSON or text mode is settled on the first line,
+        and the rest of the batch runs through that branch alone.
+
+        :param lines: newline-separated records, or an iterable of lines
+        :type lines: Iterable[str | bytes] | bytes
+        :return: one message per non-blank line that isn't filtered out
+        :rtype: Iterator[PocsagMessage]
+        """
+        if isinstance(lines, (bytes, bytearray, memoryview)):
+            lines = iter_lines(str(lines, 'utf-8', 'replace'))
         else:
-            # POCSAG handling
-            if re.search(r'POCSAG\d+: Address:', line):
-                address_match = re.search(r'POCSAG\d+: Address:(.*?)Function', line)
-                if address_match:
-                    address = address_match.group(1).strip()
-                    if self.send_function_code:
-                        function_code_match = re.search(r'Function: (\d)', line)
-                        if function_code_match:
-                            address += function_code_match.group(1)
-
-                # Handling Alpha messages
-                if 'Alpha:' in line:
-                    message_match = re.search(r'Alpha:(.*?)$', line)
-                    if message_match:
-                        message = message_match.group(1).strip()
-
-                        if self.use_timestamp:
-                            # Handle date formats like 'DD MMM YYYY HH:mm:ss'
-                            if re.search(r'\d{2} \w+ \d{4} \d{2}:\d{2}:\d{2}', line):
-                                time_string_match = re.search(r'\d+ \w+ \d+ \d{2}:\d{2}:\d{2}', line)
-                                if time_string_match:
-                                    time_string = time_string_match.group()
-                                    try:
-                                        timestamp = moment.date(time_string, '%d %B %Y %H:%M:%S')
-                                        message = message.replace(time_string, '').strip()
-                                    except ValueError:
-                                        raise
-                                        # pass
-
-                            # Handle date formats like 'YYYY-MM-DD HH:mm:ss'
-                            elif re.search(r'\d+-\d+-\d+ \d{2}:\d{2}:\d{2}', line):
-                                time_string_match = re.search(r'\d+-\d+-\d+ \d{2}:\d{2}:\d{2}', line)
-                                if time_string_match:
-                                    time_string = time_string_match.group()
-                                    try:
-                                        timestamp = moment.date(time_string, 'YYYY-MM-DD HH:mm:ss')
-                                        message = message.replace(time_string, '').strip()
-                                    except ValueError:
-                                        raise
-                                        # pass
-
-                        # Clean the message
-                        trim_message = re.sub(r'<[A-Za-z]{3}>', '', message).replace('Ä', '[').replace('Ü', ']').strip()
-
-                # Handling Numeric messages
-                elif 'Numeric:' in line:
-                    message_match = re.search(r'Numeric:(.*?)$', line)
-                    if message_match:
-                        message = message_match.group(1).strip()
-                        trim_message = re.sub(r'<[A-Za-z]{3}>', '', message).replace('Ä', '[').replace('Ü', ']').strip()
-
-            # FLEX handling
-            elif re.search(r'FLEX[:|]', line):
-                address_match = re.search(r'FLEX[:|] ?.*?[\[|](\d*?)[\]| ]', line)
-                if address_match:
-                    address = address_match.group(1).trim()
-
-                # Handle timestamps within FLEX
+            lines = (line.decode('utf-8', 'replace').strip() if isinstance(line, bytes) else line.strip()
+                     for line in lines)
+            lines = filter(None, lines)
+
+        first = next(lines, None)
+        if first is None:
+            return
+        result, json_detected = self.parse(first)
+        if result is not None:
+            yield result
+
+        if json_detected:
+            parse = self._parse_json
+            arguments = (None,)
+        else:
+            parse = self._parse_text
+            arguments = ()
+        # Time the batch as a whole, leaving out whatever the caller does between lines
+        perf_counter = time.perf_counter
+        elapsed = 0.0
+        count = 0
+        try:
+            for line in lines:
+                start = perf_counter()
+                result = parse(line, *arguments)
+                elapsed += perf_counter() - start
+                count += 1
+                if result is not None:
+                    yield result
+        finally:
+            if count:
+                PARSE_TIME.observe(elapsed / count, count)
+
+    def parse_record(self, record: bytes) -> PocsagMessage | None:
+        """
+        Parse one line of multimon-ng output as the bytes read from its stdout, without a trailing newline.
+
+        Once text mode is settled, a POCSAG record in the usual layout is matched as bytes: the filter sees the address
+        before anything is decoded, and only the message body becomes a ``str``.  In JSON mode the bytes go straight
+        to the JSON decoder.  Anything else, including the first record, is decoded whole and goes through
+        :meth:`parse`.
+
+        :param record: the line, as split from a chunk of stdout by :func:`mmng_ui.decoder.read_records`
+        :type record: bytes
+        :return: the message, or None if it is blank or was filtered out
+        :rtype: PocsagMessage
+        """
+        if self.json_detected is False:
+            start = time.perf_counter()
+            match = POCSAG_RECORD.fullmatch(record)
+            if match:
+                result = self._parse_pocsag_record(match)
+                PARSE_TIME.observe(time.perf_counter() - start)
+                return result
+        elif self.json_detected:
+            # isspace() is False for anything else at the first character that isn't whitespace, so this costs little
+            if not record or record.isspace():
+                return None
+            start = time.perf_counter()
+            result = self._parse_json(record, None)
+            PARSE_TIME.observe(time.perf_counter() - start)
+            return result
+        line = str(record, 'utf-8', 'replace').strip()
+        if not line:
+            return None
+        return self.parse(line)[0]
+
+    def _admit(self, result: PocsagMessage, capcode: str | bytes) -> bool:
+        """Whether ``capcode`` passes the filter, setting the message's alias if it does."""
+        keep, result.alias = self.capcodes.lookup(capcode)
+        return keep
+
+    def _parse_text(self, line: str) -> PocsagMessage | None:
+        match = POCSAG_LINE.fullmatch(line)
+        if match:
+            return self._parse_pocsag_match(match)
+        if POCSAG_DETECT.search(line):
+            return self._parse_pocsag(line)
+        if FLEX_DETECT.search(line):
+            return self._parse_flex(line)
+        return PocsagMessage(address='', trim_message='')
+
+    def _parse_json(self, line: str | bytes | memoryview, record: MultimonRecord | None) -> PocsagMessage | None:
+        result = PocsagMessage()
+        if record is None:
+            try:
+                record = decode_record(line)
+            except ValueError:
+                if not isinstance(line, str):
+                    line = str(line, 'utf-8', 'replace').strip()
+                result.trim_message = f'ERROR: multimon-ng returned non-JSON: {line}'
+                result.address = ''
+                return result
+        result.address = record.address or ''
+        if self.capcodes is not None and not self._admit(result, result.address):
+            return None
+        result.function = record.function
+        result.demod_name = record.demod_name
+        text = record.alpha if record.alpha is not None else record.numeric
+        result.trim_message = clean_message(text) if text else ''
+        return result
+
+    def _parse_pocsag_match(self, match: re.Match) -> PocsagMessage | None:
+        """Build a message from a single-pass match of :data:`POCSAG_LINE`."""
+        result = PocsagMessage()
+        address = match['address'].strip()
+        if self.capcodes is not None and not self._admit(result, address):
+            return None
+        function = match['function']
+        if self.send_function_code:
+            address += function
+        result.address = address
+        result.function = int(function)
+        result.demod_name = match['demod']
+
+        body = match['body']
+        if body is None:
+            return result
+
+        time_string = match['timestamp']
+        if time_string and self.use_timestamp and match['kind'] == 'Alpha':
+            result.timestamp = decode_timestamp(time_string)
+            if result.timestamp is not None:
+                body = body.replace(time_string, '')
+        result.trim_message = clean_message(body)
+        return result
+
+    def _parse_pocsag_record(self, match: re.Match) -> PocsagMessage | None:
+        """Build a message from a match of :data:`POCSAG_RECORD`, decoding only what the message keeps."""
+        result = PocsagMessage()
+        address = match['address'].strip()
+        if self.capcodes is not None and not self._admit(result, address):
+            return None
+        address = address.decode('ascii', 'replace')
+        function = match['function']
+        if self.send_function_code:
+            address += function.decode('ascii')
+        result.address = address
+        result.function = int(function)
+        result.demod_name = match['demod'].decode('ascii')
+
+        body = match['body']
+        if body is None:
+            return result
+
+        time_string = match['timestamp']
+        if time_string and self.use_timestamp and match['kind'] == b'Alpha':
+            result.timestamp = decode_timestamp(time_string.decode('ascii'))
+            if result.timestamp is not None:
+                body = body.replace(time_string, b'')
+        result.trim_message = clean_message(body.decode('utf-8', 'replace'))
+        return result
+
+    def _parse_pocsag(self, line: str) -> PocsagMessage | None:
+        """Field-by-field POCSAG parsing, for lines that don't fit the usual layout."""
+        result = PocsagMessage()
+        address = ''
+        address_match = POCSAG_ADDRESS.search(line)
+        if address_match:
+            address = address_match.group(1).strip()
+            if self.capcodes is not None and not self._admit(result, address):
+                return None
+            function_code_match = POCSAG_FUNCTION.search(line)
+            if function_code_match:
+                result.function = int(function_code_match.group(1))
+                if self.send_function_code:
+                    address += function_code_match.group(1)
+        result.address = address
+        demod_match = POCSAG_DETECT.search(line)
+        if demod_match:
+            result.demod_name = demod_match.group(1)
+
+        if 'Alpha:' in line:
+            message_match = POCSAG_ALPHA.search(line)
+            if message_match:
+                message = message_match.group(1).strip()
                 if self.use_timestamp:
-                    if re.search(r'FLEX[:|] ?\d{2} \w+ \d{4} \d{2}:\d{2}:\d{2}', line):
-                        time_string_match = re.search(r'\d+ \w+ \d+ \d{2}:\d{2}:\d{2}', line)
-                        if time_string_match:
-                            time_string = time_string_match.group()
-                            try:
-                                timestamp = moment.date(time_string, '%d %B %Y %H:%M:%S')
-                            except ValueError:
-                                pass
-
-                    elif re.search(r'FLEX[:|] ?\d+-\d+-\d+ \d{2}:\d{2}:\d{2}', line):
-                        time_string_match = re.search(r'\d+-\d+-\d+ \d{2}:\d{2}:\d{2}', line)
-                        if time_string_match:
-                            time_string = time_string_match.group()
-                            try:
-                                timestamp = moment.date(time_string, 'YYYY-MM-DD HH:mm:ss')
-                            except ValueError:
-                                pass
-
-                # Handle fragmented and complete messages
-                if re.search(r'([ |]ALN[ |]|[ |]GPN[ |]|[ |]NUM[ |])', line):
-                    message_match = re.search(r'FLEX[:|].*[|\[][0-9 ]*[|\]] ?...[ |](.+)', line)
-                    if message_match:
-                        message = message_match.group(1).strip()
-
-                        # Message fragmentation handling
-                        if re.search(r'[ |][0-9]{4}\/[0-9]\/F\/.[ |]', line):
-                            frag[address] = message
-                            trim_message = ''
-                        elif re.search(r'[ |][0-9]{4}\/[0-9]\/C\/.[ |]', line):
-                            trim_message = frag[address] + message
-                            del frag[address]
-                        else:
-                            trim_message = message
-
-            # Default case
-            else:
-                address = ''
-                message = None
-                trim_message = ''
-
-            result.timestamp = timestamp or None
-            result.address = str(address)
-            result.trim_message = trim_message
-            return result, self.json_detected
+                    if LONG_TIMESTAMP_DETECT.search(line):
+                        time_string_match = LONG_TIMESTAMP.search(line)
+                    else:
+                        time_string_match = ISO_TIMESTAMP.search(line)
+                    if time_string_match:
+                        time_string = time_string_match.group()
+                        result.timestamp = decode_timestamp(time_string)
+                        if result.timestamp is not None:
+                            message = message.replace(time_string, '')
+                result.trim_message = clean_message(message)
+
+        elif 'Numeric:' in line:
+            message_match = POCSAG_NUMERIC.search(line)
+            if message_match:
+                result.trim_message = clean_message(message_match.group(1))
+
+        return result
+
+    def _parse_flex(self, line: str) -> PocsagMessage | None:
+        result = PocsagMessage(demod_name='FLEX')
+        address = ''
+        address_match = FLEX_ADDRESS.search(line)
+        if address_match:
+            address = address_match.group(1).strip()
+            if self.capcodes is not None and not self._admit(result, address):
+                return None
+
+        if self.use_timestamp:
+            time_string_match = FLEX_TIMESTAMP.search(line)
+            if time_string_match:
+                result.timestamp = decode_timestamp(time_string_match.group(1))
+
+        # Handle fragmented and complete messages
+        if FLEX_TYPE.search(line):
+            message_match = FLEX_MESSAGE.search(line)
+            if message_match:
+                message = message_match.group(1).strip()
+
+                # Continuations arrive in later frames, so fragments are keyed on the capcode plus the rate and phase
+                # they were sent on rather than the cycle/frame
+                fragment_match = FLEX_FRAGMENT.search(line)
+                if fragment_match:
+                    key = (address, fragment_match.group(1), fragment_match.group(3))
+                    if fragment_match.group(2) == 'F':
+                        self.fragments.add(key, message)
+                        result.trim_message = ''
+                    else:
+                        result.trim_message = self.fragments.pop(key) + message
+                else:
+                    result.trim_message = message
+
+        result.address = str(address)
+        return result
@@ -0,0 +1,79 @@
+"""Coalesce bursts of updates into batches, flushed at a capped frame rate."""
+from __future__ import annotations
+
+import asyncio
+from typing import Callable, Generic, TypeVar
+
+from mmng_ui.metrics import METRICS
+
+T = TypeVar('T')
+
+COALESCED = METRICS.counter('coalesced')
+
+
+class UpdateScheduler(Generic[T]):
+    """
+    Collect items and hand them to ``flush`` in batches, no more than ``max_fps`` times a second.
+
+    The first item after a quiet spell is flushed straight away; items arriving within a frame of the last flush wait
+    for the next one.
+
+    :param flush: called with each batch, in arrival order
+    :type flush: Callable[[list], None]
+    :param max_fps: the most flushes per second
+    :type max_fps: float
+    """
+
+    def __init__(self, flush: Callable[[list[T]], None], max_fps: float = 20,
+                 loop: asyncio.AbstractEventLoop | None = None) -> None:
+        self.flush = flush
+        self.interval = 1 / max_fps
+        self.loop = loop or asyncio.get_running_loop()
+        self.items = 0
+        self.frames = 0
+        self.coalesced = 0
+        self._pending: list[T] = []
+        self._handle: asyncio.TimerHandle | asyncio.Handle | None = None
+        self._last_flush = float('-inf')
+        self._closed = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Items seen, frames flushed, and updates coalesced into a frame they didn't trigger."""
+        return {'items': self.items, 'frames': self.frames, 'coalesced': self.coalesced}
+
+    def add(self, item: T) -> None:
+        self._pending.append(item)
+        self.items += 1
+        if self._handle is not None:
+            self.coalesced += 1
+            COALESCED.add()
+            return
+        if self._closed:
+            return
+        delay = self._last_flush + self.interval - self.loop.time()
+        if delay > 0:
+            self._handle = self.loop.call_later(delay, self.flush_now)
+        else:
+            self._handle = self.loop.call_soon(self.flush_now)
+
+    def flush_now(self) -> None:
+        """Flush whatever is pending immediately."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        self._last_flush = self.loop.time()
+        self.frames += 1
+        self.flush(batch)
+
+    def close(self) -> None:
+        """Flush anything pending and stop scheduling; anything added after this is kept, but never flushed."""
+        self.flush_now()
+        self._closed = True
@@ -0,0 +1,231 @@
+"""Persistent, searchable message history in SQLite."""
+from __future__ import annotations
+
+import os
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Iterable
+
+import click
+
+from mmng_ui.reader import PocsagMessage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    received REAL NOT NULL,
+    timestamp TEXT,
+    address TEXT,
+    message TEXT,
+    port INTEGER,
+    peer TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_address ON messages (address, received);
+CREATE INDEX IF NOT EXISTS messages_received ON messages (received);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5 (message, content='messages', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, message) VALUES (new.id, new.message);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, message) VALUES ('delete', old.id, old.message);
+END;
+"""
+
+INSERT = 'INSERT INTO messages (received, timestamp, address, message, port, peer) VALUES (?, ?, ?, ?, ?, ?)'
+
+
+def default_path(ports: Iterable[int] = ()) -> str:
+    """
+    The database in the app directory for an instance listening on ``ports``.
+
+    Each set of ports gets a database of its own, so instances decoding different feeds never wait on each other's
+    writes; two instances can't listen on the same ports, so they never share one.
+    """
+    name = '-'.join(['messages', *(str(port) for port in ports)])
+    return os.path.join(click.get_app_dir('mmng-ui'), f'{name}.db')
+
+
+def parse_query(query: str) -> dict[str, Any]:
+    """
+    Split a search box query into :meth:`MessageStore.search` arguments.
+
+    ``address:1234567``, ``since:2024-09-23`` and ``until:2024-09-23T18:00`` filter; everything else is searched for in
+    the message text.
+    """
+    terms = []
+    filters: dict[str, Any] = {}
+    for token in query.split():
+        name, _, value = token.partition(':')
+        if value and name == 'address':
+            filters['address'] = value
+        elif value and name in ('since', 'until'):
+            try:
+                filters[name] = datetime.fromisoformat(value)
+            except ValueError:
+                terms.append(token)
+        else:
+            terms.append(token)
+    filters['text'] = ' '.join(terms)
+    return filters
+
+
+class MessageStore:
+    """
+    Every decoded message, kept in SQLite with indexes on address and time and full-text search over the message.
+
+    :meth:`add` only queues the message; a background thread writes queued messages in batches, one transaction per
+    batch, so the decode path never waits on the disk.  If the queue fills, messages are dropped and counted.  A batch
+    that can't be written, say because another process has held the database locked for longer than ``timeout``, is
+    counted as failed and the error kept in :attr:`error`; writing carries on with the next.
+
+    :param path: the database file
+    :type path: str
+    :param batch_size: most messages per transaction
+    :type batch_size: int
+    :param max_queue: most messages waiting to be written
+    :type max_queue: int
+    :param timeout: seconds to wait for a lock held by another connection
+    :type timeout: float
+    """
+
+    def __init__(self, path: str, batch_size: int = 1000, max_queue: int = 100_000, timeout: float = 5) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.error: str | None = None
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with sqlite3.connect(path) as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(SCHEMA)
+        connection.close()
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._reader: sqlite3.Connection | None = None
+        self._reader_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._write_behind, name='mmng-ui store', daemon=True)
+        self._writer.start()
+
+    def add(self, message: PocsagMessage) -> None:
+        """Queue ``message`` to be written."""
+        try:
+            self._queue.put_nowait((
+                message.current_time.timestamp(),
+                message.timestamp.isoformat() if message.timestamp else None,
+                message.address,
+                message.trim_message,
+                message.port,
+                message.peer,
+            ))
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_behind(self) -> None:
+        connection = sqlite3.connect(self.path, timeout=self.timeout)
+        try:
+            connection.execute('PRAGMA synchronous=NORMAL')
+        except sqlite3.Error as error:
+            self.error = str(error)
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [row for row in batch if row is not None]
+            if not batch:
+                continue
+            try:
+                with connection:
+                    connection.executemany(INSERT, batch)
+            except sqlite3.Error as error:
+                self.failed += len(batch)
+                self.error = str(error)
+            else:
+                self.written += len(batch)
+        connection.close()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {'written': self.written, 'dropped': self.dropped, 'failed': self.failed}
+
+    def close(self) -> None:
+        """Write everything still queued, then stop; if the queue stays full, give up on it rather than wait forever."""
+        try:
+            self._queue.put(None, timeout=self.timeout)
+        except queue.Full:
+            pass
+        else:
+            self._writer.join()
+        with self._reader_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    def __len__(self) -> int:
+        return self._read('SELECT count(*) FROM messages', ())[0][0]
+
+    def _read(self, sql: str, parameters: tuple) -> list[tuple]:
+        with self._reader_lock:
+            if self._reader is None:
+                self._reader = sqlite3.connect(self.path, check_same_thread=False)
+            return self._reader.execute(sql, parameters).fetchall()
+
+    def search(self, text: str = '', address: str | None = None, since: datetime | None = None,
+               until: datetime | None = None, limit: int = 500) -> list[PocsagMessage]:
+        """
+        Find the most recent messages matching every criterion given, newest first.
+
+        :param text: words that must all appear in the message
+        :type text: str
+        :param address: exact pager address
+        :type address: str
+        :param since: received at or after
+        :type since: datetime
+        :param until: received before
+        :type until: datetime
+        :param limit: most messages to return
+        :type limit: int
+        :return: matching messages
+        :rtype: list[PocsagMessage]
+        """
+        sql = 'SELECT m.received, m.timestamp, m.address, m.message, m.port, m.peer FROM messages m'
+        where = []
+        parameters: list[Any] = []
+        if text.strip():
+            sql += ' JOIN messages_fts ON messages_fts.rowid = m.id'
+            where.append('messages_fts MATCH ?')
+            parameters.append(' '.join('"' + word.replace('"', '""') + '"' for word in text.split()))
+        if address:
+            where.append('m.address = ?')
+            parameters.append(address)
+        if since:
+            where.append('m.received >= ?')
+            parameters.append(since.timestamp())
+        if until:
+            where.append('m.received < ?')
+            parameters.append(until.timestamp())
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY m.id DESC LIMIT ?'
+        parameters.append(limit)
+
+        return [
+            PocsagMessage(
+                current_time=datetime.fromtimestamp(received),
+                timestamp=datetime.fromisoformat(timestamp) if timestamp else None,
+                address=row_address,
+                trim_message=message,
+                port=port,
+                peer=peer,
+            )
+            for received, timestamp, row_address, message, port, peer in self._read(sql, tuple(parameters))
+        ]
@@ -0,0 +1,41 @@
+import socket
+import stat
+import sys
+import textwrap
+
+import pytest
+
+FAKE_MULTIMON = textwrap.dedent('''\
+    #!{python}
+    """Stands in for multimon-ng: every word of "audio" comes back as one POCSAG alpha line."""
+    import sys
+
+    if '-h' in sys.argv:
+        sys.stderr.write('multimon-ng 1.3.1 (fake)\\n' + ('  --json  output JSON\\n' if {json_capable} else ''))
+        sys.exit(1)
+
+    for chunk in iter(lambda: sys.stdin.buffer.read1(65536), b''):
+        for text in chunk.decode(errors='replace').split():
+            sys.stdout.write('2024-09-23 12:38:00: POCSAG1200: Address:  162202  Function: 0  '
+                             f'Alpha:   {{text}}<NUL>\\n')
+        sys.stdout.flush()
+''')
+
+
+def write_fake_multimon(path, json_capable=False):
+    path.write_text(FAKE_MULTIMON.format(python=sys.executable, json_capable=json_capable))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+@pytest.fixture
+def fake_multimon(tmp_path):
+    """Path to an executable stand-in for multimon-ng."""
+    return write_fake_multimon(tmp_path / 'multimon-ng')
+
+
+@pytest.fixture
+def free_port():
+    with socket.socket(socket.AF_INET6, socket.SOCK_DGRAM) as sock:
+        sock.bind(('::', 0))
+        return sock.getsockname()[1]
@@ -0,0 +1,141 @@
+import json
+import os
+import random
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from mmng_ui.alerts import AlertConfigError, AlertEngine, AlertRules, FileSink, WebhookSink, make_sink, trie_pattern
+from mmng_ui.reader import PocsagMessage
+
+MESSAGE = ('@@E24092310740 SIG2 BNSD7879 REQ1220 DSP1237 LOC 122 DAY ST BAIRNSDALE /VICTORIA ST AIR AMBULANCE '
+           'TRANSFER ACUITY: HIGH')
+
+
+def test_trie_pattern_matches_exactly_the_words():
+    rng = random.Random(1)
+    words = {''.join(rng.choice('abc') for _ in range(rng.randint(1, 5))) for _ in range(60)}
+    regex = re.compile(f'(?:{trie_pattern(words)})')
+    for candidate in {''.join(rng.choice('abcd') for _ in range(rng.randint(1, 6))) for _ in range(500)} | words:
+        assert bool(regex.fullmatch(candidate)) == (candidate in words), candidate
+
+
+def test_rules_match():
+    rules = AlertRules(['SIG2', 'acuity: high', 'Bairnsdale', 'SALE', 're:REQ\\d{4}', 'SIG'])
+    assert len(rules) == 6
+    assert rules.match(MESSAGE) == ['SIG2', 're:REQ\\d{4}', 'Bairnsdale', 'acuity: high']
+    assert rules.match('SIG20 sig2, sig.') == ['SIG2', 'SIG']
+    assert rules.match('') == []
+    assert rules.match(None) == []
+    assert AlertRules().match(MESSAGE) == []
+    with pytest.raises(AlertConfigError):
+        AlertRules(['re:(unclosed'])
+
+
+def test_rules_match_overlapping():
+    rules = AlertRules(['ACUITY: HIGH', 'HIGH', 'ACUITY', 're:acuity:\\s+\\w+'])
+    assert rules.match('Transfer ACUITY: HIGH') == ['ACUITY: HIGH', 're:acuity:\\s+\\w+', 'ACUITY', 'HIGH']
+    assert rules.match('HIGHWAY') == []
+
+
+def test_rules_match_non_ascii_keywords():
+    rules = AlertRules(['straße', 'ﬁre', 'Brände'])
+    assert rules.match('Straße closed') == ['straße']
+    assert rules.match('STRASSE closed, ﬁre and fire') == ['straße', 'ﬁre']
+    assert rules.match('BRÄNDE gemeldet') == ['Brände']
+    assert rules.match('Straßen') == []
+
+
+def test_rules_patterns_are_scoped():
+    rules = AlertRules(['re:(?s)sig.2', 're:(\\w)(\\d)x', 'SIG'])
+    assert rules.match('SIG\n2 a1x') == ['re:(?s)sig.2', 'SIG', 're:(\\w)(\\d)x']
+    for bad in (['re:(\\w)\\1'], ['re:(?P<code>SIG)'], ['re:a(?i)b'], ['re:a', 're:(?x']):
+        with pytest.raises(AlertConfigError):
+            AlertRules(bad)
+
+
+def test_engine_sends_matches_to_sinks(tmp_path):
+    path = tmp_path / 'alerts.conf'
+    path.write_text('# Incident codes\nSIG2\nACUITY: HIGH  # urgent\n')
+    seen = []
+    engine = AlertEngine(str(path), [lambda message, matched: seen.append((message.address, matched))])
+    assert engine.check(PocsagMessage(address='1622020', trim_message=MESSAGE)) == ['SIG2', 'ACUITY: HIGH']
+    assert engine.check(PocsagMessage(address='1622020', trim_message='nothing here')) == []
+    assert seen == [('1622020', ['SIG2', 'ACUITY: HIGH'])]
+    assert engine.alerts == 1
+
+    path.write_text('re:[\n')
+    os.utime(path, ns=(0, 10 ** 18))
+    with pytest.raises(AlertConfigError):
+        engine.reload()
+    assert engine.rules.match('SIG2') == ['SIG2']
+
+    path.write_text('VICTORIA\n')
+    os.utime(path, ns=(0, 2 * 10 ** 18))
+    assert engine.reload()
+    assert engine.rules.match(MESSAGE) == ['VICTORIA']
+
+
+def test_file_sink(tmp_path):
+    path = tmp_path / 'alerts.jsonl'
+    sink = make_sink(f'file:{path}', bell=None)
+    assert isinstance(sink, FileSink)
+    sink(PocsagMessage(address='1622020', trim_message='SIG2'), ['SIG2'])
+    sink.close()
+    alert = json.loads(path.read_text())
+    assert (alert['address'], alert['message'], alert['alerts']) == ('1622020', 'SIG2', ['SIG2'])
+
+
+def test_bell_sink():
+    rings = []
+    make_sink('bell', lambda: rings.append(1))(PocsagMessage(), ['SIG2'])
+    assert rings == [1]
+    with pytest.raises(ValueError):
+        make_sink('carrier-pigeon', bell=None)
+
+
+def test_webhook_sink():
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        sink = WebhookSink(f'http://127.0.0.1:{server.server_port}/alert')
+        sink(PocsagMessage(address='1622020', trim_message='SIG2'), ['SIG2'])
+        sink.close()
+    finally:
+        server.shutdown()
+    assert sink.sent == 1 and sink.failed == 0
+    assert received[0]['alerts'] == ['SIG2']
+
+
+def test_webhook_sink_survives_bad_responses():
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers['Content-Length']))
+            self.wfile.write(b'not HTTP at all\r\n\r\n')
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        sink = WebhookSink(f'http://127.0.0.1:{server.server_port}/alert')
+        for _ in range(2):
+            sink(PocsagMessage(address='1622020', trim_message='SIG2'), ['SIG2'])
+        sink.close()
+    finally:
+        server.shutdown()
+    assert sink.failed == 2 and not sink._thread.is_alive()
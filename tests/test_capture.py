@@ -0,0 +1,104 @@
+import asyncio
+import io
+import json
+import socket
+import stat
+import sys
+import textwrap
+from itertools import count
+
+import pytest
+from click.testing import CliRunner
+
+from mmng_ui.capture import CaptureError, CaptureWriter, read_capture
+from mmng_ui.headless import run_headless, run_replay
+from mmng_ui.cli import main
+
+
+def test_capture_round_trip(tmp_path):
+    path = str(tmp_path / 'audio.cap')
+    clock = count(10.0, 0.5)
+    with CaptureWriter(path, clock=lambda: next(clock)) as capture:
+        capture.write(8888, b'one')
+        capture.write(8889, b'')
+        capture.write(8888, b'three')
+    assert capture.datagrams == 3
+    assert list(read_capture(path)) == [(0.5, 8888, b'one'), (1.0, 8889, b''), (1.5, 8888, b'three')]
+
+
+def test_read_capture_rejects_bad_files(tmp_path):
+    other = tmp_path / 'other'
+    other.write_bytes(b'not a capture at all')
+    with pytest.raises(CaptureError):
+        list(read_capture(str(other)))
+
+    path = tmp_path / 'audio.cap'
+    with CaptureWriter(str(path)) as capture:
+        capture.write(8888, b'datagram')
+    path.write_bytes(path.read_bytes()[:-2])
+    with pytest.raises(CaptureError):
+        list(read_capture(str(path)))
+
+
+def test_capture_then_replay(tmp_path, fake_multimon, free_port):
+    path = str(tmp_path / 'audio.cap')
+
+    async def record():
+        output = io.StringIO()
+        with CaptureWriter(path) as capture:
+            task = asyncio.create_task(run_headless(fake_multimon, [free_port], output, capture=capture))
+            with socket.socket(socket.AF_INET6, socket.SOCK_DGRAM) as sock:
+                while 'LAST' not in output.getvalue():
+                    for word in (b'ONE TWO\n', b'THREE\n', b'LAST\n'):
+                        sock.sendto(word, ('::1', free_port))
+                    await asyncio.sleep(0.05)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        return [json.loads(line)['message'] for line in output.getvalue().splitlines()]
+
+    live = asyncio.run(asyncio.wait_for(record(), 10))
+    assert {port for _, port, _ in read_capture(path)} == {free_port}
+
+    output = io.StringIO()
+    decoded, _ = asyncio.run(asyncio.wait_for(run_replay(fake_multimon, path, output, speed=0), 10))
+    replayed = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert decoded == len(replayed)
+    assert [message['message'] for message in replayed][:len(live)] == live
+    assert {message['port'] for message in replayed} == {free_port}
+
+
+def test_replay_audio_command(tmp_path, fake_multimon):
+    path = str(tmp_path / 'audio.cap')
+    clock = count(0.0, 0.01)
+    with CaptureWriter(path, clock=lambda: next(clock)) as capture:
+        for port, data in ((8888, b'alpha beta\n'), (8889, b'gamma\n'), (8888, b'delta\n')):
+            capture.write(port, data)
+    output = tmp_path / 'messages.jsonl'
+    result = CliRunner().invoke(main, ['replay-audio', path, '-m', fake_multimon, '-o', str(output)])
+    assert result.exit_code == 0, result.output
+    messages = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted((message['port'], message['message']) for message in messages) == [
+        (8888, 'alpha'), (8888, 'beta'), (8888, 'delta'), (8889, 'gamma')]
+
+
+def test_replay_drains_stderr(tmp_path, capsys):
+    binary = tmp_path / 'multimon-ng'
+    binary.write_text(f'#!{sys.executable}\n' + textwrap.dedent('''\
+        import sys
+        if '-h' in sys.argv:
+            sys.exit(1)
+        # Enough to fill the stderr pipe, were nobody reading it
+        sys.stderr.write('noise\\n' * 100_000)
+        sys.stderr.flush()
+        for line in sys.stdin:
+            print('2024-09-23 12:38:00: POCSAG1200: Address:  162202  Function: 0  '
+                  f'Alpha:   {line.strip()}', flush=True)
+    '''))
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    path = str(tmp_path / 'audio.cap')
+    with CaptureWriter(path) as capture:
+        capture.write(8888, b'SIG2\n')
+    output = io.StringIO()
+    decoded, _ = asyncio.run(asyncio.wait_for(run_replay(str(binary), path, output, speed=0), 10))
+    assert decoded == 1 and json.loads(output.getvalue())['message'] == 'SIG2'
+    assert capsys.readouterr().err.count(':8888 Error: noise') == 100_000
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+import pytest
+
+from mmng_ui.compat import MomentParseLine, to_moment
+
+moment = pytest.importorskip('moment')
+
+
+def test_to_moment():
+    assert to_moment(None) is None
+    assert to_moment(datetime(2024, 9, 23, 12, 38)) == moment.date(2024, 9, 23, 12, 38, 0)
+
+
+def test_moment_parse_line():
+    result, json_detected = MomentParseLine().parse(
+        '2024-09-23 12:38:00: POCSAG512: Address:  162202  Function: 0  Alpha:   SIG2<NUL>')
+    assert isinstance(result.timestamp, moment.Moment)
+    assert isinstance(result.current_time, moment.Moment)
+    assert result.timestamp == moment.date(2024, 9, 23, 12, 38, 0)
+    assert result.trim_message == 'SIG2'
+    assert json_detected is False
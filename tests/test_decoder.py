@@ -0,0 +1,274 @@
+import asyncio
+import os
+import stat
+import sys
+import textwrap
+
+import pytest
+
+from mmng_ui.decoder import (AudioBuffer, DecodeSource, DemodSelector, Supervisor, multimon_args, probe_multimon,
+                             read_records)
+from mmng_ui.metrics import METRICS
+from mmng_ui.reader import PocsagMessage
+
+
+def drain(audio: AudioBuffer) -> bytes:
+    async def read_all():
+        chunks = []
+        while len(audio):
+            chunks.append(await audio.get())
+        return b''.join(chunks)
+
+    return asyncio.run(read_all())
+
+
+def test_read_records_splits_across_reads():
+    async def scenario():
+        stream = asyncio.StreamReader()
+        for piece in (b'first\nsec', b'ond\n\nthi', b'rd\nlast'):
+            stream.feed_data(piece)
+        stream.feed_eof()
+        return [[bytes(record) for record in records] async for records in read_records(stream, chunk_size=9)]
+
+    assert asyncio.run(scenario()) == [[b'first'], [b'second'], [b'third'], [b'last']]
+
+
+def test_audio_buffer_wraps_around():
+    audio = AudioBuffer(8)
+    audio.put(b'abcdef')
+    assert drain(audio) == b'abcdef'
+    audio.put(b'ghijkl')
+    assert drain(audio) == b'ghijkl'
+    assert audio.stats == {'received': 12, 'written': 0, 'dropped': 0, 'buffered': 0}
+
+
+def test_audio_buffer_drop_oldest():
+    audio = AudioBuffer(8, 'drop-oldest')
+    audio.put(b'abcdef')
+    audio.put(b'ghij')
+    assert audio.bytes_dropped == 2
+    assert drain(audio) == b'cdefghij'
+
+    audio.put(b'0123456789')
+    assert audio.bytes_dropped == 4
+    assert drain(audio) == b'23456789'
+
+
+def test_audio_buffer_drop_newest():
+    audio = AudioBuffer(8, 'drop-newest')
+    audio.put(b'abcdef')
+    audio.put(b'ghij')
+    assert audio.bytes_dropped == 4
+    assert drain(audio) == b'abcdef'
+
+
+def test_audio_buffer_bad_policy():
+    with pytest.raises(ValueError):
+        AudioBuffer(8, 'drop-everything')
+
+
+def test_audio_buffer_feed():
+    class Writer:
+        def __init__(self):
+            self.data = bytearray()
+
+        def is_closing(self):
+            return False
+
+        def write(self, data):
+            self.data += data
+
+        async def drain(self):
+            pass
+
+    async def scenario():
+        audio = AudioBuffer(16)
+        writer = Writer()
+        task = asyncio.create_task(audio.feed(writer))
+        audio.put(b'abcd')
+        await asyncio.sleep(0)
+        audio.put(b'efgh')
+        await asyncio.sleep(0)
+        task.cancel()
+        return writer.data, audio.bytes_written
+
+    assert asyncio.run(scenario()) == (b'abcdefgh', 8)
+
+
+def write_script(path, body):
+    path.write_text(f'#!{sys.executable}\n' + textwrap.dedent(body))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+def test_supervisor_restarts_a_decoder_that_exits(tmp_path):
+    runs = tmp_path / 'runs'
+    runs.write_text('')
+    binary = write_script(tmp_path / 'multimon-ng', f'''\
+        import sys
+        with open({str(runs)!r}, 'r+') as runs:
+            first = not runs.read()
+            runs.write('x')
+        if first:
+            # Enough to fill the stderr pipe, were nobody reading it
+            sys.stderr.write('noise\\n' * 100_000)
+            print('one', flush=True)
+            sys.exit(3)
+        for line in sys.stdin:
+            print(line.strip(), flush=True)
+    ''')
+
+    async def scenario():
+        reports = []
+        source = DecodeSource(0)
+        supervisor = Supervisor(source, binary, '', reports.append, min_backoff=0.01)
+
+        async def send_after_restart():
+            while not (supervisor.restarts and supervisor.running):
+                await asyncio.sleep(0.01)
+            source.audio.put(b'two\n')
+
+        sender = asyncio.create_task(send_after_restart())
+        lines = []
+        async for line in supervisor.lines():
+            lines.append(line)
+            if len(lines) == 2:
+                break
+        await sender
+        await source.close()
+        return lines, reports, supervisor.stats
+
+    lines, reports, stats = asyncio.run(asyncio.wait_for(scenario(), 10))
+    assert lines == ['one', 'two']
+    assert reports.count('Error: noise') == 100_000
+    assert 'multimon-ng exited with status 3; restarting in 0.01s' in reports
+    assert stats['restarts'] == 1 and stats['downtime'] > 0
+
+
+def test_supervisor_restarts_a_decoder_that_hangs(tmp_path):
+    binary = write_script(tmp_path / 'multimon-ng', '''\
+        import time
+        time.sleep(60)
+    ''')
+
+    async def scenario():
+        reports = []
+        source = DecodeSource(0)
+        supervisor = Supervisor(source, binary, '', reports.append, stall_timeout=0.2, min_backoff=0.01)
+        source.audio.put(bytes(512 * 1024))
+        reader = asyncio.create_task(supervisor.lines().__anext__())
+        while not supervisor.restarts:
+            await asyncio.sleep(0.05)
+        reader.cancel()
+        await source.close()
+        return reports
+
+    reports = asyncio.run(asyncio.wait_for(scenario(), 10))
+    assert reports[0] == 'multimon-ng took no audio for 0.2s; restarting in 0.01s'
+
+
+def test_probe_multimon_is_cached_until_the_binary_changes(fake_multimon, tmp_path, monkeypatch):
+    cache_path = str(tmp_path / 'cache' / 'probe.json')
+    assert asyncio.run(probe_multimon(fake_multimon, cache_path)) == ('multimon-ng 1.3.1 (fake)', False)
+
+    async def no_subprocess(*args, **kwargs):
+        raise AssertionError('multimon-ng was run again')
+
+    monkeypatch.setattr(asyncio, 'create_subprocess_exec', no_subprocess)
+    assert asyncio.run(probe_multimon(fake_multimon, cache_path)) == ('multimon-ng 1.3.1 (fake)', False)
+
+    os.utime(fake_multimon, ns=(0, 10 ** 18))
+    with pytest.raises(AssertionError):
+        asyncio.run(probe_multimon(fake_multimon, cache_path))
+
+
+def test_multimon_args_enables_each_demodulator():
+    assert multimon_args(False, ['POCSAG1200']).startswith('-a POCSAG1200 -f alpha')
+    args = multimon_args(True, ['POCSAG512', 'FLEX']).split()
+    assert args[:4] == ['-a', 'POCSAG512', '-a', 'FLEX'] and args[-2:] == ['--json', '-']
+
+
+def test_supervisor_reconfigure_hands_over_without_losing_audio(fake_multimon):
+    async def scenario():
+        source = DecodeSource(0)
+        supervisor = Supervisor(source, fake_multimon, '', lambda text: None)
+        words = []
+        records = supervisor.records()
+        source.audio.put(b'one two ')
+        while len(words) < 2:
+            words += [bytes(record).split()[-1] for record in await records.__anext__()]
+        first = source.process
+        source.audio.put(b'three four ')
+        await supervisor.reconfigure(multimon_args(False, ['POCSAG1200']))
+        source.audio.put(b'five six ')
+        while len(words) < 6:
+            words += [bytes(record).split()[-1] for record in await records.__anext__()]
+        await records.aclose()
+        await source.close()
+        return words, first is not source.process, supervisor.args, supervisor.restarts
+
+    words, replaced, args, restarts = asyncio.run(asyncio.wait_for(scenario(), 10))
+    assert words == [b'one<NUL>', b'two<NUL>', b'three<NUL>', b'four<NUL>', b'five<NUL>', b'six<NUL>']
+    assert replaced and args.startswith('-a POCSAG1200 -f') and restarts == 0
+
+
+def test_demod_selector_narrows_to_what_was_heard():
+    class FakeSupervisor:
+        def __init__(self):
+            self.source = DecodeSource(0)
+            self.args = []
+            self.reports = []
+
+        async def reconfigure(self, args):
+            self.args.append(args)
+
+        def report(self, text):
+            self.reports.append(text)
+
+    async def scenario():
+        supervisor = FakeSupervisor()
+        selector = DemodSelector(supervisor, ['POCSAG512', 'POCSAG1200', 'POCSAG2400'], False, learn_window=0.2,
+                                 reprobe_interval=0.2, sample_interval=0.05)
+        task = asyncio.create_task(selector.run())
+        selector.observe(PocsagMessage(demod_name='POCSAG1200'))
+        selector.observe(PocsagMessage(demod_name='FLEX'))
+        while not supervisor.args:
+            await asyncio.sleep(0.01)
+        narrowed = (selector.active, selector.learning, selector.describe())
+        while len(supervisor.args) < 2:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        return supervisor, narrowed, selector
+
+    supervisor, narrowed, selector = asyncio.run(asyncio.wait_for(scenario(), 10))
+    assert narrowed == (('POCSAG1200',), False, 'POCSAG1200')
+    assert supervisor.args[0] == multimon_args(False, ['POCSAG1200'])
+    assert supervisor.args[1] == multimon_args(False, selector.candidates)
+    assert selector.learning and selector.active == selector.candidates and not selector.seen
+    assert supervisor.reports[0] == 'only heard POCSAG1200; running just those'
+
+
+def test_stderr_lines_are_not_counted(tmp_path):
+    binary = write_script(tmp_path / 'multimon-ng', '''\
+        import sys
+        sys.stderr.write('noise\\n' * 50)
+        sys.stderr.flush()
+        print('one', flush=True)
+        sys.exit(3)
+    ''')
+
+    async def scenario():
+        reports = []
+        source = DecodeSource(0)
+        supervisor = Supervisor(source, binary, '', reports.append, min_backoff=0.01)
+        before = METRICS.counter('lines').total
+        batches = supervisor.records()
+        records = await batches.__anext__()
+        while len(reports) < 50:
+            await asyncio.sleep(0.01)
+        await batches.aclose()
+        await source.close()
+        return records, METRICS.counter('lines').total - before
+
+    records, counted = asyncio.run(asyncio.wait_for(scenario(), 10))
+    assert records == [b'one'] and counted == 1
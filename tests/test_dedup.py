@@ -0,0 +1,45 @@
+from mmng_ui.dedup import Deduplicator
+from mmng_ui.reader import PocsagMessage
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def message(address, text):
+    return PocsagMessage(address=address, trim_message=text)
+
+
+def test_copies_within_the_window_are_counted_against_the_first():
+    clock = Clock()
+    dedup = Deduplicator(window=30, clock=clock)
+    first, duplicate = dedup.check(message('1622020', 'SIG2 Bairnsdale'))
+    assert not duplicate and first.count == 1
+
+    clock.now = 10
+    sighting, duplicate = dedup.check(message('1622020', '  sig2   BAIRNSDALE '))
+    assert duplicate and sighting is first and first.count == 2
+    assert not dedup.check(message('1622021', 'SIG2 Bairnsdale'))[1]
+    assert not dedup.check(message('1622020', 'SIG2 Sale'))[1]
+
+    # The window runs from the first copy, and doesn't slide with later ones
+    clock.now = 31
+    sighting, duplicate = dedup.check(message('1622020', 'SIG2 Bairnsdale'))
+    assert not duplicate and sighting is not first
+    assert dedup.stats == {'remembered': 3, 'unique': 4, 'duplicates': 1, 'expired': 1, 'evicted': 0}
+
+
+def test_memory_is_bounded():
+    dedup = Deduplicator(window=3600, max_entries=100)
+    for i in range(1000):
+        dedup.check(message(str(i), 'page'))
+    assert len(dedup) == 100
+    assert dedup.evicted == 900
+    assert dedup.check(message('999', 'page'))[1]
+    assert not dedup.check(message('0', 'page'))[1]
+    dedup.clear()
+    assert len(dedup) == 0
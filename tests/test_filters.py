@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+from mmng_ui.filters import CapcodeFilter, CapcodeRules, FilterConfigError, parse_config
+from mmng_ui.reader import ParseLine
+
+CONFIG = '''
+# Everything in the 1.6 million block, plus one more
+allow 1600000-1699999, 1920312
+allow 1650000-1700000  # overlaps the first
+deny 1622020 1610000-1610009
+alias 162202 Ambulance dispatch
+alias 1920312 Duty officer
+'''
+
+
+def pocsag(address, text='Hello'):
+    return f'2024-09-23 12:38:00: POCSAG1200: Address: {address:>7}  Function: 0  Alpha:   {text}<NUL>'
+
+
+def test_capcode_rules():
+    rules = CapcodeRules({5}, [(10, 20), (15, 30), (40, 50), (31, 35)])
+    assert [n for n in range(60) if n in rules] == [5, *range(10, 36), *range(40, 51)]
+    assert not CapcodeRules()
+
+
+def test_parse_config():
+    allow, deny, aliases = parse_config(CONFIG)
+    assert 1700000 in allow and 1700001 not in allow and 1920312 in allow
+    assert 1610005 in deny and 1622020 in deny
+    assert aliases == {162202: 'Ambulance dispatch', 1920312: 'Duty officer'}
+
+    for bad in ('allow 12-10', 'allow twelve', 'alias 162202', 'block 1234'):
+        with pytest.raises(FilterConfigError, match='line 2'):
+            parse_config(f'# fine\n{bad}')
+
+
+def test_lookup():
+    capcodes = CapcodeFilter.from_text(CONFIG)
+    assert capcodes.lookup('1600001') == (True, None)
+    assert capcodes.lookup('1920312') == (True, 'Duty officer')
+    assert capcodes.lookup('1622020') == (False, None)
+    assert capcodes.lookup('162202') == (False, 'Ambulance dispatch')
+    assert capcodes.lookup('not a number') == (False, None)
+    assert capcodes.dropped == 3
+    assert CapcodeFilter().lookup('42') == (True, None)
+
+
+def test_parse_line_drops_filtered_capcodes():
+    parse_line = ParseLine(capcodes=CapcodeFilter.from_text('deny 123456 7654321\nalias 1920312 Duty officer'))
+    assert parse_line.parse(pocsag(123456)) == (None, False)
+    result, _ = parse_line.parse(pocsag(1920312))
+    assert (result.address, result.alias, result.trim_message) == ('19203120', 'Duty officer', 'Hello')
+    assert parse_line.parse('POCSAG512: Address:  123456  Function: 0  Alpha:   odd layout') == (None, False)
+    assert parse_line.parse('FLEX: 2024-09-23 12:38:00 1600/2/F/A 10.120 [007654321] ALN Part one ') == (None, False)
+    assert len(parse_line.fragments) == 0
+    assert parse_line.parse_record(pocsag(123456).encode()) is None
+    assert parse_line.parse_record(pocsag(1920312).encode()).alias == 'Duty officer'
+    messages = list(parse_line.parse_many([pocsag(123456), pocsag(1920312, 'Kept'), pocsag(123456)]))
+    assert [message.trim_message for message in messages] == ['Kept']
+
+    json_line = ParseLine(capcodes=CapcodeFilter.from_text('allow 1920312'))
+    assert json_line.parse('{"address":162202,"function":0,"alpha":"Dropped"}') == (None, True)
+    result, _ = json_line.parse('{"address":1920312,"function":3,"alpha":"Kept"}')
+    assert result.trim_message == 'Kept'
+
+
+def test_reload(tmp_path):
+    path = tmp_path / 'filters.conf'
+    path.write_text('deny 123456\n')
+    capcodes = CapcodeFilter(str(path))
+    assert capcodes.lookup('123456') == (False, None)
+    assert not capcodes.reload()
+
+    path.write_text('deny 654321\nalias 123456 Now wanted\n')
+    os.utime(path, ns=(0, 10 ** 18))
+    assert capcodes.reload()
+    assert capcodes.lookup('123456') == (True, 'Now wanted')
+
+    path.write_text('deny nonsense\n')
+    os.utime(path, ns=(0, 2 * 10 ** 18))
+    with pytest.raises(FilterConfigError):
+        capcodes.reload()
+    assert capcodes.lookup('654321') == (False, None)
+
+    path.unlink()
+    with pytest.raises(FilterConfigError):
+        capcodes.reload()
@@ -0,0 +1,83 @@
+import asyncio
+import io
+import json
+import socket
+
+from mmng_ui.headless import run_headless
+
+
+async def wait_for_output(output: io.StringIO, lines: int) -> list[str]:
+    while output.getvalue().count('\n') < lines:
+        await asyncio.sleep(0.01)
+    return output.getvalue().splitlines()
+
+
+def test_run_headless(fake_multimon, free_port):
+    async def scenario():
+        output = io.StringIO()
+        task = asyncio.create_task(run_headless(fake_multimon, [free_port], output))
+        with socket.socket(socket.AF_INET6, socket.SOCK_DGRAM) as sock:
+            while not output.getvalue():
+                sock.sendto(b'SIG2\n', ('::1', free_port))
+                await asyncio.sleep(0.05)
+        lines = await asyncio.wait_for(wait_for_output(output, 1), 5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return lines
+
+    lines = asyncio.run(scenario())
+    message = json.loads(lines[0])
+    assert message['address'] == '1622020'
+    assert message['message'] == 'SIG2'
+    assert message['timestamp'] == '2024-09-23T12:38:00'
+    assert message['port'] == free_port
+    assert message['peer'] == '::1'
+
+
+def test_run_headless_several_sources(fake_multimon):
+    ports = []
+    for _ in range(2):
+        sock = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+        sock.bind(('::', 0))
+        ports.append(sock.getsockname()[1])
+        sock.close()
+
+    async def scenario():
+        output = io.StringIO()
+        task = asyncio.create_task(run_headless(fake_multimon, ports, output))
+        with socket.socket(socket.AF_INET6, socket.SOCK_DGRAM) as sock:
+            seen = set()
+            while len(seen) < 2:
+                for port in ports:
+                    sock.sendto(f'PORT{port}\n'.encode(), ('::1', port))
+                await asyncio.sleep(0.05)
+                seen = {json.loads(line)['port'] for line in output.getvalue().splitlines()}
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return output.getvalue().splitlines()
+
+    lines = asyncio.run(asyncio.wait_for(scenario(), 10))
+    for line in lines:
+        message = json.loads(line)
+        assert message['message'] == f'PORT{message["port"]}'
+
+
+def test_run_headless_adaptive_narrows_demodulators(fake_multimon, free_port, capsys):
+    async def scenario():
+        output = io.StringIO()
+        task = asyncio.create_task(run_headless(fake_multimon, [free_port], output, adaptive=True, learn_window=0.3,
+                                                reprobe_interval=60))
+        with socket.socket(socket.AF_INET6, socket.SOCK_DGRAM) as sock:
+            while 'running just those' not in capsys.readouterr().err:
+                sock.sendto(b'SIG2\n', ('::1', free_port))
+                await asyncio.sleep(0.05)
+            sent = output.getvalue().count('\n')
+            sock.sendto(b'AFTER\n', ('::1', free_port))
+            lines = await asyncio.wait_for(wait_for_output(output, sent + 1), 5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return lines
+
+    lines = asyncio.run(asyncio.wait_for(scenario(), 10))
+    assert json.loads(lines[-1])['message'] == 'AFTER'
+    assert f':{free_port} demodulators: POCSAG1200' in capsys.readouterr().err
@@ -0,0 +1,49 @@
+import pytest
+
+from mmng_ui.jsondecode import BACKENDS, MultimonRecord, select_backend
+
+SAMPLE = '{"demod_name":"POCSAG1200","address":1920312,"function":3,"alpha":"Time Critical Incident - Clear ASAP"}'
+
+
+@pytest.fixture(params=list(BACKENDS))
+def decode(request):
+    if request.param != 'json':
+        pytest.importorskip(request.param)
+    name, decode = select_backend(request.param)
+    assert name == request.param
+    return decode
+
+
+def test_decode_fields(decode):
+    for data in (SAMPLE, SAMPLE.encode(), memoryview(SAMPLE.encode())):
+        record = decode(data)
+        assert (record.demod_name, record.address, record.function) == ('POCSAG1200', '1920312', 3)
+        assert record.alpha.startswith('Time Critical') and record.numeric is None
+
+
+def test_decode_missing_and_extra_fields(decode):
+    record = decode('{"demod_name":"POCSAG512","numeric":"0412 345","baud":512}')
+    assert (record.address, record.alpha, record.numeric) == (None, None, '0412 345')
+
+
+@pytest.mark.parametrize('data', ['Jibberish', '[1, 2]', '42', '{"address": 1'])
+def test_decode_rejects(decode, data):
+    with pytest.raises(ValueError):
+        decode(data)
+
+
+def test_select_backend_default():
+    name, _ = select_backend()
+    assert name in BACKENDS
+
+
+@pytest.mark.parametrize('data, expected', [
+    ('{"address":1920312.0,"function":"3"}', (None, '1920312', 3, None, None)),
+    ('{"address":" 1920312 ","function":3.0,"alpha":1234}', (None, '1920312', 3, '1234', None)),
+    ('{"demod_name":"FLEX","address":1.5,"function":"A"}', ('FLEX', '1.5', None, None, None)),
+    ('{"address":null,"function":true,"numeric":"0412"}', (None, None, None, None, '0412')),
+])
+def test_decode_normalises(decode, data, expected):
+    record = decode(data)
+    assert type(record) is MultimonRecord
+    assert tuple(record) == expected
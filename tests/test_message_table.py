@@ -0,0 +1,98 @@
+import asyncio
+
+from textual.app import App
+
+from mmng_ui.message_table import BoundedLog, Column, MessageTable, RowHistory, TableRow
+
+
+class TableApp(App):
+    def compose(self):
+        yield MessageTable(
+            Column('time', 'Time'),
+            Column('address', 'Address', justify='right'),
+            Column('message', 'Message', wrap=True),
+            max_rows=50,
+            page_size=20,
+        )
+        yield BoundedLog(max_lines=80)
+
+
+def run(scenario):
+    async def runner():
+        app = TableApp()
+        async with app.run_test(size=(60, 20)) as pilot:
+            await pilot.pause()
+            return await scenario(app, pilot)
+
+    return asyncio.run(runner())
+
+
+def add_messages(table, count):
+    for i in range(count):
+        table.add_row(f'12:00:{i % 60:02}', str(1000 + i), f'message {i} ' * (1 + i % 5))
+
+
+def test_row_history(tmp_path):
+    history = RowHistory(str(tmp_path / 'history'))
+    for i in range(5):
+        history.append(TableRow(i, ('12:00:00', str(i), 'ÄTESTÜ'), 'bold' if i == 3 else None))
+    rows = history.read(2, 10)
+    assert [row.index for row in rows] == [2, 3, 4]
+    assert rows[1].cells == ('12:00:00', '3', 'ÄTESTÜ')
+    assert rows[1].style == 'bold'
+    history.clear()
+    assert len(history) == 0
+    assert history.read(0, 5) == []
+
+
+def test_table_evicts_to_history():
+    async def scenario(app, pilot):
+        table = app.query_one(MessageTable)
+        add_messages(table, 120)
+        await pilot.pause()
+        assert len(table) == 50
+        assert len(table.history) == 70
+        assert table.row_count == 120
+        assert table.is_vertical_scroll_end
+        assert 'message 119' in table.render_line(table.size.height - 2).text
+
+    run(scenario)
+
+
+def test_table_pages_history_back_in():
+    async def scenario(app, pilot):
+        table = app.query_one(MessageTable)
+        add_messages(table, 120)
+        await pilot.pause()
+        table.scroll_home(animate=False, immediate=True)
+        await pilot.pause()
+        assert len(table) == 70
+        # The rows that were on screen stay on screen
+        assert '1070' in table.render_line(1).text
+
+        table.scroll_end(animate=False, immediate=True)
+        await pilot.pause()
+        assert len(table) == 50
+
+    run(scenario)
+
+
+def test_bounded_log():
+    async def scenario(app, pilot):
+        log = app.query_one(BoundedLog)
+        for i in range(200):
+            log.write(f'line {i}')
+        assert 80 <= len(log.lines) <= 90
+        assert log.lines[-1].text.startswith('line 199')
+
+    run(scenario)
+
+
+def test_rows_styled_individually():
+    async def scenario(app, pilot):
+        table = app.query_one(MessageTable)
+        rows = table.add_rows([('12:00:00', '1', 'plain'), ('12:00:01', '2', 'alert')], styles=[None, 'bold red'])
+        assert [row.style for row in rows] == [None, 'bold red']
+        assert table.add_rows([('12:00:02', '3', 'all')], style='italic')[0].style == 'italic'
+
+    run(scenario)
@@ -0,0 +1,63 @@
+import json
+from itertools import count
+
+from mmng_ui.metrics import METRICS, Histogram, Metrics, quantile, write_snapshot
+from mmng_ui.reader import ParseLine
+
+LINE = '2024-09-23 12:38:00: POCSAG512: Address:  162202  Function: 0  Alpha:   SIG2<NUL>'
+
+
+def test_histogram_buckets():
+    histogram = Histogram()
+    histogram.observe(0.0000005)
+    histogram.observe(0.000003)
+    histogram.observe(0.001, count=2)
+    histogram.observe(1e9)
+    assert histogram.count == 5
+    assert histogram.max == 1e9
+    assert histogram.buckets[0] == 1
+    assert histogram.buckets[2] == 1
+    assert histogram.buckets[10] == 2
+    assert histogram.buckets[-1] == 1
+    assert quantile(histogram.buckets, 0.5) == 0.001024
+    assert quantile([0] * 4, 0.5) == 0.0
+
+
+def test_snapshot_rates_cover_the_window():
+    clock = count(0.0, 10.0)
+    metrics = Metrics(clock=lambda: next(clock))
+    datagrams = metrics.counter('datagrams')
+    parse = metrics.histogram('parse')
+    metrics.gauge('queue depth').set(7)
+    metrics.gauge('queue depth').set(2)
+
+    datagrams.add(100)
+    parse.observe(0.000003, count=10)
+    first = metrics.snapshot()
+    assert first['counters']['datagrams'] == {'total': 100, 'rate': 10.0}
+    assert first['gauges']['queue depth'] == {'value': 2, 'peak': 7}
+    assert first['histograms']['parse']['p99'] == 0.004
+
+    datagrams.add(50)
+    parse.observe(0.001, count=10)
+    second = metrics.snapshot(first)
+    assert second['counters']['datagrams'] == {'total': 150, 'rate': 5.0}
+    assert second['histograms']['parse']['count'] == 20
+    assert second['histograms']['parse']['p50'] == 1.024
+    assert round(second['histograms']['parse']['mean'], 6) == 1.0
+
+
+def test_write_snapshot(tmp_path):
+    path = tmp_path / 'metrics.json'
+    write_snapshot(str(path), {'counters': {}})
+    write_snapshot(str(path), Metrics().snapshot())
+    assert set(json.loads(path.read_text())) == {'time', 'uptime', 'counters', 'gauges', 'histograms'}
+    assert [p.name for p in tmp_path.iterdir()] == ['metrics.json']
+
+
+def test_parsing_is_timed():
+    parse = METRICS.histogram('parse')
+    before = parse.count
+    ParseLine().parse(LINE)
+    list(ParseLine().parse_many([LINE] * 5))
+    assert parse.count == before + 6
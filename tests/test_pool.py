@@ -0,0 +1,50 @@
+import time
+
+from click.testing import CliRunner
+
+from mmng_ui.cli import main
+from mmng_ui.pool import ShardedParser
+from mmng_ui.reader import ParseLine
+
+LINES = [
+    '2024-09-23 12:38:00: POCSAG512: Address:  162202  Function: 0  Alpha:   First<NUL>',
+    'FLEX: 2024-09-23 12:38:00 1600/2/F/A 10.120 [001234567] ALN Part one ',
+    'FLEX: 2024-09-23 12:38:00 1600/2/F/A 10.120 [007654321] ALN Other one ',
+    '2024-09-23 12:38:01: POCSAG1200: Address:  123456  Function: 1  Numeric:   0412',
+    '',
+    'FLEX: 2024-09-23 12:38:01 1600/2/C/A 10.120 [007654321] ALN other two',
+    'FLEX: 2024-09-23 12:38:01 1600/2/C/A 10.120 [001234567] ALN part two',
+    'Invalid Message',
+] * 7
+
+
+def summary(messages):
+    return [(message.address, message.timestamp, message.trim_message) for message in messages]
+
+
+def test_sharded_parser_matches_inline():
+    expected = summary(ParseLine().parse_many(LINES))
+    with ShardedParser(workers=3, chunk_size=5, window=2) as parser:
+        assert summary(parser.parse_many(LINES)) == expected
+    assert 'Part onepart two' in [message for _, _, message in expected]
+
+
+def test_replay_command(tmp_path):
+    log_file = tmp_path / 'capture.log'
+    log_file.write_text('\n'.join(LINES))
+    output = tmp_path / 'messages.jsonl'
+    result = CliRunner().invoke(main, ['replay', str(log_file), '-w', '0', '-w', '2', '-o', str(output)])
+    assert result.exit_code == 0, result.output
+    assert '  0 workers: 49 messages' in result.output
+    assert '  2 workers: 49 messages' in result.output
+    assert len(output.read_text().splitlines()) == 49
+
+
+def test_sharded_parser_closes_after_stopping_early():
+    lines = LINES * 2000
+    start = time.monotonic()
+    with ShardedParser(workers=2, chunk_size=5000, window=4) as parser:
+        messages = parser.parse_many(lines)
+        next(messages)
+    assert time.monotonic() - start < 10
+    assert not parser._processes
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from mmng_ui.publish import HTTPOutput, Outbox, Publisher, StreamServerOutput, UDPOutput, make_output
+from mmng_ui.reader import PocsagMessage
+
+
+def test_outbox_batches():
+    async def scenario():
+        outbox = Outbox(10)
+        for line in (b'aaaa\n', b'bb\n', b'cccccc\n'):
+            outbox.put(line)
+        return await outbox.get_batch(8), await outbox.get_batch(8), len(outbox)
+
+    assert asyncio.run(scenario()) == ([b'aaaa\n', b'bb\n'], [b'cccccc\n'], 0)
+
+
+@pytest.mark.parametrize('overflow, kept', [('drop-oldest', [b'3', b'4']), ('drop-newest', [b'1', b'2'])])
+def test_outbox_overflow(overflow, kept):
+    outbox = Outbox(2, overflow)
+    assert [outbox.put(line) for line in (b'1', b'2', b'3', b'4')] == [False, False, True, True]
+    assert outbox.dropped == 2
+    assert asyncio.run(outbox.get_batch(100)) == kept
+
+
+def test_make_output():
+    assert isinstance(make_output('tcp://127.0.0.1:9000'), StreamServerOutput)
+    assert make_output('unix:/tmp/mmng.sock').path == '/tmp/mmng.sock'
+    udp = make_output('udp://[::1]:9000')
+    assert isinstance(udp, UDPOutput) and (udp.host, udp.port) == ('::1', 9000)
+    assert isinstance(make_output('https://example.com/pages'), HTTPOutput)
+    for spec in ('tcp://127.0.0.1', 'udp://:9000', 'carrier-pigeon'):
+        with pytest.raises(ValueError):
+            make_output(spec)
+    with pytest.raises(ValueError):
+        make_output('tcp://127.0.0.1:9000', overflow='drop-everything')
+
+
+def test_tcp_fan_out():
+    async def scenario():
+        output = StreamServerOutput('tcp', host='127.0.0.1', port=0)
+        publisher = Publisher([output])
+        await publisher.start()
+        clients = [await asyncio.open_connection('127.0.0.1', output.port) for _ in range(2)]
+        while output.stats['subscribers'] < 2:
+            await asyncio.sleep(0.01)
+        for i in range(3):
+            publisher.publish(PocsagMessage(address='1622020', trim_message=f'SIG{i}'))
+        received = [[json.loads(await reader.readline())['message'] for _ in range(3)] for reader, _ in clients]
+        for _, writer in clients:
+            writer.close()
+        await publisher.close()
+        return received, output.stats
+
+    received, stats = asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert received == [['SIG0', 'SIG1', 'SIG2']] * 2
+    assert stats['messages'] == 6 and stats['dropped'] == 0
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='UNIX sockets')
+def test_unix_socket(tmp_path):
+    path = str(tmp_path / 'mmng.sock')
+
+    async def scenario():
+        output = make_output(f'unix:{path}')
+        await output.start()
+        reader, writer = await asyncio.open_unix_connection(path)
+        while not output.stats['subscribers']:
+            await asyncio.sleep(0.01)
+        Publisher([output]).publish(PocsagMessage(address='1622020', trim_message='SIG2'))
+        line = await reader.readline()
+        writer.close()
+        await output.close()
+        return json.loads(line)
+
+    assert asyncio.run(asyncio.wait_for(scenario(), 5))['message'] == 'SIG2'
+
+
+def test_udp_packs_lines_into_datagrams():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        sock.settimeout(5)
+
+        async def scenario():
+            output = UDPOutput('udp', '127.0.0.1', sock.getsockname()[1])
+            publisher = Publisher([output])
+            await publisher.start()
+            for i in range(50):
+                publisher.publish(PocsagMessage(address='1622020', trim_message=f'SIG{i}'))
+            while output.messages < 50:
+                await asyncio.sleep(0.01)
+            await publisher.close()
+            return output.stats
+
+        stats = asyncio.run(scenario())
+        datagrams = [sock.recv(65536) for _ in range(stats['batches'])]
+    assert 1 < stats['batches'] < 50
+    assert all(len(datagram) <= 1400 for datagram in datagrams)
+    messages = [json.loads(line)['message'] for datagram in datagrams for line in datagram.splitlines()]
+    assert messages == [f'SIG{i}' for i in range(50)]
+
+
+def test_http_posts_batches():
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(self.rfile.read(int(self.headers['Content-Length'])).splitlines())
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    async def scenario():
+        output = HTTPOutput('http', f'http://127.0.0.1:{server.server_port}/pages')
+        publisher = Publisher([output])
+        await publisher.start()
+        for i in range(20):
+            publisher.publish(PocsagMessage(address='1622020', trim_message=f'SIG{i}'))
+        await publisher.close()
+        return output.stats
+
+    try:
+        stats = asyncio.run(scenario())
+    finally:
+        server.shutdown()
+    assert stats['messages'] == 20 and stats['failed'] == 0
+    assert stats['batches'] == len(received) < 20
+    assert [json.loads(line)['message'] for batch in received for line in batch] == [f'SIG{i}' for i in range(20)]
+
+
+def test_http_output_survives_any_error():
+    async def scenario():
+        output = HTTPOutput('http', 'http://127.0.0.1:1/pages')
+        posted = []
+
+        def post(body):
+            posted.append(body)
+            if len(posted) == 1:
+                raise ValueError('garbled')
+
+        output._post = post
+        await output.start()
+        output.publish(b'{"message": "one"}\n')
+        while not output.failed:
+            await asyncio.sleep(0.01)
+        output.publish(b'{"message": "two"}\n')
+        await output.close()
+        return output.stats, posted
+
+    stats, posted = asyncio.run(asyncio.wait_for(scenario(), 10))
+    assert stats['failed'] == 1 and stats['messages'] == 1
+    assert posted[-1] == b'{"message": "two"}\n'
@@ -0,0 +1,55 @@
+from collections import Counter
+
+from mmng_ui.rates import HeavyHitters, RateSeries, RateStats
+from mmng_ui.reader import PocsagMessage
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_rate_series_buckets():
+    series = RateSeries(1, 5, 0.0)
+    series.add(0.2)
+    series.add(0.9, 2)
+    series.add(2.5)
+    assert series.values(2.5) == [0, 0, 3, 0, 1]
+    assert series.values(4.0) == [3, 0, 1, 0, 0]
+    series.add(6.1)
+    assert series.values(6.1) == [1, 0, 0, 0, 1]
+    assert series.values(100) == [0] * 5
+
+
+def test_heavy_hitters_keeps_frequent_keys():
+    hitters = HeavyHitters(8)
+    stream = ['busy'] * 50 + ['steady'] * 20 + [f'once {i}' for i in range(100)]
+    # Interleaved, so the frequent keys must survive the rare ones pushing them out; anything above 170 / 9 is kept
+    stream = [stream[(i * 37) % len(stream)] for i in range(len(stream))]
+    for key in stream:
+        hitters.add(key)
+    truth = Counter(stream)
+    top = dict(hitters.top(2))
+    assert set(top) == {'busy', 'steady'}
+    for key, count in top.items():
+        assert truth[key] - hitters.error <= count <= truth[key]
+    assert len(hitters) <= 8 and hitters.total == len(stream)
+
+
+def test_rate_stats():
+    clock = FakeClock()
+    rates = RateStats(top=10, clock=clock)
+    for second in range(3):
+        for _ in range(second + 1):
+            rates.record(PocsagMessage(address='1234567', trim_message='SIG2'))
+        clock.now += 1
+    rates.record(PocsagMessage(address='', trim_message=''))
+    assert rates.series('second')[-4:] == [1, 2, 3, 0]
+    assert rates.series('minute')[-1] + rates.series('minute')[-2] == 6
+    assert sum(rates.series('day')) == 6
+    assert rates.busiest(1) == [('1234567', 6)]
+    rates.clear()
+    assert sum(rates.series('hour')) == 0 and rates.busiest() == []
@@ -1,7 +1,9 @@
-import moment
+from datetime import datetime
+
 import pytest
 
-from mmng_ui.reader import ParseLine, PocsagMessage
+from mmng_ui.metrics import METRICS
+from mmng_ui.reader import FragmentStore, ParseLine, PocsagMessage, decode_timestamp
 
 
 @pytest.fixture
@@ -16,7 +18,8 @@ def test_POCSAG_parse_line(sample_data):
     parse_line = ParseLine()
     result, json_detected = parse_line.parse(sample_data)
     assert result.address == '1622020'
-    assert result.timestamp == moment.date(2024, 9, 23, 12, 38, 00)
+    assert (result.function, result.demod_name) == (0, 'POCSAG512')
+    assert result.timestamp == datetime(2024, 9, 23, 12, 38, 00)
     assert result.trim_message == '@@E24092310740 SIG2 BNSD7879 REQ1220 DSP1237 LOC 122 DAY ST BAIRNSDALE /VICTORIA ST :@BAIRNSDALE PUBLIC HOSPITAL SVVB SE 8501 E11 CC: IHTAIR2 - AIR AMBULANCE TRANSFER ACUITY: MEDIUM'
     assert json_detected is False
 
@@ -27,6 +30,19 @@ def test_parse_line_json(sample_json_data):
     assert result.trim_message == 'Time Critical Incident - Clear ASAP - or advise Comms of Time to Clear (Via Radio)'
     assert json_detected is True
 
+def test_parse_line_json_fields():
+    parse_line = ParseLine(json_detected=True)
+    result, _ = parse_line.parse('{"demod_name":"POCSAG512","address":123456,"function":1,"numeric":"0412 345"}')
+    assert (result.address, result.function, result.demod_name) == ('123456', 1, 'POCSAG512')
+    assert result.trim_message == '0412 345'
+    result, _ = parse_line.parse('{"demod_name":"POCSAG512","alpha":"ÄTESTÜ page<ETX><NUL>"}')
+    assert (result.address, result.trim_message) == ('', '[TEST] page')
+    result = parse_line.parse_record(b'{"address":1920312,"function":3,"alpha":"Kept"}')
+    assert (result.address, result.trim_message) == ('1920312', 'Kept')
+    assert parse_line.parse_record(b'Jibberish').trim_message == 'ERROR: multimon-ng returned non-JSON: Jibberish'
+    assert parse_line.parse_record(b' \t\r') is None
+
+
 def test_parse_line_invalid_not_json():
     parse_line = ParseLine(json_detected=True)
     result, json_detected = parse_line.parse('Jibberish that is not JSON')
@@ -81,4 +97,131 @@ def test_default_case():
     result, json_detected = parse_line.parse(line)
     # assert timestamp is None
     assert result.address == ''
-    assert result.trim_message == ''
\ No newline at end of file
+    assert result.trim_message == ''
+
+def test_POCSAG_numeric_message():
+    parse_line = ParseLine()
+    result, json_detected = parse_line.parse(
+        '2024-09-23 12:38:02: POCSAG1200: Address:  123456  Function: 1  Numeric:   0412 345 678')
+    assert result.address == '1234561'
+    assert result.timestamp is None
+    assert result.trim_message == '0412 345 678'
+
+
+def test_POCSAG_no_function_code():
+    parse_line = ParseLine(send_function_code=False)
+    result, json_detected = parse_line.parse(
+        'POCSAG512: Address:  162202  Function: 0  Alpha:   ÄTESTÜ page<ETX><NUL>')
+    assert result.address == '162202'
+    assert result.trim_message == '[TEST] page'
+
+
+def test_POCSAG_fallback_matches_fast_path(sample_data):
+    # The field-by-field path must agree with the single-pass pattern
+    fast, _ = ParseLine().parse(sample_data)
+    slow = ParseLine()._parse_pocsag(sample_data)
+    assert (slow.address, slow.timestamp, slow.trim_message, slow.function, slow.demod_name) == \
+           (fast.address, fast.timestamp, fast.trim_message, fast.function, fast.demod_name)
+
+
+def test_FLEX_fragmented_message():
+    parse_line = ParseLine()
+    result, _ = parse_line.parse('FLEX: 2024-09-23 12:38:00 1600/2/F/A 10.120 [001234567] ALN First half ')
+    assert result.address == '001234567'
+    assert result.trim_message == ''
+    result, _ = parse_line.parse('FLEX: 2024-09-23 12:38:01 1600/2/C/A 10.120 [001234567] ALN and second half')
+    assert result.address == '001234567'
+    assert result.trim_message == 'First halfand second half'
+
+
+@pytest.mark.parametrize('time_string, expected', [
+    ('2024-09-23 12:38:00', datetime(2024, 9, 23, 12, 38, 0)),
+    ('2024-9-3 01:02:03', datetime(2024, 9, 3, 1, 2, 3)),
+    ('23 September 2024 12:38:00', datetime(2024, 9, 23, 12, 38, 0)),
+    ('2024-13-23 12:38:00', None),
+    ('23 Smarch 2024 12:38:00', None),
+])
+def test_decode_timestamp(time_string, expected):
+    assert decode_timestamp(time_string) == expected
+
+
+def test_parse_many_bytes(sample_data):
+    chunk = (f'{sample_data}\n\nInvalid Message\r\n'
+             '2024-09-23 12:38:02: POCSAG1200: Address: 123456  Function: 1  Numeric: 000\n')
+    results = list(ParseLine().parse_many(chunk.encode()))
+    assert [result.address for result in results] == ['1622020', '', '1234561']
+    assert results[2].trim_message == '000'
+
+
+def test_parse_many_json_lines(sample_json_data):
+    parse_line = ParseLine()
+    results = list(parse_line.parse_many([sample_json_data.encode(), '', sample_json_data, 'Jibberish']))
+    assert parse_line.json_detected is True
+    assert [result.address for result in results] == ['1920312', '1920312', '']
+    assert results[2].trim_message == 'ERROR: multimon-ng returned non-JSON: Jibberish'
+
+
+def test_parse_record_matches_parse(sample_data):
+    lines = [
+        sample_data,
+        '2024-09-23 12:38:02: POCSAG1200: Address: 123456  Function: 1  Numeric: 000',
+        'POCSAG512: Address:  162202  Function: 0  Alpha:   ÄTESTÜ page<ETX><NUL>',
+        'POCSAG512: Address:  162202  Function: 0 ',
+        'FLEX: 2024-09-23 12:38:00 1600/2/K/A 10.120 [001234567] ALN Complete',
+        'Invalid Message',
+    ]
+    by_line, by_record = ParseLine(), ParseLine()
+    for line in lines:
+        expected, _ = by_line.parse(line)
+        record = f'{line}\r'.encode()
+        result = by_record.parse_record(record)
+        assert (result.address, result.timestamp, result.trim_message, result.function, result.demod_name) == \
+               (expected.address, expected.timestamp, expected.trim_message, expected.function, expected.demod_name)
+    assert by_record.json_detected is False
+    assert by_record.parse_record(b' \r') is None
+
+
+def test_parse_record_json(sample_json_data):
+    parse_line = ParseLine()
+    result = parse_line.parse_record(sample_json_data.encode())
+    assert parse_line.json_detected is True
+    assert result.address == '1920312'
+
+
+def test_parse_many_empty():
+    assert list(ParseLine().parse_many(b'\n\n')) == []
+
+
+def test_FLEX_fragments_per_instance():
+    first, second = ParseLine(), ParseLine()
+    first.parse('FLEX: 2024-09-23 12:38:00 1600/2/F/A 10.120 [001234567] ALN One ')
+    second.parse('FLEX: 2024-09-23 12:38:00 1600/2/F/A 10.120 [001234567] ALN Uno ')
+    first.parse('FLEX: 2024-09-23 12:38:00 1600/2/F/B 10.120 [001234567] ALN Other phase ')
+    result, _ = first.parse('FLEX: 2024-09-23 12:38:01 1600/2/C/A 10.121 [001234567] ALN two')
+    assert result.trim_message == 'Onetwo'
+    result, _ = second.parse('FLEX: 2024-09-23 12:38:01 1600/2/C/A 10.121 [001234567] ALN dos')
+    assert result.trim_message == 'Unodos'
+    assert len(first.fragments) == 1
+
+
+def test_fragment_store_expiry():
+    evicted, expired = METRICS.counter('fragments evicted').total, METRICS.counter('fragments expired').total
+    now = [0.0]
+    store = FragmentStore(max_entries=2, ttl=10, clock=lambda: now[0])
+    store.add('a', 'one ')
+    store.add('a', 'two ')
+    store.add('b', 'lost')
+    now[0] = 5
+    store.add('c', 'three')
+    assert store.evicted == 1
+    assert 'a' not in store
+    now[0] = 16
+    assert store.pop('c') == ''
+    assert store.expired == 2
+    assert METRICS.counter('fragments evicted').total - evicted == 1
+    assert METRICS.counter('fragments expired').total - expired == 2
+    assert store.stats['pending'] == 0
+
+    store.add('d', 'four')
+    assert store.memory > 0
+    assert store.pop('d') == 'four'
@@ -0,0 +1,37 @@
+import asyncio
+
+from mmng_ui.metrics import METRICS
+from mmng_ui.scheduler import UpdateScheduler
+
+
+def test_scheduler_coalesces_bursts():
+    async def scenario():
+        batches = []
+        updates = UpdateScheduler(batches.append, max_fps=20)
+        before = METRICS.counter('coalesced').total
+        updates.add('first')
+        await asyncio.sleep(0)
+        for i in range(100):
+            updates.add(i)
+        assert updates.pending == 100
+        await asyncio.sleep(0.1)
+        return batches, updates.stats, METRICS.counter('coalesced').total - before
+
+    batches, stats, coalesced = asyncio.run(scenario())
+    assert batches == [['first'], list(range(100))]
+    assert stats == {'items': 101, 'frames': 2, 'coalesced': 99}
+    assert coalesced == 99
+
+
+def test_scheduler_flush_now():
+    async def scenario():
+        batches = []
+        updates = UpdateScheduler(batches.append, max_fps=1)
+        updates.add('a')
+        updates.add('b')
+        updates.close()
+        updates.add('c')
+        await asyncio.sleep(0.05)
+        return batches
+
+    assert asyncio.run(scenario()) == [['a', 'b']]
@@ -0,0 +1,77 @@
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from mmng_ui.reader import PocsagMessage
+from mmng_ui.store import MessageStore, default_path, parse_query
+
+
+def message(address, text, when):
+    return PocsagMessage(current_time=when, timestamp=when, address=address, trim_message=text, port=8888, peer='::1')
+
+
+def test_store_and_search(tmp_path):
+    start = datetime(2024, 9, 23, 12, 0)
+    store = MessageStore(str(tmp_path / 'messages.db'), batch_size=7)
+    for i in range(100):
+        store.add(message(str(1000 + i % 10), f'Message {i} {"fire" if i % 3 == 0 else "water"}', start
+                          + timedelta(minutes=i)))
+    store.close()
+    assert store.written == 100
+    assert store.dropped == 0
+
+    store = MessageStore(str(tmp_path / 'messages.db'))
+    assert len(store) == 100
+    fire = store.search('fire')
+    assert len(fire) == 34
+    assert fire[0].trim_message == 'Message 99 fire'
+    assert fire[0].timestamp == start + timedelta(minutes=99)
+    assert fire[0].port == 8888 and fire[0].peer == '::1'
+
+    assert [m.trim_message for m in store.search('FIRE', address='1003')] == \
+        ['Message 93 fire', 'Message 63 fire', 'Message 33 fire', 'Message 3 fire']
+    assert len(store.search(since=start + timedelta(minutes=90))) == 10
+    assert len(store.search(until=start + timedelta(minutes=10))) == 10
+    assert len(store.search(limit=5)) == 5
+    assert store.search('"unbalanced') == []
+    store.close()
+
+
+def test_store_survives_a_locked_database(tmp_path):
+    path = str(tmp_path / 'messages.db')
+    store = MessageStore(path, timeout=0.05)
+    other = sqlite3.connect(path)
+    other.execute('BEGIN EXCLUSIVE')
+    store.add(message('1000', 'locked out', datetime(2024, 9, 23, 12, 0)))
+    deadline = time.monotonic() + 5
+    while not store.failed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    other.rollback()
+    other.close()
+    store.add(message('1000', 'written', datetime(2024, 9, 23, 12, 1)))
+    store.close()
+    assert store.stats == {'written': 1, 'dropped': 0, 'failed': 1}
+    assert 'locked' in store.error
+
+
+def test_store_close_gives_up_on_a_full_queue(tmp_path):
+    store = MessageStore(str(tmp_path / 'messages.db'), max_queue=1, timeout=0.05)
+    store._queue.put(None)
+    store._writer.join()
+    store.add(message('1000', 'never written', datetime(2024, 9, 23, 12, 0)))
+    store.close()
+    assert store.written == 0
+
+
+def test_default_path_is_per_instance():
+    assert default_path([8888]) != default_path([8889]) != default_path([8888, 8889])
+    assert default_path([8888]).endswith('messages-8888.db')
+
+
+def test_parse_query():
+    assert parse_query('fire address:1234567 since:2024-09-23 brigade') == {
+        'text': 'fire brigade',
+        'address': '1234567',
+        'since': datetime(2024, 9, 23),
+    }
+    assert parse_query('until:soon') == {'text': 'until:soon'}